@@ -28,6 +28,7 @@ Usage:
 import sys
 import os
 import shutil
+import multiprocessing
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -473,6 +474,9 @@ class HeatSystemDesignGUI(QMainWindow):
         self.cop_filename = COP['COP-filename']
 
 if __name__ == '__main__':
+    # Required for the worker processes of the parallel calculations in the frozen application
+    multiprocessing.freeze_support()
+
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
 
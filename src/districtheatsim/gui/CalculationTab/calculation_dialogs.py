@@ -491,6 +491,11 @@ class NetGenerationDialog(QDialog):
         self.insulation_filterInput.addItems(["2v", "1v", "S"])
         layout.addWidget(self.insulation_filterInput)
         self.insulation_filterInput.currentIndexChanged.connect(self.updateInputFieldsVisibility)
+
+        self.optimization_strategyInput = QComboBox(self)
+        self.optimization_strategyInput.addItems(["sequential", "batch"])
+        self.optimization_strategyInput.setToolTip("sequential: eine Leitung je Rohrnetzberechnung, batch: alle Leitungen je Iteration")
+        layout.addWidget(self.optimization_strategyInput)
     
         return layout
 
@@ -605,6 +610,7 @@ class NetGenerationDialog(QDialog):
 
         self.material_filterInput.setVisible(self.DiameterOpt_ckecked)
         self.insulation_filterInput.setVisible(self.DiameterOpt_ckecked)
+        self.optimization_strategyInput.setVisible(self.DiameterOpt_ckecked)
 
         self.insulation_filterInput.currentIndexChanged.connect(self.updateInputFieldsVisibility)
 
@@ -751,6 +757,7 @@ class NetGenerationDialog(QDialog):
             v_max_pipe = float(self.v_max_pipeInput.text())
             material_filter = self.material_filterInput.currentText()
             insulation_filter = self.insulation_filterInput.currentText()
+            optimization_strategy = self.optimization_strategyInput.currentText()
 
         supply_temperature_net = self.calculateTemperatureCurve()
         flow_pressure_pump = float(self.parameter_rows_net[5].itemAt(1).widget().text())
@@ -774,7 +781,7 @@ class NetGenerationDialog(QDialog):
             self.generate_callback(vorlauf_path, ruecklauf_path, hast_path, erzeugeranlagen_path, json_path, rl_temp_heat_consumer, 
                                    supply_temperature_heat_consumer, supply_temperature_net, flow_pressure_pump, lift_pressure_pump, self.netconfiguration, 
                                    dT_RL, v_max_heat_consumer, self.building_temp_checked, pipetype, v_max_pipe, material_filter, insulation_filter, 
-                                   self.DiameterOpt_ckecked, import_type)
+                                   self.DiameterOpt_ckecked, optimization_strategy, import_type)
 
         self.accept()
 
@@ -812,6 +819,25 @@ class ZeitreihenrechnungDialog(QDialog):
         self.layout.addWidget(self.EndTimeStepLabel)
         self.layout.addWidget(self.EndTimeStepInput)
 
+        # Parallele Berechnung
+        self.NumWorkersLabel = QLabel("Anzahl paralleler Prozesse (1 = sequenzielle Berechnung):", self)
+        self.NumWorkersInput = QLineEdit("1", self)
+
+        self.layout.addWidget(self.NumWorkersLabel)
+        self.layout.addWidget(self.NumWorkersInput)
+
+        # Zusammenfassen ähnlicher Zeitschritte
+        self.ClusterToleranceLabel = QLabel("Toleranz für das Zusammenfassen ähnlicher Zeitschritte (relativ zur Spitzenlast, leer = alle Zeitschritte berechnen):", self)
+        self.ClusterToleranceInput = QLineEdit("", self)
+
+        self.layout.addWidget(self.ClusterToleranceLabel)
+        self.layout.addWidget(self.ClusterToleranceInput)
+
+        # Ersatzmodell
+        self.SurrogateModelCheckbox = QCheckBox("Schnelle Jahresabschätzung mit Ersatzmodell", self)
+        self.SurrogateModelCheckbox.setToolTip("Das Netz wird nur für einige repräsentative Laststufen vollständig berechnet, die übrigen Zeitschritte werden aus einem daraus abgeleiteten Ersatzmodell bestimmt.")
+        self.layout.addWidget(self.SurrogateModelCheckbox)
+
         # Dateiauswahl
         self.fileInputlayout = QHBoxLayout(self)
 
@@ -848,7 +874,7 @@ class ZeitreihenrechnungDialog(QDialog):
 
     def validateInputs(self):
         """
-        Validates the start and end time steps.
+        Validates the start and end time steps, the number of worker processes and the clustering tolerance.
 
         Returns:
             bool: True if inputs are valid, False otherwise.
@@ -862,6 +888,12 @@ class ZeitreihenrechnungDialog(QDialog):
         if start > end:
             QMessageBox.warning(self, "Ungültige Eingabe", "Der Startschritt darf nicht größer als der Endschritt sein.")
             return False
+        if int(self.NumWorkersInput.text()) < 1:
+            QMessageBox.warning(self, "Ungültige Eingabe", "Die Anzahl paralleler Prozesse muss mindestens 1 betragen.")
+            return False
+        if self.ClusterToleranceInput.text().strip() and float(self.ClusterToleranceInput.text()) <= 0:
+            QMessageBox.warning(self, "Ungültige Eingabe", "Die Toleranz für das Zusammenfassen der Zeitschritte muss größer als 0 sein.")
+            return False
         return True
 
     def selectFilename(self, lineEdit):
@@ -880,10 +912,13 @@ class ZeitreihenrechnungDialog(QDialog):
         Gets the values from the dialog.
 
         Returns:
-            dict: Dictionary containing the results filename, start time step, and end time step.
+            dict: Dictionary containing the results filename, start time step, end time step, number of worker processes, clustering tolerance and surrogate model flag.
         """
         return {
             'results_filename': self.resultsFileInput.text(),
             'start': int(self.StartTimeStepInput.text()),
-            'end': int(self.EndTimeStepInput.text())
+            'end': int(self.EndTimeStepInput.text()),
+            'num_workers': int(self.NumWorkersInput.text()),
+            'cluster_tolerance': float(self.ClusterToleranceInput.text()) if self.ClusterToleranceInput.text().strip() else None,
+            'surrogate_model': self.SurrogateModelCheckbox.isChecked()
         }
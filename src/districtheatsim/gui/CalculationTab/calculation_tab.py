@@ -6,6 +6,7 @@ Description: Contains the CalculationTab.
 """
 
 import logging
+import os
 import numpy as np
 import pandapipes as pp
 import csv
@@ -254,12 +255,15 @@ class CalculationTab(QWidget):
             netCalcInputs = dialog.getValues()
             self.calc1 = netCalcInputs["start"]
             self.calc2 = netCalcInputs["end"]
+            self.num_workers = netCalcInputs["num_workers"]
+            self.surrogate_model = netCalcInputs["surrogate_model"]
+            self.cluster_tolerance = netCalcInputs["cluster_tolerance"]
             self.output_filename = netCalcInputs["results_filename"]
             self.simulate_net()
       
     def create_and_initialize_net_geojson(self, vorlauf, ruecklauf, hast, erzeugeranlagen, json_path, supply_temperature_heat_consumer, return_temperature_heat_consumer, supply_temperature, \
                                           flow_pressure_pump, lift_pressure_pump, netconfiguration, dT_RL, v_max_heat_consumer, building_temp_checked, \
-                                          pipetype, v_max_pipe, material_filter, insulation_filter, DiameterOpt_ckecked):
+                                          pipetype, v_max_pipe, material_filter, insulation_filter, DiameterOpt_ckecked, optimization_strategy="sequential"):
         """
         Creates and initializes the network from GeoJSON files.
 
@@ -283,6 +287,7 @@ class CalculationTab(QWidget):
             material_filter: Material filter for pipes.
             insulation_filter: Insulation filter for pipes.
             DiameterOpt_ckecked: Flag indicating if diameter optimization is checked.
+            optimization_strategy: Strategy of the pipe diameter optimization, "sequential" or "batch".
         """
         self.supply_temperature_heat_consumer = supply_temperature_heat_consumer
         self.return_temperature_heat_consumer = return_temperature_heat_consumer
@@ -297,7 +302,7 @@ class CalculationTab(QWidget):
         args = (vorlauf, ruecklauf, hast, erzeugeranlagen, json_path, self.COP_filename, return_temperature_heat_consumer, supply_temperature_heat_consumer, supply_temperature, flow_pressure_pump, lift_pressure_pump, \
                 netconfiguration, pipetype, v_max_pipe, material_filter, insulation_filter, self.base_path, self.dT_RL, self.v_max_heat_consumer, self.DiameterOpt_ckecked)
         kwargs = {"import_type": "GeoJSON"}
-        self.initializationThread = NetInitializationThread(*args, **kwargs)
+        self.initializationThread = NetInitializationThread(*args, optimization_strategy=optimization_strategy, **kwargs)
         self.common_thread_initialization()
 
     def common_thread_initialization(self):
@@ -497,7 +502,9 @@ class CalculationTab(QWidget):
         try:
             self.calculationThread = NetCalculationThread(self.net, self.yearly_time_steps, self.waerme_ges_W, self.calc1, self.calc2, self.supply_temperature, self.supply_temperature_heat_consumer, \
                                                           self.return_temperature_heat_consumer, self.supply_temperature_buildings, self.return_temperature_buildings, self.supply_temperature_buildings_curve, \
-                                                            self.return_temperature_buildings_curve, self.dT_RL, self.netconfiguration, self.building_temp_checked, self.TRY_filename, self.COP_filename)
+                                                            self.return_temperature_buildings_curve, self.dT_RL, self.netconfiguration, self.building_temp_checked, self.TRY_filename, self.COP_filename, \
+                                                            num_workers=self.num_workers, results_path=os.path.splitext(self.output_filename)[0] + "_Netzergebnisse", \
+                                                            surrogate_model=self.surrogate_model, cluster_tolerance=self.cluster_tolerance)
             self.calculationThread.calculation_done.connect(self.on_simulation_done)
             self.calculationThread.calculation_error.connect(self.on_simulation_error)
             self.calculationThread.start()
@@ -519,7 +526,11 @@ class CalculationTab(QWidget):
         self.waerme_ges_kW = (np.sum(self.waerme_ges_W, axis=0)/1000)[self.calc1:self.calc2]
         self.strom_wp_kW = (np.sum(self.strom_wp_W, axis=0)/1000)[self.calc1:self.calc2]
 
-        self.pump_results = calculate_results(self.net, self.net_results)
+        # The surrogate model directly returns the pump results
+        if self.surrogate_model:
+            self.pump_results = self.net_results
+        else:
+            self.pump_results = calculate_results(self.net, self.net_results)
 
         self.plot_data =  self.time_steps, self.waerme_ges_kW, self.strom_wp_kW, self.pump_results
         self.plot_data_func(self.plot_data)
@@ -523,6 +523,9 @@ class WeightDialog(QDialog):
         wgk_input (QLineEdit): Input field for the weight of heat generation costs.
         co2_input (QLineEdit): Input field for the weight of specific CO2 emissions.
         pe_input (QLineEdit): Input field for the weight of the primary energy factor.
+        num_workers_input (QLineEdit): Input field for the number of worker processes of the optimization.
+        method_input (QComboBox): Selection of the optimization method.
+        time_limit_input (QLineEdit): Input field for the time budget of the optimization.
         button_box (QDialogButtonBox): Dialog button box for OK and Cancel buttons.
     """
     
@@ -543,10 +546,28 @@ class WeightDialog(QDialog):
         self.pe_input = QLineEdit("0.0", self)
         self.pe_input.setToolTip("Geben Sie das Gewicht für den Primärenergiefaktor ein (z.B. 1.0 für höchste Priorität oder 0.0 für keine Berücksichtigung).")
 
+        self.num_workers_input = QLineEdit("1", self)
+        self.num_workers_input.setToolTip("Geben Sie die Anzahl der Prozesse ein, auf die die Berechnung der Gradienten verteilt wird (1 für eine Berechnung ohne Parallelisierung).")
+
         form_layout = QFormLayout()
         form_layout.addRow("Wärmegestehungskosten", self.wgk_input)
         form_layout.addRow("Spezifische Emissionen", self.co2_input)
         form_layout.addRow("Primärenergiefaktor", self.pe_input)
+        form_layout.addRow("Anzahl Prozesse", self.num_workers_input)
+
+        self.method_input = QComboBox(self)
+        self.method_input.addItem("Lokal (SLSQP)", "SLSQP")
+        self.method_input.addItem("Multistart (SLSQP)", "multistart")
+        self.method_input.addItem("Differentielle Evolution", "differential_evolution")
+        self.method_input.addItem("Pareto-Front (NSGA-II)", "pareto")
+        self.method_input.setToolTip("Wählen Sie das Optimierungsverfahren. Die globalen Verfahren finden bessere Lösungen, benötigen aber deutlich mehr Berechnungen. "
+                                     "Die Pareto-Front enthält die Designs für alle Gewichtungen, die Gewichte wählen nur das zunächst berechnete Design aus.")
+
+        self.time_limit_input = QLineEdit("", self)
+        self.time_limit_input.setToolTip("Geben Sie das Zeitbudget der Optimierung in Sekunden ein. Nach Ablauf wird das beste bisher gefundene Design verwendet (leer für kein Zeitbudget).")
+
+        form_layout.addRow("Optimierungsverfahren", self.method_input)
+        form_layout.addRow("Zeitbudget in s", self.time_limit_input)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         self.button_box.accepted.connect(self.accept)
@@ -584,4 +605,38 @@ class WeightDialog(QDialog):
             'WGK_Gesamt': wgk_weight,
             'specific_emissions_Gesamt': co2_weight,
             'primärenergiefaktor_Gesamt': pe_weight
-        }
\ No newline at end of file
+        }
+
+    def get_num_workers(self):
+        """
+        Gets the number of worker processes from the input field.
+
+        Returns:
+            int: Number of worker processes, at least 1.
+        """
+        try:
+            return max(1, int(self.num_workers_input.text()))
+        except ValueError:
+            return 1
+
+    def get_optimization_method(self):
+        """
+        Gets the selected optimization method.
+
+        Returns:
+            str: Optimization method, "SLSQP", "multistart", "differential_evolution" or "pareto".
+        """
+        return self.method_input.currentData()
+
+    def get_time_limit(self):
+        """
+        Gets the time budget from the input field.
+
+        Returns:
+            float: Time budget in seconds, None if no valid positive time budget is given.
+        """
+        try:
+            time_limit = float(self.time_limit_input.text())
+        except ValueError:
+            return None
+        return time_limit if time_limit > 0 else None
\ No newline at end of file
@@ -5,10 +5,12 @@ Date: 2024-08-01
 Description: Contains the MixdesignTab.
 """
 
+import copy
 import json
 import pandas as pd
 import traceback
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QProgressBar, QTabWidget, QMessageBox, QFileDialog, QMenuBar, QScrollArea, QAction, QDialog)
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QProgressBar, QTabWidget, QMessageBox, QFileDialog, QMenuBar, QScrollArea, QAction, QDialog, \
+                             QPlainTextEdit)
 from PyQt5.QtCore import pyqtSignal, QEventLoop
 from heat_generators.heat_generator_classes import *
 from gui.MixDesignTab.mix_design_dialogs import EconomicParametersDialog, NetInfrastructureDialog, WeightDialog
@@ -19,6 +21,7 @@ from gui.MixDesignTab.cost_tab import CostTab
 from gui.MixDesignTab.results_tab import ResultsTab
 from gui.MixDesignTab.sensitivity_tab import SensitivityTab
 from utilities.test_reference_year import import_TRY
+from utilities.cop_service import load_COP_file
 
 class CustomJSONEncoder(json.JSONEncoder):
     """
@@ -73,6 +76,9 @@ class MixDesignTab(QWidget):
         resultTab (ResultsTab): Tab for results display.
         sensitivityTab (SensitivityTab): Tab for sensitivity analysis.
         progressBar (QProgressBar): Progress bar for showing calculation progress.
+        optimizationLog (QPlainTextEdit): Convergence log of the optimization.
+        pareto_front (ParetoFront): Pareto front of the last Pareto optimization.
+        pareto_tech_objects (list): Copy of the technology objects the Pareto front was calculated for.
     """
     data_added = pyqtSignal(object)  # Signal that transfers data as an object
     
@@ -89,6 +95,8 @@ class MixDesignTab(QWidget):
         self.parent = parent
         self.results = {}
         self.tech_objects = []
+        self.pareto_front = None
+        self.pareto_tech_objects = []
         
         self.initDialogs()
         self.setupParameters()
@@ -123,6 +131,7 @@ class MixDesignTab(QWidget):
         self.createMenu()
         self.createTabs()
         self.createProgressBar()
+        self.createOptimizationLog()
         self.setLayout(self.createMainLayout())
 
     def createMainScrollArea(self):
@@ -218,6 +227,16 @@ class MixDesignTab(QWidget):
         self.progressBar = QProgressBar(self)
         self.mainLayout.addWidget(self.progressBar)
 
+    def createOptimizationLog(self):
+        """
+        Creates the text field for the convergence log of the optimization, it is shown once an optimization is started.
+        """
+        self.optimizationLog = QPlainTextEdit(self)
+        self.optimizationLog.setReadOnly(True)
+        self.optimizationLog.setMaximumHeight(150)
+        self.optimizationLog.setVisible(False)
+        self.mainLayout.addWidget(self.optimizationLog)
+
     def createMainLayout(self):
         """
         Creates the main layout for the tab.
@@ -288,13 +307,16 @@ class MixDesignTab(QWidget):
             return False
         return True
 
-    def start_calculation(self, optimize=False, weights=None):
+    def start_calculation(self, optimize=False, weights=None, num_workers=1, optimization_method="SLSQP", time_limit=None):
         """
         Starts the calculation process.
 
         Args:
             optimize (bool, optional): Whether to optimize the calculation. Defaults to False.
             weights (dict, optional): Weights for optimization. Defaults to None.
+            num_workers (int, optional): Number of worker processes for the optimization. Defaults to 1.
+            optimization_method (str, optional): Optimization method. Defaults to "SLSQP".
+            time_limit (float, optional): Time budget of the optimization in seconds. Defaults to None.
         """
         if not self.validateInputs():
             return
@@ -303,15 +325,24 @@ class MixDesignTab(QWidget):
             self.filename = self.techTab.FilenameInput.text()
             self.load_scale_factor = float(self.techTab.load_scale_factorInput.text())
             self.TRY_data = import_TRY(self.parent.try_filename)
-            self.COP_data = np.genfromtxt(self.parent.cop_filename, delimiter=';')
+            self.COP_data = load_COP_file(self.parent.cop_filename)
 
             self.calculationThread = CalculateMixThread(
                 self.filename, self.load_scale_factor, self.TRY_data, self.COP_data, self.gaspreis, 
                 self.strompreis, self.holzpreis, self.BEW, self.techTab.tech_objects, optimize, 
-                self.kapitalzins, self.preissteigerungsrate, self.betrachtungszeitraum, self.stundensatz, weights)
+                self.kapitalzins, self.preissteigerungsrate, self.betrachtungszeitraum, self.stundensatz, weights, num_workers=num_workers, 
+                optimization_method=optimization_method, time_limit=time_limit)
             
             self.calculationThread.calculation_done.connect(self.on_calculation_done)
             self.calculationThread.calculation_error.connect(self.on_calculation_error)
+            self.calculationThread.optimization_progress.connect(self.on_optimization_progress)
+            self.calculationThread.pareto_front_done.connect(self.on_pareto_front_done)
+            if optimize and optimization_method == "pareto":
+                # the designs of the front refer to the technologies before the calculation, which may remove technologies
+                self.pareto_tech_objects = copy.deepcopy(self.techTab.tech_objects)
+            if optimize:
+                self.optimizationLog.clear()
+                self.optimizationLog.setVisible(True)
             self.calculationThread.start()
             self.progressBar.setRange(0, 0)
         else:
@@ -337,6 +368,41 @@ class MixDesignTab(QWidget):
         self.save_heat_generation_results_to_csv(self.results)
         self.showConfirmationDialog()
 
+    def on_optimization_progress(self, entry):
+        """
+        Adds an entry of the convergence log of the optimization to the log field.
+
+        Args:
+            entry (dict): Log entry with the elapsed time, the number of evaluations, the best objective value and the message.
+        """
+        self.optimizationLog.appendPlainText(format_log_entry(entry))
+
+    def on_pareto_front_done(self, pareto_front):
+        """
+        Shows the Pareto front of a Pareto optimization, the design selected by the weights is highlighted.
+
+        Args:
+            pareto_front (ParetoFront): Pareto front of the Pareto optimization.
+        """
+        self.pareto_front = pareto_front
+        if len(pareto_front) > 0:
+            self.resultTab.plotParetoFront(pareto_front, pareto_front.select_weighted(self.calculationThread.weights))
+
+    def apply_pareto_design(self, index):
+        """
+        Applies a design of the Pareto front to the technologies and calculates the mix.
+
+        Args:
+            index (int): Index of the design in the Pareto front.
+        """
+        try:
+            self.techTab.tech_objects = self.pareto_front.apply(index, copy.deepcopy(self.pareto_tech_objects))
+        except ValueError as e:
+            QMessageBox.warning(self, "Design nicht übernommen", str(e))
+            return
+        self.techTab.updateTechList()
+        self.start_calculation()
+
     def on_calculation_error(self, error_message):
         """
         Handles calculation errors.
@@ -381,7 +447,8 @@ class MixDesignTab(QWidget):
         dialog = WeightDialog()
         if dialog.exec_() == QDialog.Accepted:
             weights = dialog.get_weights()
-            self.start_calculation(True, weights)
+            self.start_calculation(True, weights, num_workers=dialog.get_num_workers(), optimization_method=dialog.get_optimization_method(), 
+                                   time_limit=dialog.get_time_limit())
 
     def sensitivity(self, gas_range, electricity_range, wood_range, weights=None):
         """
@@ -404,25 +471,31 @@ class MixDesignTab(QWidget):
         self.load_scale_factor = float(self.techTab.load_scale_factorInput.text())
 
         self.TRY_data = import_TRY(self.parent.try_filename)
-        self.COP_data = np.genfromtxt(self.parent.cop_filename, delimiter=';')
+        self.COP_data = load_COP_file(self.parent.cop_filename)
+
+        # The dispatch does not depend on the prices, the whole price grid is calculated in one calculation
+        gas_prices, electricity_prices, wood_prices = self.generate_values(gas_range), self.generate_values(electricity_range), self.generate_values(wood_range)
+        gas_grid, electricity_grid, wood_grid = price_grid(gas_prices, electricity_prices, wood_prices)
+        result = self.calculate_mix(gas_grid, electricity_grid, wood_grid, weights)
+        if result is None:
+            return
+
+        shape = (len(gas_prices), len(electricity_prices), len(wood_prices))
+        waerme_ges_kW, strom_wp_kW = np.sum(result["waerme_ges_kW"]), np.sum(result["strom_wp_kW"])
+        WGK_Gesamt = np.broadcast_to(result['WGK_Gesamt'], shape)
+        wgk_heat_pump_electricity = np.broadcast_to(((strom_wp_kW/1000) * electricity_grid) / ((strom_wp_kW+waerme_ges_kW)/1000), shape)
 
         results = []
-        for gas_price in self.generate_values(gas_range):
-            for electricity_price in self.generate_values(electricity_range):
-                for wood_price in self.generate_values(wood_range):
-                    result = self.calculate_mix(gas_price, electricity_price, wood_price, weights)
-                    waerme_ges_kW, strom_wp_kW = np.sum(result["waerme_ges_kW"]), np.sum(result["strom_wp_kW"])
-                    wgk_heat_pump_electricity = ((strom_wp_kW/1000) * electricity_price) / ((strom_wp_kW+waerme_ges_kW)/1000)
-                    if result is not None:
-                        results.append({
-                            'gas_price': gas_price,
-                            'electricity_price': electricity_price,
-                            'wood_price': wood_price,
-                            'WGK_Gesamt': result['WGK_Gesamt'],
-                            'waerme_ges_kW': waerme_ges_kW,
-                            'strom_wp_kW': strom_wp_kW,
-                            'wgk_heat_pump_electricity': wgk_heat_pump_electricity
-                        })
+        for (i, j, k), WGK in np.ndenumerate(WGK_Gesamt):
+            results.append({
+                'gas_price': gas_prices[i],
+                'electricity_price': electricity_prices[j],
+                'wood_price': wood_prices[k],
+                'WGK_Gesamt': WGK,
+                'waerme_ges_kW': waerme_ges_kW,
+                'strom_wp_kW': strom_wp_kW,
+                'wgk_heat_pump_electricity': wgk_heat_pump_electricity[i, j, k]
+            })
 
         self.sensitivityTab.plotSensitivity(results)
         self.sensitivityTab.plotSensitivitySurface(results)
@@ -446,9 +519,9 @@ class MixDesignTab(QWidget):
         Calculates the energy mix for given prices and weights.
 
         Args:
-            gas_price (float): Gas price.
-            electricity_price (float): Electricity price.
-            wood_price (float): Wood price.
+            gas_price (float or np.ndarray): Gas price, broadcastable arrays calculate all price combinations at once.
+            electricity_price (float or np.ndarray): Electricity price.
+            wood_price (float or np.ndarray): Wood price.
             weights (dict): Weights for optimization.
 
         Returns:
@@ -9,7 +9,7 @@ import sys
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QHBoxLayout, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QScrollArea, QCheckBox, QComboBox, QApplication)
+                             QHeaderView, QScrollArea, QCheckBox, QComboBox, QApplication, QPushButton)
 from PyQt5.QtCore import Qt, pyqtSignal
 import numpy as np
 
@@ -123,6 +123,8 @@ class ResultsTab(QWidget):
         parent (QWidget): The parent widget.
         results (dict): A dictionary to store results.
         selected_variables (list): A list of selected variables for plotting.
+        pareto_front (ParetoFront): Pareto front of the last Pareto optimization.
+        selected_pareto_index (int): Index of the design selected in the Pareto front plot.
     """
     data_added = pyqtSignal(object)  # Signal, das Daten als Objekt überträgt
 
@@ -139,6 +141,8 @@ class ResultsTab(QWidget):
         self.parent = parent
         self.results = {}
         self.selected_variables = []
+        self.pareto_front = None
+        self.selected_pareto_index = None
 
         self.data_manager.project_folder_changed.connect(self.updateDefaultPath)
         self.updateDefaultPath(self.data_manager.project_folder)
@@ -179,6 +183,7 @@ class ResultsTab(QWidget):
 
         self.setupDiagrams()
         self.setupCalculationOptimization()
+        self.setupParetoFront()
 
         self.scrollArea.setWidget(self.scrollWidget)
         self.mainLayout.addWidget(self.scrollArea)
@@ -392,6 +397,88 @@ class ResultsTab(QWidget):
         self.plotVariables(self.figure1, self.results['time_steps'], self.selected_variables)
         self.canvas1.draw()
 
+    def setupParetoFront(self):
+        """
+        Sets up the Pareto front plot, it is shown once a Pareto optimization is done.
+        """
+        self.paretoLabel = QLabel('Pareto-Front')
+        self.paretoFigure = Figure(figsize=(8, 6))
+        self.paretoCanvas = FigureCanvas(self.paretoFigure)
+        self.paretoCanvas.setMinimumSize(500, 500)
+        self.paretoCanvas.mpl_connect('pick_event', self.onParetoPointPicked)
+
+        self.paretoSelectionLabel = QLabel('Klicken Sie auf einen Punkt der Pareto-Front, um das Design auszuwählen.')
+        self.applyParetoDesignButton = QPushButton('Design übernehmen und berechnen')
+        self.applyParetoDesignButton.setEnabled(False)
+        self.applyParetoDesignButton.clicked.connect(self.applyParetoDesign)
+
+        for widget in (self.paretoLabel, self.paretoCanvas, self.paretoSelectionLabel, self.applyParetoDesignButton):
+            widget.setVisible(False)
+            self.scrollLayout.addWidget(widget)
+
+    def plotParetoFront(self, pareto_front, selected_index=None):
+        """
+        Plots the Pareto front of the heat generation costs and the specific emissions, the color shows the primary energy factor.
+
+        Args:
+            pareto_front (ParetoFront): Pareto front of the Pareto optimization.
+            selected_index (int, optional): Index of the highlighted design. Defaults to None.
+        """
+        self.pareto_front = pareto_front
+        self.selected_pareto_index = selected_index
+
+        self.paretoFigure.clear()
+        ax = self.paretoFigure.add_subplot(111)
+        wgk, emissions, primary_energy = pareto_front.criteria.T
+        scatter = ax.scatter(wgk, emissions, c=primary_energy, cmap='viridis', picker=5)
+        self.paretoFigure.colorbar(scatter, ax=ax, label='Primärenergiefaktor')
+        if selected_index is not None:
+            ax.scatter(wgk[selected_index], emissions[selected_index], s=200, facecolors='none', edgecolors='red', linewidths=2, label='ausgewähltes Design')
+            ax.legend(loc='upper right')
+
+        ax.set_title("Pareto-Front")
+        ax.set_xlabel("Wärmegestehungskosten in €/MWh")
+        ax.set_ylabel("spez. CO2-Emissionen in t_CO2/MWh_th")
+        ax.grid()
+        self.paretoCanvas.draw()
+
+        for widget in (self.paretoLabel, self.paretoCanvas, self.paretoSelectionLabel, self.applyParetoDesignButton):
+            widget.setVisible(True)
+        self.applyParetoDesignButton.setEnabled(selected_index is not None)
+        if selected_index is not None:
+            self.showParetoSelection(selected_index)
+
+    def onParetoPointPicked(self, event):
+        """
+        Selects the design of a clicked point of the Pareto front.
+
+        Args:
+            event (PickEvent): The matplotlib pick event.
+        """
+        if self.pareto_front is None or len(event.ind) == 0:
+            return
+        self.plotParetoFront(self.pareto_front, int(event.ind[0]))
+
+    def showParetoSelection(self, index):
+        """
+        Shows the optimization criteria and the variables of a design of the Pareto front from the stored evaluations.
+
+        Args:
+            index (int): Index of the design.
+        """
+        criteria = self.pareto_front.get_criteria(index)
+        variables = ", ".join(f"{name}: {value:.1f}" for name, value in self.pareto_front.get_variables(index).items())
+        self.paretoSelectionLabel.setText(f"Wärmegestehungskosten: {criteria['WGK_Gesamt']:.2f} €/MWh, "
+                                          f"spez. CO2-Emissionen: {criteria['specific_emissions_Gesamt']:.4f} t_CO2/MWh_th, "
+                                          f"Primärenergiefaktor: {criteria['primärenergiefaktor_Gesamt']:.4f}\n{variables}")
+
+    def applyParetoDesign(self):
+        """
+        Applies the selected design of the Pareto front to the technologies and starts the calculation.
+        """
+        if self.pareto_front is not None and self.selected_pareto_index is not None:
+            self.parent.apply_pareto_design(self.selected_pareto_index)
+
     def plotPieChart(self):
         """
         Plots the pie chart for the energy shares.
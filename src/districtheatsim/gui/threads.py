@@ -15,9 +15,10 @@ from net_generation.import_and_create_layers import generate_and_export_layers
 
 from net_simulation_pandapipes.pp_net_initialisation_geojson import initialize_geojson
 from net_simulation_pandapipes.pp_net_time_series_simulation import thermohydraulic_time_series_net, import_results_csv, time_series_preprocessing
+from net_simulation_pandapipes.surrogate_model import surrogate_time_series_net
 from net_simulation_pandapipes.utilities import net_optimization
 
-from heat_generators.heat_generator_classes import Berechnung_Erzeugermix, optimize_mix
+from heat_generators.heat_generator_classes import Berechnung_Erzeugermix, optimize_mix, optimize_mix_pareto
 
 from geocoding.geocodingETRS89 import process_data
 
@@ -52,18 +53,22 @@ class NetInitializationThread(QThread):
     calculation_done = pyqtSignal(object)
     calculation_error = pyqtSignal(str)
 
-    def __init__(self, *args, mass_flow_secondary_producers=0.1, **kwargs):
+    def __init__(self, *args, mass_flow_secondary_producers=0.1, vectorized_controllers=False, optimization_strategy="sequential", **kwargs):
         """
         Initializes the NetInitializationThread.
 
         Args:
             *args: Positional arguments.
             mass_flow_secondary_producers (float): Mass flow of secondary producers. Defaults to 0.1.
+            vectorized_controllers (bool): Use one vectorized return temperature controller for all heat consumers. Defaults to False.
+            optimization_strategy (str): Strategy of the pipe diameter optimization, "sequential" or "batch". Defaults to "sequential".
             **kwargs: Keyword arguments.
         """
         super().__init__()
         self.args = args
         self.mass_flow_secondary_producers = mass_flow_secondary_producers
+        self.vectorized_controllers = vectorized_controllers
+        self.optimization_strategy = optimization_strategy
         self.kwargs = kwargs
 
     def run(self):
@@ -85,13 +90,15 @@ class NetInitializationThread(QThread):
                                                                              self.flow_pressure_pump, self.lift_pressure_pump, \
                                                                              self.netconfiguration, self.pipetype, self.dT_RL, \
                                                                              self.v_max_pipe, self.material_filter, self.insulation_filter, \
-                                                                             self.v_max_heat_consumer, self.mass_flow_secondary_producers)
+                                                                             self.v_max_heat_consumer, self.mass_flow_secondary_producers, \
+                                                                             vectorized_controllers=self.vectorized_controllers)
             else:
                 raise ValueError("Unbekannter Importtyp")
 
             # Common steps for both import types
             if self.DiameterOpt_ckecked == True:
-                self.net = net_optimization(self.net, self.v_max_pipe, self.v_max_heat_consumer, self.material_filter, self.insulation_filter)
+                self.net = net_optimization(self.net, self.v_max_pipe, self.v_max_heat_consumer, self.material_filter, self.insulation_filter, \
+                                            strategy=self.optimization_strategy)
             
             self.calculation_done.emit((self.net, self.yearly_time_steps, self.waerme_hast_ges_W, self.supply_temperature_heat_consumer, self.return_temperature_heat_consumer, \
                                         self.supply_temperature_buildings, self.return_temperature_buildings, self.supply_temperature_building_curve, self.return_temperature_building_curve, \
@@ -121,7 +128,7 @@ class NetCalculationThread(QThread):
 
     def __init__(self, net, yearly_time_steps, total_heat_W, calc1, calc2, supply_temperature, supply_temperature_heat_consumer, return_temperature_heat_consumer, supply_temperature_buildings, \
                  return_temperature_buildings, supply_temperature_buildings_curve, return_temperature_buildings_curve, dT_RL=5, netconfiguration=None, building_temp_checked=False, \
-                    TRY_filename=None, COP_filename=None):
+                    TRY_filename=None, COP_filename=None, num_workers=1, results_path=None, surrogate_model=False, cluster_tolerance=None):
         """
         Initializes the NetCalculationThread.
 
@@ -143,6 +150,10 @@ class NetCalculationThread(QThread):
             building_temp_checked (bool, optional): Whether building temperature is checked. Defaults to False.
             TRY_filename (str, optional): TRY filename. Defaults to None.
             COP_filename (str, optional): COP filename. Defaults to None.
+            num_workers (int, optional): Number of worker processes for the time series calculation. Defaults to 1.
+            results_path (str, optional): Directory the results of the time series calculation are streamed to. Defaults to None.
+            surrogate_model (bool, optional): Use the surrogate model instead of the full time series calculation, the results are then the pump results. Defaults to False.
+            cluster_tolerance (float, optional): Load tolerance for calculating only representative time steps. Defaults to None.
         """
         super().__init__()
         self.net = net
@@ -162,6 +173,10 @@ class NetCalculationThread(QThread):
         self.building_temp_checked = building_temp_checked
         self.TRY_filename = TRY_filename
         self.COP_filename = COP_filename
+        self.num_workers = num_workers
+        self.results_path = results_path
+        self.surrogate_model = surrogate_model
+        self.cluster_tolerance = cluster_tolerance
     
     def run(self):
         """
@@ -175,8 +190,14 @@ class NetCalculationThread(QThread):
                                                                                                                                 self.return_temperature_buildings_curve, self.dT_RL, \
                                                                                                                                 self.supply_temperature_buildings_curve, self.COP_filename)
 
-            self.time_steps, self.net, self.net_results = thermohydraulic_time_series_net(self.net, self.yearly_time_steps, self.waerme_hast_ges_W, self.calc1, \
-                                                                                          self.calc2, self.supply_temperature, self.supply_temperature_heat_consumer, self.return_temperature_heat_consumer)
+            if self.surrogate_model:
+                self.time_steps, self.net, self.net_results = surrogate_time_series_net(self.net, self.yearly_time_steps, self.waerme_hast_ges_W, self.calc1, self.calc2, \
+                                                                                        self.supply_temperature, self.supply_temperature_heat_consumer, self.return_temperature_heat_consumer)
+            else:
+                self.time_steps, self.net, self.net_results = thermohydraulic_time_series_net(self.net, self.yearly_time_steps, self.waerme_hast_ges_W, self.calc1, \
+                                                                                              self.calc2, self.supply_temperature, self.supply_temperature_heat_consumer, self.return_temperature_heat_consumer, \
+                                                                                              num_workers=self.num_workers, results_path=self.results_path, \
+                                                                                              cluster_tolerance=self.cluster_tolerance)
 
             self.calculation_done.emit((self.time_steps, self.net, self.net_results, self.waerme_hast_ges_W, self.strom_hast_ges_W))
         except Exception as e:
@@ -335,11 +356,16 @@ class CalculateMixThread(QThread):
     Signals:
         calculation_done (object): Emitted when the calculation is done.
         calculation_error (Exception): Emitted when an error occurs during the calculation.
+        optimization_progress (object): Emitted with every entry of the convergence log of the optimization.
+        pareto_front_done (object): Emitted with the Pareto front when a Pareto optimization is done.
     """
     calculation_done = pyqtSignal(object)
     calculation_error = pyqtSignal(Exception)
+    optimization_progress = pyqtSignal(object)
+    pareto_front_done = pyqtSignal(object)
 
-    def __init__(self, filename, load_scale_factor, TRY_data, COP_data, gas_price, electricity_price, wood_price, BEW, tech_objects, optimize, interest_on_capital, price_increase_rate, period, wage, weights):
+    def __init__(self, filename, load_scale_factor, TRY_data, COP_data, gas_price, electricity_price, wood_price, BEW, tech_objects, optimize, interest_on_capital, price_increase_rate, period, wage, weights, 
+                 num_workers=1, optimization_method="SLSQP", time_limit=None):
         """
         Initializes the CalculateMixThread.
 
@@ -348,9 +374,9 @@ class CalculateMixThread(QThread):
             load_scale_factor (float): Scaling factor for the load.
             TRY_data: Test Reference Year data.
             COP_data: Coefficient of Performance data.
-            gas_price (float): Gas price.
-            electricity_price (float): Electricity price.
-            wood_price (float): Wood price.
+            gas_price (float or np.ndarray): Gas price, broadcastable arrays calculate all price combinations with a single dispatch.
+            electricity_price (float or np.ndarray): Electricity price.
+            wood_price (float or np.ndarray): Wood price.
             BEW (str): Subsidy eligibility.
             tech_objects (list): List of technology objects.
             optimize (bool): Whether to optimize the mix.
@@ -359,6 +385,10 @@ class CalculateMixThread(QThread):
             period (int): Analysis period.
             wage (float): Wage rate.
             weights (dict): Weights for optimization criteria.
+            num_workers (int, optional): Number of worker processes for the optimization. Defaults to 1.
+            optimization_method (str, optional): Optimization method, "SLSQP", "multistart", "differential_evolution" or "pareto". With "pareto" the 
+                design of the Pareto front with the lowest weighted sum is calculated. Defaults to "SLSQP".
+            time_limit (float, optional): Time budget of the optimization in seconds. Defaults to None.
         """
         super().__init__()
         self.filename = filename
@@ -376,6 +406,9 @@ class CalculateMixThread(QThread):
         self.period = period
         self.wage = wage
         self.weights = weights
+        self.num_workers = num_workers
+        self.optimization_method = optimization_method
+        self.time_limit = time_limit
 
     def run(self):
         """
@@ -408,9 +441,17 @@ class CalculateMixThread(QThread):
             qext_kW *= self.load_scale_factor
             initial_data = time_steps, qext_kW, flow_temp_circ_pump, return_temp_circ_pump
 
-            if self.optimize:
+            if self.optimize and self.optimization_method == "pareto":
+                pareto_front = optimize_mix_pareto(self.tech_objects, initial_data, calc1, calc2, self.TRY_data, self.COP_data, self.gas_price, self.electricity_price, self.wood_price, self.BEW, \
+                                                   kapitalzins=self.interest_on_capital, preissteigerungsrate=self.price_increase_rate, betrachtungszeitraum=self.period, stundensatz=self.wage, \
+                                                   num_workers=self.num_workers, time_limit=self.time_limit, log_callback=self.optimization_progress.emit)
+                if len(pareto_front) > 0:
+                    self.tech_objects = pareto_front.apply(pareto_front.select_weighted(self.weights), self.tech_objects)
+                self.pareto_front_done.emit(pareto_front)
+            elif self.optimize:
                 self.tech_objects = optimize_mix(self.tech_objects, initial_data, calc1, calc2, self.TRY_data, self.COP_data, self.gas_price, self.electricity_price, self.wood_price, self.BEW, \
-                                            kapitalzins=self.interest_on_capital, preissteigerungsrate=self.price_increase_rate, betrachtungszeitraum=self.period, stundensatz=self.wage, weights=self.weights)
+                                            kapitalzins=self.interest_on_capital, preissteigerungsrate=self.price_increase_rate, betrachtungszeitraum=self.period, stundensatz=self.wage, weights=self.weights, num_workers=self.num_workers, \
+                                            method=self.optimization_method, time_limit=self.time_limit, log_callback=self.optimization_progress.emit)
 
             result = Berechnung_Erzeugermix(self.tech_objects, initial_data, calc1, calc2, self.TRY_data, self.COP_data, self.gas_price, self.electricity_price, self.wood_price, self.BEW, \
                                             kapitalzins=self.interest_on_capital, preissteigerungsrate=self.price_increase_rate, betrachtungszeitraum=self.period, stundensatz=self.wage)
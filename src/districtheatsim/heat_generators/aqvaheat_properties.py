@@ -0,0 +1,153 @@
+"""
+Filename: aqvaheat_properties.py
+Author: Dipl.-Ing. (FH) Jonas Pfeiffer
+Date: 2024-08-05
+Description: Contains the table of the thermodynamic properties of the vacuum ice process of AqvaHeat, calculated with CoolProp once per process.
+
+"""
+
+import os
+
+import numpy as np
+
+import CoolProp.CoolProp as CP
+
+class AqvaHeatProperties:
+    """
+    Thermodynamic properties of the vacuum ice process of AqvaHeat.
+
+    The properties only depend on the fluid and the intermediate temperature between the vacuum ice generator and the heat pump,
+    not on the load. They are calculated with CoolProp once per intermediate temperature and kept in a table, which can be saved
+    to and loaded from a NumPy file. The table is marked as modified when new properties are calculated until it is saved.
+
+    Args:
+        fluid (str, optional): Fluid of the vacuum ice process. Defaults to 'Water'.
+        condensing_pressure (float, optional): Pressure of the condensing vapor in Pa. Defaults to 14000.
+        cache_file (str, optional): NumPy file (.npz) the table is loaded from if it exists. Defaults to None.
+    """
+    def __init__(self, fluid='Water', condensing_pressure=14000, cache_file=None):
+        self.fluid = fluid
+        self.condensing_pressure = condensing_pressure
+        self.cache_file = cache_file
+        self.latent_heat = None
+        self.compression_enthalpies = {}
+        self.modified = False
+
+        if cache_file is not None and os.path.exists(cache_file):
+            self.load(cache_file)
+
+    def calculate_latent_heat(self):
+        """
+        Calculate the latent heat of the vapor condensing at the condensing pressure.
+
+        Returns:
+            float: Latent heat in J/kg.
+        """
+        return (CP.PropsSI('H', 'P', self.condensing_pressure, 'Q', 1, self.fluid) -
+                CP.PropsSI('H', 'P', self.condensing_pressure, 'Q', 0, self.fluid))
+
+    def calculate_compression_enthalpy(self, intermediate_temperature):
+        """
+        Calculate the enthalpy difference of the compression of the vapor from the triple point to the intermediate temperature.
+
+        Args:
+            intermediate_temperature (float): Intermediate temperature in °C.
+
+        Returns:
+            float: Isentropic enthalpy difference in J/kg.
+        """
+        # Initial conditions at the triple point, delta because of validity range
+        triple_point_pressure = CP.PropsSI('ptriple', 'T', 0, 'P', 0, self.fluid) + 0.01
+        triple_point_temperature = CP.PropsSI('T', 'Q', 0, 'P', triple_point_pressure + 1, self.fluid)
+
+        # Final conditions after first compression
+        final_temperature = intermediate_temperature + 273.15
+        final_pressure = CP.PropsSI('P', 'T', final_temperature, 'Q', 0, self.fluid)
+
+        return (CP.PropsSI('H', 'T', final_temperature, 'P', final_pressure, self.fluid) -
+                CP.PropsSI('H', 'T', triple_point_temperature, 'P', triple_point_pressure, self.fluid))
+
+    def get_latent_heat(self):
+        """
+        Get the latent heat, calculated on the first call.
+
+        Returns:
+            float: Latent heat in J/kg.
+        """
+        if self.latent_heat is None:
+            self.latent_heat = self.calculate_latent_heat()
+            self.modified = True
+        return self.latent_heat
+
+    def get_compression_enthalpy(self, intermediate_temperature):
+        """
+        Get the enthalpy difference of the compression for one or more intermediate temperatures.
+
+        Every distinct temperature is calculated with CoolProp only once, time-varying intermediate temperatures are evaluated from
+        the table.
+
+        Args:
+            intermediate_temperature (float or array-like): Intermediate temperature in °C.
+
+        Returns:
+            float or np.ndarray: Isentropic enthalpy difference in J/kg in the shape of the intermediate temperature.
+        """
+        temperatures = np.asarray(intermediate_temperature, dtype=float)
+        unique_temperatures, inverse = np.unique(temperatures, return_inverse=True)
+
+        for temperature in unique_temperatures.tolist():
+            if temperature not in self.compression_enthalpies:
+                self.compression_enthalpies[temperature] = self.calculate_compression_enthalpy(temperature)
+                self.modified = True
+
+        enthalpies = np.array([self.compression_enthalpies[temperature] for temperature in unique_temperatures.tolist()])[inverse].reshape(temperatures.shape)
+        return float(enthalpies) if temperatures.ndim == 0 else enthalpies
+
+    def save(self, cache_file=None):
+        """
+        Save the table to a NumPy file.
+
+        Args:
+            cache_file (str, optional): Path of the file. Defaults to the cache file of the table.
+        """
+        cache_file = cache_file or self.cache_file
+        temperatures = np.array(sorted(self.compression_enthalpies), dtype=float)
+        np.savez(cache_file, fluid=self.fluid, condensing_pressure=self.condensing_pressure, latent_heat=np.nan if self.latent_heat is None else self.latent_heat,
+                 temperatures=temperatures, compression_enthalpies=np.array([self.compression_enthalpies[temperature] for temperature in temperatures.tolist()], dtype=float))
+        self.modified = False
+
+    def load(self, cache_file):
+        """
+        Load the table from a NumPy file, tables of another fluid or condensing pressure are ignored.
+
+        Args:
+            cache_file (str): Path of the file.
+        """
+        with np.load(cache_file) as data:
+            if str(data['fluid']) != self.fluid or float(data['condensing_pressure']) != self.condensing_pressure:
+                return
+            if not np.isnan(data['latent_heat']):
+                self.latent_heat = float(data['latent_heat'])
+            self.compression_enthalpies.update(zip(data['temperatures'].tolist(), data['compression_enthalpies'].tolist()))
+
+# Tabelle der Stoffwerte, wird beim ersten Aufruf je Prozess erstellt
+aqvaheat_properties = None
+
+def get_aqvaheat_properties(cache_file=None):
+    """
+    Get the property table of AqvaHeat of the process, it is created on the first call.
+
+    Args:
+        cache_file (str, optional): NumPy file (.npz) the table is loaded from the first time it is requested. Defaults to None.
+
+    Returns:
+        AqvaHeatProperties: Property table.
+    """
+    global aqvaheat_properties
+    if aqvaheat_properties is None:
+        aqvaheat_properties = AqvaHeatProperties(cache_file=cache_file)
+    elif cache_file is not None and cache_file != aqvaheat_properties.cache_file:
+        aqvaheat_properties.cache_file = cache_file
+        if os.path.exists(cache_file):
+            aqvaheat_properties.load(cache_file)
+    return aqvaheat_properties
@@ -6,16 +6,21 @@ Description: Contains the heat generator classes as well as the calculation and
 
 """
 
+import copy
+import time
 import numpy as np
 from math import pi, sqrt
+from concurrent.futures import ProcessPoolExecutor
 
-from scipy.optimize import minimize
-from scipy.interpolate import RegularGridInterpolator
-
-import CoolProp.CoolProp as CP
+from scipy.optimize import minimize, differential_evolution
+from scipy.stats import qmc
 
+from utilities.cop_service import get_COP_service
+from heat_generators.storage_dispatch import storage_dispatch
 from heat_generators.solar_thermal import Berechnung_STA
 from heat_generators.photovoltaics import Calculate_PV
+from heat_generators.nsga2 import nsga2, non_dominated_sort
+from heat_generators.aqvaheat_properties import get_aqvaheat_properties
 
 # Wirtschaftlichkeitsberechnung für technische Anlagen nach VDI 2067
 def annuität(A0, TN, f_Inst, f_W_Insp, Bedienaufwand=0, q=1.05, r=1.03, T=20, Energiebedarf=0, Energiekosten=0, E1=0, stundensatz=45):
@@ -77,7 +82,7 @@ def annuität(A0, TN, f_Inst, f_W_Insp, Bedienaufwand=0, q=1.05, r=1.03, T=20, E
     # Erlöse
     A_NE = E1*a*b_E
 
-    A_N += A_NE
+    A_N = A_N + A_NE
 
     return -A_N
 
@@ -114,7 +119,7 @@ class HeatPump:
 
     def COP_WP(self, VLT_L, QT, COP_data):
         """
-        Calculates the Coefficient of Performance (COP) of the heat pump using interpolation.
+        Calculates the Coefficient of Performance (COP) of the heat pump using the shared, cached COP interpolation.
 
         Args:
             VLT_L (array-like): Flow temperatures.
@@ -125,28 +130,12 @@ class HeatPump:
             tuple: Interpolated COP values and adjusted flow temperatures.
         """
 
-        # Interpolationsformel für den COP
-        values = COP_data  # np.genfromtxt('Kennlinien WP.csv', delimiter=';')
-        row_header = values[0, 1:]  # Vorlauftemperaturen
-        col_header = values[1:, 0]  # Quelltemperaturen
-        values = values[1:, 1:]
-        f = RegularGridInterpolator((col_header, row_header), values, method='linear')
-
-        # technische Grenze der Wärmepumpe ist Temperaturhub von 75 °C
-        VLT_L = np.minimum(VLT_L, 75 + QT)
-
-        # Überprüfen, ob QT eine Zahl oder ein Array ist
-        if np.isscalar(QT):
-            # Wenn QT eine Zahl ist, erstellen wir ein Array mit dieser Zahl
-            QT_array = np.full_like(VLT_L, QT)
-        else:
-            # Wenn QT bereits ein Array ist, prüfen wir, ob es die gleiche Länge wie VLT_L hat
-            if len(QT) != len(VLT_L):
-                raise ValueError("QT muss entweder eine einzelne Zahl oder ein Array mit der gleichen Länge wie VLT_L sein.")
-            QT_array = QT
+        # Überprüfen, ob QT eine Zahl oder ein Array mit der gleichen Länge wie VLT_L ist
+        if not np.isscalar(QT) and len(QT) != len(VLT_L):
+            raise ValueError("QT muss entweder eine einzelne Zahl oder ein Array mit der gleichen Länge wie VLT_L sein.")
 
-        # Berechnung von COP_L
-        COP_L = f(np.column_stack((QT_array, VLT_L)))
+        # Interpolator und Ergebnisse werden je Kennlinienfeld zwischengespeichert, die technische Grenze der Wärmepumpe ist ein Temperaturhub von 75 °C
+        COP_L, VLT_L = get_COP_service(COP_data).evaluate(VLT_L, QT)
 
         return COP_L, VLT_L
     
@@ -368,6 +357,8 @@ class AqvaHeat(HeatPump):
         Wärmeleistung_FW_WP (float): Heat output of the river water heat pump.
         Temperatur_FW_WP (float): Temperature of the river water.
         dT (float): Temperature difference. Default is 0.
+        intermediate_temperature (float or array-like): Temperature between the vacuum ice generator and the heat pump in °C. Default is 12.
+        properties_file (str): NumPy file (.npz) the property table of the vacuum ice process is loaded from and saved to. Default is None.
         spez_Investitionskosten_Flusswasser (float): Specific investment costs for river water heat pump per kW. Default is 1000.
         spezifische_Investitionskosten_WP (float): Specific investment costs of the heat pump per kW. Default is 1000.
         min_Teillast (float): Minimum partial load. Default is 0.2.
@@ -381,7 +372,7 @@ class AqvaHeat(HeatPump):
         to_dict(): Converts the object attributes to a dictionary.
         from_dict(data): Creates an object from a dictionary of attributes.
     """
-    def __init__(self, name, nominal_power=100, temperature_difference=0):
+    def __init__(self, name, nominal_power=100, temperature_difference=0, intermediate_temperature=12, properties_file=None):
 
         self.name = name
         self.nominal_power = nominal_power
@@ -389,6 +380,8 @@ class AqvaHeat(HeatPump):
         self.temperature_difference = 2.5  # difference over heat exchanger
         self.primärenergiefaktor = 2.4
         self.Wärmeleistung_FW_WP = nominal_power
+        self.intermediate_temperature = intermediate_temperature  # °C, constant or time series
+        self.properties_file = properties_file
 
 
     def calculate(self, output_temperatures, COP_data, duration, general_results):
@@ -396,7 +389,7 @@ class AqvaHeat(HeatPump):
         residual_powers = general_results["Restlast_L"]
         effective_powers = np.zeros_like(residual_powers)
 
-        intermediate_temperature = 12  # °C
+        intermediate_temperature = self.intermediate_temperature  # °C
 
         # calculate power in time steps where operation of aggregate is possible due to minimal partial load
         operation_mask = residual_powers >= self.nominal_power * self.min_partial_load
@@ -424,30 +417,17 @@ class AqvaHeat(HeatPump):
         # cooling supplied by heat pump is heat supplied by vacuum ice process 
 
         isentropic_efficiency = 0.7  # Adjust this value based on the actual compressor efficiency
-        fluid = 'Water'
-        molar_mass_water = 18.01528  # in g/mol
-
-        # Triple point conditions for water
-        # temperature_triple_point = 273.16  # Temperature in Kelvin
-        # pressure_triple_point = 611.657  # Pressure in Pascal
-
-        # Define initial conditions
-        triple_point_pressure =  CP.PropsSI('ptriple', 'T', 0, 'P', 0, fluid) + 0.01 # in Pascal, delta because of validity range
-        triple_point_temperature = CP.PropsSI('T', 'Q', 0, 'P', triple_point_pressure + 1, fluid)  # Triple point temperature
 
-        initial_pressure = triple_point_pressure
-        initial_temperature = triple_point_temperature
+        # Stoffwerte werden je Prozess einmal mit CoolProp berechnet und tabelliert
+        properties = get_aqvaheat_properties(self.properties_file)
 
-        # Define final conditions after first compression
-        final_temperature = 12 + 273.15  # Convert to Kelvin
-        final_pressure = CP.PropsSI('P', 'T', final_temperature, 'Q', 0, fluid)
+        # mass flow from condensing vapor at the condensing pressure of 14hPa
+        mass_flows = effective_powers / properties.get_latent_heat()
+        # electrical power needed compressing vapor from triple point to the intermediate temperature
+        energy_compression = properties.get_compression_enthalpy(intermediate_temperature) / isentropic_efficiency
 
-        # mass flow from condensing vapor at 12°C, 14hPa
-        mass_flows = effective_powers / (CP.PropsSI('H','P',14000,'Q',1,'Water') - 
-                                        CP.PropsSI('H','P',14000,'Q',0,'Water'))
-        # electrical power needed compressing vapor from triple point 
-        energy_compression = (CP.PropsSI('H', 'T', final_temperature, 'P', final_pressure, fluid) -
-                                      CP.PropsSI('H', 'T', initial_temperature, 'P', initial_pressure, fluid)) / isentropic_efficiency
+        if properties.modified and self.properties_file is not None:
+            properties.save(self.properties_file)
 
         electrical_powers += mass_flows * energy_compression / 1000  # W -> kW
 
@@ -690,7 +670,7 @@ class Geothermal(HeatPump):
         self.co2_factor_electricity = 0.4 # tCO2/MWh electricity
         self.primärenergiefaktor = 2.4
 
-    def Geothermie(self, Last_L, VLT_L, COP_data, duration):
+    def Geothermie(self, Last_L, VLT_L, COP_data, duration, solver="fast"):
         """
         Calculates the geothermal heat extraction and other performance metrics.
 
@@ -699,6 +679,7 @@ class Geothermal(HeatPump):
             VLT_L (array-like): Flow temperatures.
             COP_data (array-like): COP data for interpolation.
             duration (float): Time duration.
+            solver (str, optional): Solver for the operating hours, "fast" or "bisection" for validation. Both give the same result. Defaults to "fast".
 
         Returns:
             tuple: Heat energy, electricity demand, heat output, electric power.
@@ -717,48 +698,132 @@ class Geothermal(HeatPump):
 
         # tatsächliche Anzahl der Betriebsstunden der Wärmepumpe hängt von der Wärmeleistung ab,
         # diese hängt über Entzugsleistung von der angenommenen Betriebsstundenzahl ab
+        if solver == "fast" and np.asarray(Last_L).dtype == np.float64:
+            B = self.Betriebsstunden_schnell(Last_L, COP_L, Entzugswärmemenge)
+        elif solver in ("fast", "bisection"):
+            B = self.Betriebsstunden_Bisektion(Last_L, COP_L, Entzugswärmemenge)
+        else:
+            raise ValueError(f"Unbekanntes Lösungsverfahren für die Betriebsstunden: {solver}")
+
+        Wärmeleistung_tat_L, el_Leistung_tat_L, Entzugswärme, Wärmemenge, Strombedarf = self.Betrieb(B, Last_L, COP_L, Entzugswärmemenge)
+
+        self.max_Wärmeleistung = max(Wärmeleistung_tat_L)
+        JAZ = Wärmemenge / Strombedarf
+        Wärmemenge, Strombedarf = Wärmemenge * duration, Strombedarf * duration
+        
+        return Wärmemenge, Strombedarf, Wärmeleistung_tat_L, el_Leistung_tat_L
+
+    def Betrieb(self, B, Last_L, COP_L, Entzugswärmemenge):
+        """
+        Calculates the operation of the heat pump for an assumed number of operating hours.
+
+        Args:
+            B (float): Assumed number of operating hours.
+            Last_L (array-like): Load demand.
+            COP_L (array-like): COP values.
+            Entzugswärmemenge (float): Heat extraction of the probes per year in MWh.
+
+        Returns:
+            tuple: Heat output, electric power, extracted heat, heat energy and electricity demand.
+        """
+        # Berechnen der Entzugsleistung
+        Entzugsleistung = Entzugswärmemenge * 1000 / B  # kW
+        # Berechnen der Wärmeleistung und elektrischen Leistung
+        Wärmeleistung_L = Entzugsleistung / (1 - (1 / COP_L))
+
+        # Berechnen der tatsächlichen Werte
+        Wärmeleistung_tat_L = np.zeros_like(Last_L)
+        el_Leistung_tat_L = np.zeros_like(Last_L)
+        Entzugsleistung_tat_L = np.zeros_like(Last_L)
+
+        # Fälle, in denen die Wärmepumpe betrieben werden kann
+        betrieb_mask = Last_L >= Wärmeleistung_L * self.min_Teillast
+        Wärmeleistung_tat_L[betrieb_mask] = np.minimum(Last_L[betrieb_mask], Wärmeleistung_L[betrieb_mask])
+        el_Leistung_tat_L[betrieb_mask] = Wärmeleistung_tat_L[betrieb_mask] - (Entzugsleistung * np.ones_like(Last_L))[betrieb_mask]
+        Entzugsleistung_tat_L[betrieb_mask] = Wärmeleistung_tat_L[betrieb_mask] - el_Leistung_tat_L[betrieb_mask]
+
+        Entzugswärme = np.sum(Entzugsleistung_tat_L) / 1000
+        Wärmemenge = np.sum(Wärmeleistung_tat_L) / 1000
+        Strombedarf = np.sum(el_Leistung_tat_L) / 1000
+        Betriebsstunden = np.count_nonzero(Wärmeleistung_tat_L)
+
+        # Falls es keine Nutzung gibt, wird das Ergebnis 0
+        if Betriebsstunden == 0:
+            Wärmeleistung_tat_L = np.array([0])
+            el_Leistung_tat_L = np.array([0])
+
+        return Wärmeleistung_tat_L, el_Leistung_tat_L, Entzugswärme, Wärmemenge, Strombedarf
+
+    def Betriebsstunden_Bisektion(self, Last_L, COP_L, Entzugswärmemenge):
+        """
+        Determines the operating hours by bisection with the complete calculation of the operation in every step.
+
+        Args:
+            Last_L (array-like): Load demand.
+            COP_L (array-like): COP values.
+            Entzugswärmemenge (float): Heat extraction of the probes per year in MWh.
+
+        Returns:
+            float: Operating hours of the last bisection step.
+        """
         B_min = 1
         B_max = 8760
         tolerance = 0.5
         while B_max - B_min > tolerance:
             B = (B_min + B_max) / 2
-            # Berechnen der Entzugsleistung
-            Entzugsleistung = Entzugswärmemenge * 1000 / B  # kW
-            # Berechnen der Wärmeleistung und elektrischen Leistung
-            Wärmeleistung_L = Entzugsleistung / (1 - (1 / COP_L))
-            el_Leistung_L = Wärmeleistung_L - Entzugsleistung
+            Entzugswärme = self.Betrieb(B, Last_L, COP_L, Entzugswärmemenge)[2]
+
+            if Entzugswärme > Entzugswärmemenge:
+                B_min = B
+            else:
+                B_max = B
 
-            # Berechnen der tatsächlichen Werte
-            Wärmeleistung_tat_L = np.zeros_like(Last_L)
-            el_Leistung_tat_L = np.zeros_like(Last_L)
-            Entzugsleistung_tat_L = np.zeros_like(Last_L)
+        return B
 
-            # Fälle, in denen die Wärmepumpe betrieben werden kann
-            betrieb_mask = Last_L >= Wärmeleistung_L * self.min_Teillast
-            Wärmeleistung_tat_L[betrieb_mask] = np.minimum(Last_L[betrieb_mask], Wärmeleistung_L[betrieb_mask])
-            el_Leistung_tat_L[betrieb_mask] = Wärmeleistung_tat_L[betrieb_mask] - (Entzugsleistung * np.ones_like(Last_L))[betrieb_mask]
-            Entzugsleistung_tat_L[betrieb_mask] = Wärmeleistung_tat_L[betrieb_mask] - el_Leistung_tat_L[betrieb_mask]
+    def Betriebsstunden_schnell(self, Last_L, COP_L, Entzugswärmemenge):
+        """
+        Determines the operating hours with the same bisection steps as Betriebsstunden_Bisektion, but only the extracted heat is
+        calculated in every step, in preallocated arrays and with the same floating point operations.
 
-            Entzugswärme = np.sum(Entzugsleistung_tat_L) / 1000
-            Wärmemenge = np.sum(Wärmeleistung_tat_L) / 1000
-            Strombedarf = np.sum(el_Leistung_tat_L) / 1000
-            Betriebsstunden = np.count_nonzero(Wärmeleistung_tat_L)
+        Args:
+            Last_L (np.ndarray): Load demand as float64 array.
+            COP_L (array-like): COP values.
+            Entzugswärmemenge (float): Heat extraction of the probes per year in MWh.
 
-            # Falls es keine Nutzung gibt, wird das Ergebnis 0
-            if Betriebsstunden == 0:
-                Wärmeleistung_tat_L = np.array([0])
-                el_Leistung_tat_L = np.array([0])
+        Returns:
+            float: Operating hours of the last bisection step.
+        """
+        Last_L = np.asarray(Last_L)
+        Wärmeleistung_Faktor_L = np.broadcast_to(1 - (1 / COP_L), Last_L.shape)
+        Wärmeleistung_L = np.empty_like(Last_L)
+        Schwelle_L = np.empty_like(Last_L)
+        Wärmeleistung_tat_L = np.empty_like(Last_L)
+        el_Leistung_tat_L = np.empty_like(Last_L)
+        Entzugsleistung_tat_L = np.empty_like(Last_L)
+        betrieb_mask = np.empty(Last_L.shape, dtype=bool)
+
+        B_min = 1
+        B_max = 8760
+        tolerance = 0.5
+        while B_max - B_min > tolerance:
+            B = (B_min + B_max) / 2
+            Entzugsleistung = Entzugswärmemenge * 1000 / B  # kW
+            np.divide(Entzugsleistung, Wärmeleistung_Faktor_L, out=Wärmeleistung_L)
+            np.multiply(Wärmeleistung_L, self.min_Teillast, out=Schwelle_L)
+            np.greater_equal(Last_L, Schwelle_L, out=betrieb_mask)
+            np.minimum(Last_L, Wärmeleistung_L, out=Wärmeleistung_tat_L)
+            np.subtract(Wärmeleistung_tat_L, Entzugsleistung, out=el_Leistung_tat_L)
+            np.subtract(Wärmeleistung_tat_L, el_Leistung_tat_L, out=Entzugsleistung_tat_L)
+            Entzugsleistung_tat_L[~betrieb_mask] = 0
+
+            Entzugswärme = np.sum(Entzugsleistung_tat_L) / 1000
 
             if Entzugswärme > Entzugswärmemenge:
                 B_min = B
             else:
                 B_max = B
 
-        self.max_Wärmeleistung = max(Wärmeleistung_tat_L)
-        JAZ = Wärmemenge / Strombedarf
-        Wärmemenge, Strombedarf = Wärmemenge * duration, Strombedarf * duration
-        
-        return Wärmemenge, Strombedarf, Wärmeleistung_tat_L, el_Leistung_tat_L
+        return B
     
     def calculate(self, VLT_L, COP_data, Strompreis, q, r, T, BEW, stundensatz, duration, general_results):
         """
@@ -952,39 +1017,11 @@ class CHP:
         """
         # Speicherparameter
         speicher_kapazitaet = self.Speicher_Volumen_BHKW * 4186 * (self.T_vorlauf - self.T_ruecklauf) / 3600  # kWh
-        speicher_fill = self.initial_fill * speicher_kapazitaet
-        min_speicher_fill = self.min_fill * speicher_kapazitaet
-        max_speicher_fill = self.max_fill * speicher_kapazitaet
 
-        self.Wärmeleistung_kW = np.zeros_like(Last_L)
-        self.Wärmeleistung_Speicher_kW = np.zeros_like(Last_L)
-        self.el_Leistung_BHKW_kW = np.zeros_like(Last_L)
-        self.speicher_fuellstand_BHKW = np.zeros_like(Last_L)
-
-        for i in range(len(Last_L)):
-            if self.BHKW_an:
-                if speicher_fill >= max_speicher_fill:
-                    self.BHKW_an = False
-                else:
-                    self.Wärmeleistung_kW[i] = self.th_Leistung_BHKW
-                    if Last_L[i] < self.th_Leistung_BHKW:
-                        self.Wärmeleistung_Speicher_kW[i] = Last_L[i] - self.th_Leistung_BHKW
-                        speicher_fill += (self.th_Leistung_BHKW - Last_L[i]) * duration
-                        speicher_fill = float(min(speicher_fill, speicher_kapazitaet))
-                    else:
-                        self.Wärmeleistung_Speicher_kW[i] = 0
-            else:
-                if speicher_fill <= min_speicher_fill:
-                    self.BHKW_an = True
-            
-            if not self.BHKW_an:
-                self.Wärmeleistung_kW[i] = 0
-                self.Wärmeleistung_Speicher_kW[i] = Last_L[i]
-                speicher_fill -= Last_L[i] * duration
-                speicher_fill = float(max(speicher_fill, 0))
-
-            self.el_Leistung_BHKW_kW[i] = self.Wärmeleistung_kW[i] / self.thermischer_Wirkungsgrad * self.el_Wirkungsgrad
-            self.speicher_fuellstand_BHKW[i] = speicher_fill / speicher_kapazitaet * 100  # %
+        self.Wärmeleistung_kW, self.Wärmeleistung_Speicher_kW, speicher_fill_L, self.BHKW_an = storage_dispatch(Last_L, self.th_Leistung_BHKW, duration, speicher_kapazitaet,
+                                                                                                           self.initial_fill, self.min_fill, self.max_fill, self.BHKW_an)
+        self.el_Leistung_BHKW_kW = self.Wärmeleistung_kW / self.thermischer_Wirkungsgrad * self.el_Wirkungsgrad
+        self.speicher_fuellstand_BHKW = speicher_fill_L / speicher_kapazitaet * 100  # %
 
         self.Wärmemenge_BHKW_Speicher = np.sum(self.Wärmeleistung_kW / 1000) * duration
         self.Strommenge_BHKW_Speicher = np.sum(self.el_Leistung_BHKW_kW / 1000) * duration
@@ -1019,6 +1056,7 @@ class CHP:
             float: Weighted average cost of energy for the CHP system.
         """
         if Wärmemenge == 0:
+            self.WGK_BHKW = 0
             return 0
         # Holzvergaser-BHKW: 130 kW: 240.000 -> 1850 €/kW
         # (Erd-)Gas-BHKW: 100 kW: 150.000 € -> 1500 €/kW
@@ -1238,37 +1276,10 @@ class BiomassBoiler:
         """
         # Storage parameters
         speicher_kapazitaet = self.Speicher_Volumen * 4186 * (self.T_vorlauf - self.T_ruecklauf) / 3600  # kWh
-        speicher_fill = self.initial_fill * speicher_kapazitaet
-        min_speicher_fill = self.min_fill * speicher_kapazitaet
-        max_speicher_fill = self.max_fill * speicher_kapazitaet
 
-        self.Wärmeleistung_kW = np.zeros_like(Last_L)
-        self.Wärmeleistung_Speicher_kW = np.zeros_like(Last_L)
-        self.speicher_fuellstand = np.zeros_like(Last_L)
-
-        for i in range(len(Last_L)):
-            if self.BMK_an:
-                if speicher_fill >= max_speicher_fill:
-                    self.BMK_an = False
-                else:
-                    self.Wärmeleistung_kW[i] = self.P_BMK
-                    if Last_L[i] < self.P_BMK:
-                        self.Wärmeleistung_Speicher_kW[i] = Last_L[i] - self.P_BMK
-                        speicher_fill += (self.P_BMK - Last_L[i]) * duration
-                        speicher_fill = float(min(speicher_fill, speicher_kapazitaet))
-                    else:
-                        self.Wärmeleistung_Speicher_kW[i] = 0
-            else:
-                if speicher_fill <= min_speicher_fill:
-                    self.BMK_an = True
-            
-            if not self.BMK_an:
-                self.Wärmeleistung_kW[i] = 0
-                self.Wärmeleistung_Speicher_kW[i] = Last_L[i]
-                speicher_fill -= Last_L[i] * duration
-                speicher_fill = float(max(speicher_fill, 0))
-
-            self.speicher_fuellstand[i] = speicher_fill / speicher_kapazitaet * 100  # %
+        self.Wärmeleistung_kW, self.Wärmeleistung_Speicher_kW, speicher_fill_L, self.BMK_an = storage_dispatch(Last_L, self.P_BMK, duration, speicher_kapazitaet,
+                                                                                                         self.initial_fill, self.min_fill, self.max_fill, self.BMK_an)
+        self.speicher_fuellstand = speicher_fill_L / speicher_kapazitaet * 100  # %
 
         self.Wärmemenge_Biomassekessel_Speicher = np.sum(self.Wärmeleistung_kW / 1000) * duration
 
@@ -1300,6 +1311,7 @@ class BiomassBoiler:
             float: Weighted average cost of heat generation.
         """
         if Wärmemenge == 0:
+            self.WGK_BMK = 0
             return 0
         
         self.Investitionskosten_Kessel = self.spez_Investitionskosten * self.P_BMK
@@ -1465,6 +1477,7 @@ class GasBoiler:
             float: Weighted average cost of heat generation.
         """
         if self.Wärmemenge_Gaskessel == 0:
+            self.WGK_GK = 0
             return 0
         
         self.Investitionskosten = self.spez_Investitionskosten * self.P_max
@@ -1778,6 +1791,9 @@ def Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data,
     """
     Calculate the optimal energy generation mix for a given set of technologies and parameters.
 
+    The prices only enter the economic evaluation. If they are passed as broadcastable arrays, the dispatch is calculated once and
+    the heat generation costs are calculated for all price combinations.
+
     Args:
         tech_order (list): List of technology objects to be considered.
         initial_data (tuple): Initial data including time steps, load profile, flow temperature, and return temperature.
@@ -1785,9 +1801,9 @@ def Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data,
         end (int): End time step for the calculation.
         TRY (object): Test Reference Year data for temperature and solar radiation.
         COP_data (object): Coefficient of Performance data for heat pumps.
-        Gaspreis (float): Gas price in €/kWh.
-        Strompreis (float): Electricity price in €/kWh.
-        Holzpreis (float): Biomass price in €/kWh.
+        Gaspreis (float or np.ndarray): Gas price in €/kWh.
+        Strompreis (float or np.ndarray): Electricity price in €/kWh.
+        Holzpreis (float or np.ndarray): Biomass price in €/kWh.
         BEW (float): Specific CO2 emissions for electricity in kg CO2/kWh.
         variables (list, optional): List of variable values for optimization. Defaults to [].
         variables_order (list, optional): List of variable names for optimization. Defaults to [].
@@ -1832,25 +1848,10 @@ def Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data,
         'tech_classes': []
     }
 
-    for idx, tech in enumerate(tech_order.copy()):
-        if len(variables) > 0:
-            if tech.name.startswith("Solarthermie"):
-                tech.bruttofläche_STA = variables[variables_order.index(f"bruttofläche_STA_{idx}")]
-                tech.vs = variables[variables_order.index(f"vs_{idx}")]
-            elif tech.name.startswith("Abwärme") or tech.name.startswith("Abwasserwärme"):
-                tech.Kühlleistung_Abwärme = variables[variables_order.index(f"Kühlleistung_Abwärme_{idx}")]
-            elif tech.name.startswith("Flusswasser"):
-                tech.Wärmeleistung_FW_WP = variables[variables_order.index(f"Wärmeleistung_FW_WP_{idx}")]
-            elif tech.name.startswith("Geothermie"):
-                tech.Fläche = variables[variables_order.index(f"Fläche_{idx}")]
-                tech.Bohrtiefe = variables[variables_order.index(f"Bohrtiefe_{idx}")]
-            elif tech.name.startswith("BHKW") or tech.name.startswith("Holzgas-BHKW"):
-                tech.th_Leistung_BHKW = variables[variables_order.index(f"th_Leistung_BHKW_{idx}")]
-                if tech.speicher_aktiv:
-                    tech.Speicher_Volumen_BHKW = variables[variables_order.index(f"Speicher_Volumen_BHKW_{idx}")]
-            elif tech.name.startswith("Biomassekessel"):
-                tech.P_BMK = variables[variables_order.index(f"P_BMK_{idx}")]
+    if len(variables) > 0:
+        set_optimized_values(tech_order, variables_order, variables)
 
+    for tech in tech_order.copy():
         if tech.name.startswith("Solarthermie"):
             tech_results = tech.calculate(VLT_L, RLT_L, TRY, time_steps, start, end, q, r, T, BEW, stundensatz, duration, general_results)
         elif tech.name.startswith("Abwärme") or tech.name.startswith("Abwasserwärme"):
@@ -1881,7 +1882,7 @@ def Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data,
             general_results['colors'].append(tech_results['color'])
             general_results['Restlast_L'] -= tech_results['Wärmeleistung_L']
             general_results['Restwärmebedarf'] -= tech_results['Wärmemenge']
-            general_results['WGK_Gesamt'] += (tech_results['Wärmemenge']*tech_results['WGK'])/general_results['Jahreswärmebedarf']
+            general_results['WGK_Gesamt'] = general_results['WGK_Gesamt'] + (tech_results['Wärmemenge']*tech_results['WGK'])/general_results['Jahreswärmebedarf']
             general_results['specific_emissions_Gesamt'] += (tech_results['Wärmemenge']*tech_results['spec_co2_total'])/general_results['Jahreswärmebedarf']
             general_results['primärenergiefaktor_Gesamt'] += tech_results['primärenergie']/general_results['Jahreswärmebedarf']
 
@@ -1908,29 +1909,343 @@ def Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data,
 
     return general_results
 
-def optimize_mix(tech_order, initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW, kapitalzins, preissteigerungsrate, betrachtungszeitraum, stundensatz, weights):
+def price_grid(Gaspreise, Strompreise, Holzpreise):
     """
-    Optimize the energy generation mix for minimal cost, emissions, and primary energy use.
+    Create broadcastable price arrays for the calculation of all combinations of gas, electricity and biomass prices.
+
+    Args:
+        Gaspreise (array-like): Gas prices in €/MWh.
+        Strompreise (array-like): Electricity prices in €/MWh.
+        Holzpreise (array-like): Biomass prices in €/MWh.
+
+    Returns:
+        tuple: Gas, electricity and biomass prices with the shapes (n_gas, 1, 1), (1, n_electricity, 1) and (1, 1, n_wood).
+    """
+    return (np.asarray(Gaspreise, dtype=float)[:, None, None], np.asarray(Strompreise, dtype=float)[None, :, None],
+            np.asarray(Holzpreise, dtype=float)[None, None, :])
+
+def Berechnung_Erzeugermix_Preisvariation(tech_order, initial_data, start, end, TRY, COP_data, Gaspreise, Strompreise, Holzpreise, BEW, kapitalzins=5, preissteigerungsrate=3, 
+                                          betrachtungszeitraum=20, stundensatz=45):
+    """
+    Calculate the energy generation mix for all combinations of gas, electricity and biomass prices.
+
+    The dispatch does not depend on the prices, so it is calculated once and only the economic evaluation is carried out for the
+    whole price grid.
 
     Args:
         tech_order (list): List of technology objects to be considered.
         initial_data (tuple): Initial data including time steps, load profile, flow temperature, and return temperature.
-        start (int): Start time step for the optimization.
-        end (int): End time step for the optimization.
+        start (int): Start time step for the calculation.
+        end (int): End time step for the calculation.
         TRY (object): Test Reference Year data for temperature and solar radiation.
         COP_data (object): Coefficient of Performance data for heat pumps.
-        Gaspreis (float): Gas price in €/kWh.
-        Strompreis (float): Electricity price in €/kWh.
-        Holzpreis (float): Biomass price in €/kWh.
-        BEW (float): Specific CO2 emissions for electricity in kg CO2/kWh.
-        kapitalzins (float): Capital interest rate in percentage.
-        preissteigerungsrate (float): Inflation rate in percentage.
-        betrachtungszeitraum (int): Consideration period in years.
-        stundensatz (float): Hourly rate for labor in €/h.
+        Gaspreise (array-like): Gas prices in €/MWh.
+        Strompreise (array-like): Electricity prices in €/MWh.
+        Holzpreise (array-like): Biomass prices in €/MWh.
+        BEW (str): Consideration of the BEW funding.
+        kapitalzins (int, optional): Capital interest rate in percentage. Defaults to 5.
+        preissteigerungsrate (int, optional): Inflation rate in percentage. Defaults to 3.
+        betrachtungszeitraum (int, optional): Consideration period in years. Defaults to 20.
+        stundensatz (int, optional): Hourly rate for labor in €/h. Defaults to 45.
+
+    Returns:
+        dict: Results of Berechnung_Erzeugermix, 'WGK_Gesamt' and the entries of 'WGK' have the shape (n_gas, n_electricity, n_wood).
+    """
+    Gaspreis, Strompreis, Holzpreis = price_grid(Gaspreise, Strompreise, Holzpreise)
+    general_results = Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW, kapitalzins=kapitalzins, 
+                                             preissteigerungsrate=preissteigerungsrate, betrachtungszeitraum=betrachtungszeitraum, stundensatz=stundensatz)
+
+    shape = np.broadcast_shapes(Gaspreis.shape, Strompreis.shape, Holzpreis.shape)
+    general_results['WGK_Gesamt'] = np.broadcast_to(general_results['WGK_Gesamt'], shape)
+    general_results['WGK'] = [np.broadcast_to(WGK, shape) for WGK in general_results['WGK']]
+    return general_results
+
+# Zielgrößen der Optimierung, werden minimiert
+optimization_criteria = ['WGK_Gesamt', 'specific_emissions_Gesamt', 'primärenergiefaktor_Gesamt']
+
+def weighted_objective(general_results, weights):
+    """
+    Calculate the weighted sum of the optimization criteria of a calculated mix.
+
+    Args:
+        general_results (dict): Results of Berechnung_Erzeugermix.
         weights (dict): Weights for different optimization criteria.
 
     Returns:
-        list: Optimized list of technology objects with updated parameters.
+        float: Weighted sum of the heat generation costs, the specific emissions and the primary energy factor.
+    """
+    # Skalierung der Zielgrößen basierend auf ihren erwarteten Bereichen
+    wgk_scale = 1.0  # Annahme: Wärmegestehungskosten liegen im Bereich von 0 bis 300 €/MWh
+    co2_scale = 1000  # Annahme: Spezifische Emissionen liegen im Bereich von 0 bis 1 tCO2/MWh
+    primary_energy_scale = 100.0  # Annahme: Primärenergiefaktor liegt im Bereich von 0 bis 3
+
+    weighted_sum = (weights['WGK_Gesamt'] * general_results['WGK_Gesamt'] * wgk_scale +
+                    weights['specific_emissions_Gesamt'] * general_results['specific_emissions_Gesamt'] * co2_scale +
+                    weights['primärenergiefaktor_Gesamt'] * general_results['primärenergiefaktor_Gesamt'] * primary_energy_scale)
+
+    return weighted_sum
+
+class MixObjective:
+    """
+    Objective function of the mix optimization with memoized evaluations and a parallel finite-difference gradient.
+
+    Every evaluation calculates the mix with a deep copy of the technology list, so the operating states of the generators and
+    technologies removed by Berechnung_Erzeugermix do not carry over from one evaluation to the next and the evaluations can be
+    carried out in any order or in parallel. The optimization criteria of every evaluation are memoized by the rounded variable vector,
+    so the same evaluations serve the weighted objective and the Pareto optimization. The evaluated variable vectors are kept by the
+    same keys.
+
+    Args:
+        tech_order (list): List of technology objects to be considered.
+        mix_args (tuple): Arguments of Berechnung_Erzeugermix following the technology list (initial_data, start, end, TRY, COP_data,
+            Gaspreis, Strompreis, Holzpreis, BEW).
+        variables_order (list): List of variable names for optimization.
+        bounds (list): Bounds of the variables.
+        weights (dict): Weights for different optimization criteria, None if only the criteria are evaluated.
+        mix_kwargs (dict): Keyword arguments of Berechnung_Erzeugermix.
+        executor (ProcessPoolExecutor, optional): Pool for the evaluation of the finite-difference stencil. If None, the stencil is
+            evaluated sequentially. Defaults to None.
+        decimals (int, optional): Number of decimals of the variables in the memo keys. Defaults to 10.
+        step (float, optional): Absolute step size of the finite differences. Defaults to the step size SLSQP uses.
+        time_limit (float, optional): Time budget in seconds, OptimizationTimeout is raised for evaluations after the budget is
+            exhausted. Defaults to None.
+        log_callback (callable, optional): Called with every new entry of the convergence log. Defaults to None.
+    """
+    def __init__(self, tech_order, mix_args, variables_order, bounds, weights, mix_kwargs, executor=None, decimals=10, step=1.4901161193847656e-08,
+                 time_limit=None, log_callback=None):
+        self.tech_order = copy.deepcopy(tech_order)
+        self.mix_args = mix_args
+        self.variables_order = variables_order
+        self.lower_bounds = np.array([-np.inf if lower is None else lower for lower, _ in bounds], dtype=float)
+        self.upper_bounds = np.array([np.inf if upper is None else upper for _, upper in bounds], dtype=float)
+        self.weights = weights
+        self.mix_kwargs = mix_kwargs
+        self.executor = executor
+        self.decimals = decimals
+        self.step = step
+        self.memo = {}
+        self.points = {}
+        self.evaluations = 0
+        self.start_time = time.perf_counter()
+        self.time_limit = time_limit
+        self.log_callback = log_callback
+        self.log = []
+        self.best_value = np.inf
+        self.best_variables = None
+
+    def __getstate__(self):
+        # The pool, the memo and the log callback are not sent to the worker processes
+        state = self.__dict__.copy()
+        state['executor'] = None
+        state['memo'] = {}
+        state['points'] = {}
+        state['log_callback'] = None
+        return state
+
+    def elapsed_time(self):
+        """
+        Get the time since the start of the optimization.
+
+        Returns:
+            float: Elapsed time in seconds.
+        """
+        return time.perf_counter() - self.start_time
+
+    def time_exceeded(self):
+        """
+        Check whether the time budget is exhausted.
+
+        Returns:
+            bool: True if a time budget is set and exhausted.
+        """
+        return self.time_limit is not None and self.elapsed_time() >= self.time_limit
+
+    def log_progress(self, message):
+        """
+        Add an entry with the current state of the optimization to the convergence log.
+
+        Args:
+            message (str): Description of the optimization step.
+
+        Returns:
+            dict: Log entry with the elapsed time, the number of evaluations, the best objective value (None without weights) and the message.
+        """
+        entry = {'time': self.elapsed_time(), 'evaluations': self.evaluations, 'best_value': self.best_value if self.weights is not None else None, 'message': message}
+        self.log.append(entry)
+        print(format_log_entry(entry))
+        if self.log_callback is not None:
+            self.log_callback(entry)
+        return entry
+
+    def get_key(self, variables):
+        """
+        Get the memo key of a variable vector.
+
+        Args:
+            variables (array): Values of the variables.
+
+        Returns:
+            tuple: Rounded values of the variables.
+        """
+        return tuple(np.round(np.asarray(variables, dtype=float), self.decimals).tolist())
+
+    def calculate(self, variables):
+        """
+        Calculate the mix for a variable vector without using the memo.
+
+        Args:
+            variables (array): Values of the variables.
+
+        Returns:
+            dict: Values of the optimization criteria.
+        """
+        general_results = Berechnung_Erzeugermix(copy.deepcopy(self.tech_order), *self.mix_args, list(variables), self.variables_order, **self.mix_kwargs)
+        return {criterion: general_results[criterion] for criterion in optimization_criteria}
+
+    def evaluate_criteria(self, points):
+        """
+        Evaluate the optimization criteria for several variable vectors, the vectors which are not memoized yet are calculated in the pool.
+
+        Args:
+            points (list): Variable vectors.
+
+        Returns:
+            list: Values of the optimization criteria in the order of the variable vectors.
+        """
+        keys = [self.get_key(point) for point in points]
+        missing = {}
+        for key, point in zip(keys, points):
+            if key not in self.memo and key not in missing:
+                missing[key] = np.asarray(point, dtype=float)
+
+        if missing:
+            if self.time_exceeded():
+                raise OptimizationTimeout(f"Zeitbudget von {self.time_limit} s erschöpft")
+            if self.executor is not None and len(missing) > 1:
+                values = list(self.executor.map(evaluate_mix_objective, missing.values()))
+            else:
+                values = [self.calculate(point) for point in missing.values()]
+            self.memo.update(zip(missing.keys(), values))
+            self.points.update(missing)
+            self.evaluations += len(missing)
+
+            if self.weights is not None:
+                for point, criteria in zip(missing.values(), values):
+                    value = weighted_objective(criteria, self.weights)
+                    if value < self.best_value:
+                        self.best_value = value
+                        self.best_variables = point
+
+        return [self.memo[key] for key in keys]
+
+    def evaluate(self, points):
+        """
+        Evaluate the weighted objective for several variable vectors.
+
+        Args:
+            points (list): Variable vectors.
+
+        Returns:
+            list: Objective values in the order of the variable vectors.
+        """
+        return [weighted_objective(criteria, self.weights) for criteria in self.evaluate_criteria(points)]
+
+    def __call__(self, variables):
+        return self.evaluate([variables])[0]
+
+    def map(self, func, points):
+        """
+        Map-like callable for the workers argument of differential_evolution, the whole population is evaluated with evaluate.
+
+        Args:
+            func (callable): Objective wrapped by differential_evolution, the points are evaluated with this objective instead.
+            points (iterable): Variable vectors of the population.
+
+        Returns:
+            list: Objective values of the population.
+        """
+        return self.evaluate(list(points))
+
+    def gradient(self, variables):
+        """
+        Calculate the gradient with forward differences.
+
+        The steps follow the two-point scheme SLSQP uses without a given gradient: the step is reversed for variables at which the
+        forward step would leave the upper bound. All points of the stencil are evaluated at once.
+
+        Args:
+            variables (array): Values of the variables.
+
+        Returns:
+            np.ndarray: Gradient of the objective.
+        """
+        x0 = np.asarray(variables, dtype=float)
+        h = np.full(len(x0), self.step)
+        violated = (x0 + h > self.upper_bounds) & (x0 - h >= self.lower_bounds)
+        h[violated] = -h[violated]
+        dx = (x0 + h) - x0
+
+        points = [x0]
+        for i in range(len(x0)):
+            point = x0.copy()
+            point[i] = x0[i] + h[i]
+            points.append(point)
+
+        values = self.evaluate(points)
+        return (np.array(values[1:]) - values[0]) / dx
+
+def format_log_entry(entry):
+    """
+    Format an entry of the convergence log of the mix optimization.
+
+    Args:
+        entry (dict): Log entry of MixObjective.log_progress.
+
+    Returns:
+        str: Formatted log entry.
+    """
+    best_value = f" | Zielwert {entry['best_value']:.4f}" if entry['best_value'] is not None else ""
+    return f"{entry['time']:.1f} s | {entry['evaluations']} Auswertungen{best_value} | {entry['message']}"
+
+class OptimizationTimeout(Exception):
+    """
+    Raised by MixObjective when an evaluation is requested after the time budget of the optimization is exhausted.
+    """
+
+# Zielfunktion der Worker-Prozesse der Mix-Optimierung
+mix_objective_worker = None
+
+def init_mix_objective_worker(objective):
+    """
+    Initialize a worker process of the mix optimization.
+
+    Args:
+        objective (MixObjective): Objective function which is evaluated in the worker process.
+    """
+    global mix_objective_worker
+    mix_objective_worker = objective
+
+def evaluate_mix_objective(variables):
+    """
+    Evaluate the objective function of the mix optimization in a worker process.
+
+    Args:
+        variables (array): Values of the variables.
+
+    Returns:
+        dict: Values of the optimization criteria.
+    """
+    return mix_objective_worker.calculate(variables)
+
+def get_optimization_variables(tech_order):
+    """
+    Get the optimization variables of the technologies with their initial values and bounds.
+
+    Args:
+        tech_order (list): List of technology objects to be considered.
+
+    Returns:
+        tuple: Initial values, names and bounds of the variables.
     """
     initial_values = []
     variables_order = []
@@ -1992,57 +2307,374 @@ def optimize_mix(tech_order, initial_data, start, end, TRY, COP_data, Gaspreis,
             max_power_river = 1000
             bounds.append((min_power_river, max_power_river))
 
+    return initial_values, variables_order, bounds
 
-    def objective(variables):
-        general_results = Berechnung_Erzeugermix(tech_order, initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW, variables, variables_order, \
-                                            kapitalzins=kapitalzins, preissteigerungsrate=preissteigerungsrate, betrachtungszeitraum=betrachtungszeitraum, stundensatz=stundensatz)
-        
-        # Skalierung der Zielgrößen basierend auf ihren erwarteten Bereichen
-        wgk_scale = 1.0  # Annahme: Wärmegestehungskosten liegen im Bereich von 0 bis 300 €/MWh
-        co2_scale = 1000  # Annahme: Spezifische Emissionen liegen im Bereich von 0 bis 1 tCO2/MWh
-        primary_energy_scale = 100.0  # Annahme: Primärenergiefaktor liegt im Bereich von 0 bis 3
-
-        weighted_sum = (weights['WGK_Gesamt'] * general_results['WGK_Gesamt'] * wgk_scale +
-                        weights['specific_emissions_Gesamt'] * general_results['specific_emissions_Gesamt'] * co2_scale +
-                        weights['primärenergiefaktor_Gesamt'] * general_results['primärenergiefaktor_Gesamt'] * primary_energy_scale)
-        
-        return weighted_sum
-    
-    # optimization
-    result = minimize(objective, initial_values, method='SLSQP', bounds=bounds, options={'maxiter': 100})
-
-    if result.success:
-        optimized_values = result.x
-        optimized_objective = objective(optimized_values)
-        print(f"Optimierte Werte: {optimized_values}")
-        print(f"Minimierte gewichtete Summe: {optimized_objective:.2f}")
-
-        for idx, tech in enumerate(tech_order):
-            if isinstance(tech, SolarThermal):
-                tech.bruttofläche_STA = optimized_values[variables_order.index(f"bruttofläche_STA_{idx}")]
-                tech.vs = optimized_values[variables_order.index(f"vs_{idx}")]
-            elif isinstance(tech, BiomassBoiler):
-                tech.P_BMK = optimized_values[variables_order.index(f"P_BMK_{idx}")]
-                if tech.speicher_aktiv:
-                    tech.Speicher_Volumen = optimized_values[variables_order.index(f"Speicher_Volumen_{idx}")]
-            elif isinstance(tech, CHP):
-                tech.th_Leistung_BHKW = optimized_values[variables_order.index(f"th_Leistung_BHKW_{idx}")]
-                if tech.speicher_aktiv:
-                    tech.Speicher_Volumen_BHKW = optimized_values[variables_order.index(f"Speicher_Volumen_BHKW_{idx}")]
-            elif isinstance(tech, Geothermal):
-                tech.Fläche = optimized_values[variables_order.index(f"Fläche_{idx}")]
-                tech.Bohrtiefe = optimized_values[variables_order.index(f"Bohrtiefe_{idx}")]
-            elif isinstance(tech, WasteHeatPump):
-                tech.Kühlleistung_Abwärme = optimized_values[variables_order.index(f"Kühlleistung_Abwärme_{idx}")]
-            elif isinstance(tech, RiverHeatPump):
-                tech.Wärmeleistung_FW_WP = optimized_values[variables_order.index(f"Wärmeleistung_FW_WP_{idx}")]
+def set_optimized_values(tech_order, variables_order, optimized_values):
+    """
+    Set the optimized values of the variables on the technologies.
 
-        return tech_order
-    else:
+    Args:
+        tech_order (list): List of technology objects to be considered.
+        variables_order (list): List of variable names for optimization.
+        optimized_values (array): Optimized values of the variables.
+    """
+    for idx, tech in enumerate(tech_order):
+        if isinstance(tech, SolarThermal):
+            tech.bruttofläche_STA = optimized_values[variables_order.index(f"bruttofläche_STA_{idx}")]
+            tech.vs = optimized_values[variables_order.index(f"vs_{idx}")]
+        elif isinstance(tech, BiomassBoiler):
+            tech.P_BMK = optimized_values[variables_order.index(f"P_BMK_{idx}")]
+            if tech.speicher_aktiv:
+                tech.Speicher_Volumen = optimized_values[variables_order.index(f"Speicher_Volumen_{idx}")]
+        elif isinstance(tech, CHP):
+            tech.th_Leistung_BHKW = optimized_values[variables_order.index(f"th_Leistung_BHKW_{idx}")]
+            if tech.speicher_aktiv:
+                tech.Speicher_Volumen_BHKW = optimized_values[variables_order.index(f"Speicher_Volumen_BHKW_{idx}")]
+        elif isinstance(tech, Geothermal):
+            tech.Fläche = optimized_values[variables_order.index(f"Fläche_{idx}")]
+            tech.Bohrtiefe = optimized_values[variables_order.index(f"Bohrtiefe_{idx}")]
+        elif isinstance(tech, WasteHeatPump):
+            tech.Kühlleistung_Abwärme = optimized_values[variables_order.index(f"Kühlleistung_Abwärme_{idx}")]
+        elif isinstance(tech, RiverHeatPump):
+            tech.Wärmeleistung_FW_WP = optimized_values[variables_order.index(f"Wärmeleistung_FW_WP_{idx}")]
+
+def local_optimization(objective, initial_values, bounds, maxiter=100):
+    """
+    Local optimization with SLSQP from a single starting point.
+
+    Args:
+        objective (MixObjective): Objective function of the mix optimization.
+        initial_values (array): Starting point.
+        bounds (list): Bounds of the variables.
+        maxiter (int, optional): Maximum number of iterations. Defaults to 100.
+
+    Returns:
+        OptimizeResult: Result of the optimization.
+    """
+    return minimize(objective, initial_values, jac=objective.gradient, method='SLSQP', bounds=bounds, options={'maxiter': maxiter})
+
+def multistart_optimization(objective, initial_values, bounds, n_starts=8, patience=3, tol=1e-4, seed=None):
+    """
+    Local optimizations with SLSQP from several starting points.
+
+    The first start is the current design, the other starting points are a Latin hypercube sample of the bounds. The optimization
+    stops early if the best objective value has not improved by more than the relative tolerance for a number of starts.
+
+    Args:
+        objective (MixObjective): Objective function of the mix optimization.
+        initial_values (array): Current values of the variables.
+        bounds (list): Bounds of the variables.
+        n_starts (int, optional): Maximum number of starts. Defaults to 8.
+        patience (int, optional): Number of starts without improvement after which the optimization stops. Defaults to 3.
+        tol (float, optional): Relative improvement which resets the patience. Defaults to 1e-4.
+        seed (int, optional): Seed of the Latin hypercube sample. Defaults to None.
+    """
+    lower_bounds, upper_bounds = np.array(bounds, dtype=float).T
+    starting_points = [np.asarray(initial_values, dtype=float)]
+    if n_starts > 1:
+        sample = qmc.LatinHypercube(d=len(bounds), seed=seed).random(n_starts - 1)
+        starting_points += list(qmc.scale(sample, lower_bounds, upper_bounds))
+
+    best_value = np.inf
+    starts_without_improvement = 0
+    for i, starting_point in enumerate(starting_points):
+        result = local_optimization(objective, starting_point, bounds)
+        objective.log_progress(f"Start {i + 1} von {len(starting_points)}: {result.fun:.4f} ({result.message})")
+
+        if objective.best_value < best_value - tol * abs(best_value):
+            best_value = objective.best_value
+            starts_without_improvement = 0
+        else:
+            starts_without_improvement += 1
+            if starts_without_improvement >= patience:
+                objective.log_progress(f"Keine Verbesserung in {patience} Starts, Optimierung beendet")
+                break
+
+def differential_evolution_optimization(objective, initial_values, bounds, popsize=15, maxiter=100, patience=10, tol=1e-4, seed=None):
+    """
+    Global optimization with differential evolution followed by a local optimization of the best design with SLSQP.
+
+    The population of every generation is evaluated at once, so it is calculated in parallel if the objective has a pool. The
+    evolution stops early if the best objective value has not improved by more than the relative tolerance for a number of
+    generations.
+
+    Args:
+        objective (MixObjective): Objective function of the mix optimization.
+        initial_values (array): Current values of the variables, used as member of the initial population.
+        bounds (list): Bounds of the variables.
+        popsize (int, optional): Multiplier for the population size. Defaults to 15.
+        maxiter (int, optional): Maximum number of generations. Defaults to 100.
+        patience (int, optional): Number of generations without improvement after which the evolution stops. Defaults to 10.
+        tol (float, optional): Relative improvement which resets the patience. Defaults to 1e-4.
+        seed (int, optional): Seed of the evolution. Defaults to None.
+    """
+    lower_bounds, upper_bounds = np.array(bounds, dtype=float).T
+    population = qmc.scale(qmc.LatinHypercube(d=len(bounds), seed=seed).random(max(5, popsize * len(bounds))), lower_bounds, upper_bounds)
+    population[0] = np.clip(initial_values, lower_bounds, upper_bounds)
+
+    progress = {'generation': 0, 'best_value': np.inf, 'generations_without_improvement': 0}
+    def callback(xk, convergence):
+        progress['generation'] += 1
+        objective.log_progress(f"Generation {progress['generation']}")
+        if objective.best_value < progress['best_value'] - tol * abs(progress['best_value']):
+            progress['best_value'] = objective.best_value
+            progress['generations_without_improvement'] = 0
+        else:
+            progress['generations_without_improvement'] += 1
+        if progress['generations_without_improvement'] >= patience:
+            objective.log_progress(f"Keine Verbesserung in {patience} Generationen, Evolution beendet")
+            return True
+        return objective.time_exceeded()
+
+    differential_evolution(objective, bounds, maxiter=maxiter, init=population, seed=seed, callback=callback, polish=False,
+                           updating='deferred', workers=objective.map)
+
+    result = local_optimization(objective, objective.best_variables, bounds)
+    objective.log_progress(f"Lokale Optimierung des besten Designs: {result.fun:.4f} ({result.message})")
+
+def run_optimization(objective, optimization, num_workers=1):
+    """
+    Run an optimization, with a pool of worker processes for the objective if more than one worker is requested.
+
+    Args:
+        objective (MixObjective): Objective function of the mix optimization.
+        optimization (callable): Runs the optimization with the objective.
+        num_workers (int, optional): Number of worker processes. Defaults to 1.
+
+    Returns:
+        object: Return value of the optimization, None if the time budget was exhausted.
+    """
+    try:
+        if num_workers > 1:
+            with ProcessPoolExecutor(max_workers=num_workers, initializer=init_mix_objective_worker, initargs=(objective,)) as executor:
+                objective.executor = executor
+                return optimization()
+        return optimization()
+    except OptimizationTimeout as e:
+        objective.log_progress(f"{e}, die besten bisher gefundenen Designs werden verwendet")
+        return None
+    finally:
+        objective.executor = None
+
+def optimize_mix(tech_order, initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW, kapitalzins, preissteigerungsrate, betrachtungszeitraum, stundensatz, weights,
+                 num_workers=1, method="SLSQP", time_limit=None, log_callback=None, seed=None):
+    """
+    Optimize the energy generation mix for minimal cost, emissions, and primary energy use.
+
+    Args:
+        tech_order (list): List of technology objects to be considered.
+        initial_data (tuple): Initial data including time steps, load profile, flow temperature, and return temperature.
+        start (int): Start time step for the optimization.
+        end (int): End time step for the optimization.
+        TRY (object): Test Reference Year data for temperature and solar radiation.
+        COP_data (object): Coefficient of Performance data for heat pumps.
+        Gaspreis (float): Gas price in €/kWh.
+        Strompreis (float): Electricity price in €/kWh.
+        Holzpreis (float): Biomass price in €/kWh.
+        BEW (float): Specific CO2 emissions for electricity in kg CO2/kWh.
+        kapitalzins (float): Capital interest rate in percentage.
+        preissteigerungsrate (float): Inflation rate in percentage.
+        betrachtungszeitraum (int): Consideration period in years.
+        stundensatz (float): Hourly rate for labor in €/h.
+        weights (dict): Weights for different optimization criteria.
+        num_workers (int, optional): Number of worker processes for the evaluation of the finite-difference gradient and the population. Defaults to 1.
+        method (str, optional): Optimization method, "SLSQP" for a local optimization of the current design, "multistart" for local
+            optimizations from several starting points or "differential_evolution". Defaults to "SLSQP".
+        time_limit (float, optional): Time budget in seconds, after which the best design found so far is used. Defaults to None.
+        log_callback (callable, optional): Called with every entry of the convergence log. Defaults to None.
+        seed (int, optional): Seed of the global optimization methods. Defaults to None.
+
+    Returns:
+        list: Optimized list of technology objects with updated parameters.
+    """
+    initial_values, variables_order, bounds = get_optimization_variables(tech_order)
+
+    mix_args = (initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW)
+    mix_kwargs = dict(kapitalzins=kapitalzins, preissteigerungsrate=preissteigerungsrate, betrachtungszeitraum=betrachtungszeitraum, stundensatz=stundensatz)
+    objective = MixObjective(tech_order, mix_args, variables_order, bounds, weights, mix_kwargs, time_limit=time_limit, log_callback=log_callback)
+
+    if method not in ("SLSQP", "multistart", "differential_evolution"):
+        raise ValueError(f"Unbekanntes Optimierungsverfahren: {method}")
+    if method != "differential_evolution":
+        # the finite-difference stencil has one point per variable plus the current point
+        num_workers = min(num_workers, len(initial_values) + 1)
+
+    def optimization():
+        if method == "SLSQP":
+            return local_optimization(objective, initial_values, bounds)
+        elif method == "multistart":
+            multistart_optimization(objective, initial_values, bounds, seed=seed)
+        else:
+            differential_evolution_optimization(objective, initial_values, bounds, seed=seed)
+
+    result = run_optimization(objective, optimization, num_workers)
+
+    if (method == "SLSQP" and result is not None and not result.success) or objective.best_variables is None:
         print("Optimierung nicht erfolgreich")
-        print(result.message)
+        if result is not None:
+            print(result.message)
+        return tech_order
+
+    optimized_values = objective.best_variables if result is None or method != "SLSQP" else result.x
+    objective.time_limit = None
+    optimized_objective = objective(optimized_values)
+    objective.log_progress("Optimierung abgeschlossen")
+    print(f"Optimierte Werte: {optimized_values}")
+    print(f"Minimierte gewichtete Summe: {optimized_objective:.2f}")
+
+    set_optimized_values(tech_order, variables_order, optimized_values)
+    return tech_order
+
+class ParetoFront:
+    """
+    Pareto front of the heat generation mix with the non-dominated designs of all evaluations of a Pareto optimization.
+
+    The values of the optimization criteria of the designs are stored with the front, so a design can be compared and selected
+    without calculating the mix again.
+
+    Args:
+        variables (np.ndarray): Values of the variables with one row per design.
+        criteria (np.ndarray): Values of the optimization criteria with one row per design, in the order of optimization_criteria.
+        variables_order (list): List of variable names for optimization.
+        tech_names (list, optional): Names of the technologies the front was calculated for. Defaults to None.
+    """
+    def __init__(self, variables, criteria, variables_order, tech_names=None):
+        order = np.argsort(criteria[:, 0], kind="stable")
+        self.variables = np.asarray(variables, dtype=float)[order]
+        self.criteria = np.asarray(criteria, dtype=float)[order]
+        self.variables_order = variables_order
+        self.tech_names = tech_names
+
+    @classmethod
+    def from_evaluations(cls, evaluations, variables_order, tech_names=None, points=None):
+        """
+        Build the Pareto front from memoized evaluations.
+
+        Args:
+            evaluations (dict): Values of the optimization criteria by variable vector, e.g. the memo of a MixObjective.
+            variables_order (list): List of variable names for optimization.
+            tech_names (list, optional): Names of the technologies the front was calculated for. Defaults to None.
+            points (dict, optional): Evaluated variable vectors by the keys of the evaluations, e.g. the points of a MixObjective.
+                Defaults to the keys of the evaluations.
+
+        Returns:
+            ParetoFront: Non-dominated designs of the evaluations.
+        """
+        variables = np.array([key if points is None else points[key] for key in evaluations], dtype=float).reshape(len(evaluations), len(variables_order))
+        criteria = np.array([[values[criterion] for criterion in optimization_criteria] for values in evaluations.values()], dtype=float).reshape(len(evaluations), len(optimization_criteria))
+        front = non_dominated_sort(criteria)[0] if len(criteria) else np.zeros(0, dtype=int)
+        # designs with the same criteria, e.g. differing only in the variables of a removed technology, are shown once
+        front = front[np.sort(np.unique(criteria[front], axis=0, return_index=True)[1])]
+        return cls(variables[front], criteria[front], variables_order, tech_names)
+
+    def __len__(self):
+        return len(self.variables)
+
+    def get_criteria(self, index):
+        """
+        Get the values of the optimization criteria of a design.
+
+        Args:
+            index (int): Index of the design.
+
+        Returns:
+            dict: Values of the optimization criteria.
+        """
+        return dict(zip(optimization_criteria, self.criteria[index]))
+
+    def get_variables(self, index):
+        """
+        Get the values of the variables of a design.
+
+        Args:
+            index (int): Index of the design.
+
+        Returns:
+            dict: Values of the variables by variable name.
+        """
+        return dict(zip(self.variables_order, self.variables[index]))
+
+    def select_weighted(self, weights):
+        """
+        Select the design with the lowest weighted sum of the optimization criteria.
+
+        Args:
+            weights (dict): Weights for different optimization criteria.
+
+        Returns:
+            int: Index of the design.
+        """
+        return int(np.argmin([weighted_objective(self.get_criteria(i), weights) for i in range(len(self))]))
+
+    def apply(self, index, tech_order):
+        """
+        Set the values of the variables of a design on the technologies.
+
+        Args:
+            index (int): Index of the design.
+            tech_order (list): List of technology objects the front was calculated for.
+
+        Returns:
+            list: Technology objects with the values of the design.
+        """
+        if self.tech_names is not None and [tech.name for tech in tech_order] != self.tech_names:
+            raise ValueError("Die Erzeugeranlagen wurden seit der Berechnung der Pareto-Front verändert.")
+        set_optimized_values(tech_order, self.variables_order, self.variables[index])
+        return tech_order
+
+def optimize_mix_pareto(tech_order, initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW, kapitalzins, preissteigerungsrate, betrachtungszeitraum, stundensatz,
+                        num_workers=1, population_size=40, generations=50, time_limit=None, log_callback=None, seed=None):
+    """
+    Calculate the Pareto front of the heat generation costs, the specific emissions and the primary energy factor with NSGA-II.
+
+    The offspring of every generation is evaluated in parallel if more than one worker is requested. The front is built from all
+    evaluations of the optimization, so it also contains good designs which dropped out of the population.
+
+    Args:
+        tech_order (list): List of technology objects to be considered.
+        initial_data (tuple): Initial data including time steps, load profile, flow temperature, and return temperature.
+        start (int): Start time step for the optimization.
+        end (int): End time step for the optimization.
+        TRY (object): Test Reference Year data for temperature and solar radiation.
+        COP_data (object): Coefficient of Performance data for heat pumps.
+        Gaspreis (float): Gas price in €/kWh.
+        Strompreis (float): Electricity price in €/kWh.
+        Holzpreis (float): Biomass price in €/kWh.
+        BEW (float): Specific CO2 emissions for electricity in kg CO2/kWh.
+        kapitalzins (float): Capital interest rate in percentage.
+        preissteigerungsrate (float): Inflation rate in percentage.
+        betrachtungszeitraum (int): Consideration period in years.
+        stundensatz (float): Hourly rate for labor in €/h.
+        num_workers (int, optional): Number of worker processes for the evaluation of the population. Defaults to 1.
+        population_size (int, optional): Size of the population. Defaults to 40.
+        generations (int, optional): Maximum number of generations. Defaults to 50.
+        time_limit (float, optional): Time budget in seconds. Defaults to None.
+        log_callback (callable, optional): Called with every entry of the convergence log. Defaults to None.
+        seed (int, optional): Seed of the optimization. Defaults to None.
+
+    Returns:
+        ParetoFront: Pareto front of the designs, the technology objects are not changed.
+    """
+    initial_values, variables_order, bounds = get_optimization_variables(tech_order)
+
+    mix_args = (initial_data, start, end, TRY, COP_data, Gaspreis, Strompreis, Holzpreis, BEW)
+    mix_kwargs = dict(kapitalzins=kapitalzins, preissteigerungsrate=preissteigerungsrate, betrachtungszeitraum=betrachtungszeitraum, stundensatz=stundensatz)
+    objective = MixObjective(tech_order, mix_args, variables_order, bounds, None, mix_kwargs, time_limit=time_limit, log_callback=log_callback)
+
+    def evaluate(population):
+        return [[criteria[criterion] for criterion in optimization_criteria] for criteria in objective.evaluate_criteria(list(population))]
+
+    def callback(generation, population, criteria):
+        objective.log_progress(f"Generation {generation}: {len(non_dominated_sort(criteria)[0])} Designs auf der Pareto-Front der Population")
+        return objective.time_exceeded()
+
+    run_optimization(objective, lambda: nsga2(evaluate, bounds, population_size=population_size, generations=generations, initial_population=[initial_values],
+                                              seed=seed, callback=callback), num_workers)
+
+    pareto_front = ParetoFront.from_evaluations(objective.memo, variables_order, [tech.name for tech in tech_order], objective.points)
+    objective.log_progress(f"Pareto-Front mit {len(pareto_front)} Designs aus {objective.evaluations} Auswertungen berechnet")
+    return pareto_front
 
-# Diese Klasse ist noch nicht fertig implementiert und die Nutzung auch noch nicht durchdacht, Wie muss dass ganze bilanziert werden?
 class Photovoltaics:
     def __init__(self, name, TRY_data, Gross_area, Longitude, STD_Longitude, Latitude, East_West_collector_azimuth_angle=0, Collector_tilt_angle=36, Albedo=0.2, Kosten_STA_spez=300):
         self.name = name
@@ -0,0 +1,208 @@
+"""
+Filename: nsga2.py
+Author: Dipl.-Ing. (FH) Jonas Pfeiffer
+Date: 2024-08-05
+Description: Contains a NumPy implementation of the multi-objective genetic algorithm NSGA-II, used for the Pareto optimization of the heat generation mix.
+
+"""
+
+import numpy as np
+
+def non_dominated_sort(objectives):
+    """
+    Sort the points into fronts of non-dominated points, all objectives are minimized.
+
+    Args:
+        objectives (np.ndarray): Objective values with one row per point.
+
+    Returns:
+        list: Indices of the points of each front, starting with the Pareto front.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    # dominates[i, j] is True if point i dominates point j
+    dominates = np.all(objectives[:, None, :] <= objectives[None, :, :], axis=2) & np.any(objectives[:, None, :] < objectives[None, :, :], axis=2)
+    domination_count = dominates.sum(axis=0)
+
+    fronts = []
+    remaining = np.ones(len(objectives), dtype=bool)
+    while remaining.any():
+        front = np.flatnonzero(remaining & (domination_count == 0))
+        fronts.append(front)
+        remaining[front] = False
+        domination_count = domination_count - dominates[front].sum(axis=0)
+    return fronts
+
+def crowding_distance(objectives):
+    """
+    Calculate the crowding distance of the points of a front.
+
+    Args:
+        objectives (np.ndarray): Objective values of the points of the front with one row per point.
+
+    Returns:
+        np.ndarray: Crowding distance of every point, the boundary points have an infinite distance.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    distance = np.zeros(len(objectives))
+    if len(objectives) <= 2:
+        return np.full(len(objectives), np.inf)
+
+    for values in objectives.T:
+        order = np.argsort(values, kind="stable")
+        value_range = values[order[-1]] - values[order[0]]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if value_range > 0:
+            distance[order[1:-1]] += (values[order[2:]] - values[order[:-2]]) / value_range
+    return distance
+
+def rank_population(objectives):
+    """
+    Rank the points by their front and their crowding distance.
+
+    Args:
+        objectives (np.ndarray): Objective values with one row per point.
+
+    Returns:
+        tuple: Front index and crowding distance of every point.
+    """
+    rank = np.zeros(len(objectives), dtype=int)
+    distance = np.zeros(len(objectives))
+    for i, front in enumerate(non_dominated_sort(objectives)):
+        rank[front] = i
+        distance[front] = crowding_distance(objectives[front])
+    return rank, distance
+
+def select_survivors(objectives, size):
+    """
+    Select the best points by their front and their crowding distance.
+
+    Args:
+        objectives (np.ndarray): Objective values with one row per point.
+        size (int): Number of points to select.
+
+    Returns:
+        np.ndarray: Indices of the selected points.
+    """
+    rank, distance = rank_population(objectives)
+    return np.lexsort((-distance, rank))[:size]
+
+def tournament_selection(rank, distance, size, rng):
+    """
+    Select parents with binary tournaments by front and crowding distance.
+
+    Args:
+        rank (np.ndarray): Front index of every point.
+        distance (np.ndarray): Crowding distance of every point.
+        size (int): Number of parents.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Indices of the parents.
+    """
+    a, b = rng.integers(0, len(rank), size), rng.integers(0, len(rank), size)
+    a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (distance[a] >= distance[b]))
+    return np.where(a_wins, a, b)
+
+def sbx_crossover(parents_a, parents_b, lower_bounds, upper_bounds, eta, probability, rng):
+    """
+    Simulated binary crossover of two sets of parents.
+
+    Args:
+        parents_a (np.ndarray): First parents with one row per pair.
+        parents_b (np.ndarray): Second parents with one row per pair.
+        lower_bounds (np.ndarray): Lower bounds of the variables.
+        upper_bounds (np.ndarray): Upper bounds of the variables.
+        eta (float): Distribution index, larger values create children closer to the parents.
+        probability (float): Probability of the crossover of a pair.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        tuple: Two sets of children.
+    """
+    u = rng.random(parents_a.shape)
+    beta = np.where(u <= 0.5, (2 * u)**(1 / (eta + 1)), (1 / (2 * (1 - u)))**(1 / (eta + 1)))
+    # Every variable is exchanged with a probability of 0.5, whole pairs are only crossed with the crossover probability
+    crossed = (rng.random(parents_a.shape) < 0.5) & (rng.random((len(parents_a), 1)) < probability)
+    beta = np.where(crossed, beta, 1.0)
+
+    children_a = 0.5 * ((1 + beta) * parents_a + (1 - beta) * parents_b)
+    children_b = 0.5 * ((1 - beta) * parents_a + (1 + beta) * parents_b)
+    return np.clip(children_a, lower_bounds, upper_bounds), np.clip(children_b, lower_bounds, upper_bounds)
+
+def polynomial_mutation(population, lower_bounds, upper_bounds, eta, probability, rng):
+    """
+    Polynomial mutation of a population.
+
+    Args:
+        population (np.ndarray): Variables with one row per point.
+        lower_bounds (np.ndarray): Lower bounds of the variables.
+        upper_bounds (np.ndarray): Upper bounds of the variables.
+        eta (float): Distribution index, larger values create smaller mutations.
+        probability (float): Probability of the mutation of a variable.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Mutated population.
+    """
+    u = rng.random(population.shape)
+    delta = np.where(u < 0.5, (2 * u)**(1 / (eta + 1)) - 1, 1 - (2 * (1 - u))**(1 / (eta + 1)))
+    mutated = rng.random(population.shape) < probability
+    population = population + np.where(mutated, delta * (upper_bounds - lower_bounds), 0.0)
+    return np.clip(population, lower_bounds, upper_bounds)
+
+def nsga2(evaluate, bounds, population_size=40, generations=50, initial_population=None, crossover_eta=15, crossover_probability=0.9,
+          mutation_eta=20, mutation_probability=None, seed=None, callback=None):
+    """
+    Minimize several objectives with NSGA-II.
+
+    The offspring of every generation is evaluated at once, so evaluate can calculate it in parallel.
+
+    Args:
+        evaluate (callable): Called with the variables of a population (one row per point), returns the objective values with one
+            row per point.
+        bounds (list): Bounds of the variables.
+        population_size (int, optional): Size of the population. Defaults to 40.
+        generations (int, optional): Maximum number of generations. Defaults to 50.
+        initial_population (np.ndarray, optional): Points of the initial population, the population is filled with random points.
+            Defaults to None.
+        crossover_eta (float, optional): Distribution index of the crossover. Defaults to 15.
+        crossover_probability (float, optional): Probability of the crossover of a pair of parents. Defaults to 0.9.
+        mutation_eta (float, optional): Distribution index of the mutation. Defaults to 20.
+        mutation_probability (float, optional): Probability of the mutation of a variable. Defaults to 1 / number of variables.
+        seed (int, optional): Seed of the random number generator. Defaults to None.
+        callback (callable, optional): Called after every generation with the generation, the population and its objective values.
+            The optimization stops if it returns True. Defaults to None.
+
+    Returns:
+        tuple: Variables and objective values of the final population.
+    """
+    rng = np.random.default_rng(seed)
+    lower_bounds, upper_bounds = np.array(bounds, dtype=float).T
+    n_variables = len(lower_bounds)
+    if mutation_probability is None:
+        mutation_probability = 1 / max(n_variables, 1)
+
+    population = lower_bounds + rng.random((population_size, n_variables)) * (upper_bounds - lower_bounds)
+    if initial_population is not None:
+        initial_population = np.atleast_2d(initial_population)[:population_size]
+        population[:len(initial_population)] = np.clip(initial_population, lower_bounds, upper_bounds)
+    objectives = np.asarray(evaluate(population), dtype=float)
+
+    for generation in range(1, generations + 1):
+        rank, distance = rank_population(objectives)
+        n_pairs = (population_size + 1) // 2
+        parents = tournament_selection(rank, distance, 2 * n_pairs, rng)
+        children_a, children_b = sbx_crossover(population[parents[:n_pairs]], population[parents[n_pairs:]], lower_bounds, upper_bounds,
+                                               crossover_eta, crossover_probability, rng)
+        offspring = polynomial_mutation(np.concatenate([children_a, children_b])[:population_size], lower_bounds, upper_bounds,
+                                        mutation_eta, mutation_probability, rng)
+
+        combined_population = np.concatenate([population, offspring])
+        combined_objectives = np.concatenate([objectives, np.asarray(evaluate(offspring), dtype=float)])
+        survivors = select_survivors(combined_objectives, population_size)
+        population, objectives = combined_population[survivors], combined_objectives[survivors]
+
+        if callback is not None and callback(generation, population, objectives):
+            break
+
+    return population, objectives
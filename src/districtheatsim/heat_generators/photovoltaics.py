@@ -6,9 +6,14 @@ Description: Calculation of solar irradiation according to Scenocalc District He
 
 """
 
+import os
+
 import numpy as np
 import pandas as pd
 
+from heat_generators.solar_radiation import irradiance_cache
+from utilities.test_reference_year import load_TRY
+
 def import_TRY(filename):
     """
     Imports Test Reference Year (TRY) data for temperature, windspeed, direct and global radiation.
@@ -19,21 +24,10 @@ def import_TRY(filename):
     Returns:
         tuple: Arrays containing temperature, windspeed, direct radiation, and global radiation.
     """
-    # Define column widths and names
-    col_widths = [8, 8, 3, 3, 3, 6, 5, 4, 5, 2, 5, 4, 5, 5, 4, 5, 3]
-    col_names = ["RW", "HW", "MM", "DD", "HH", "t", "p", "WR", "WG", "N", "x", "RF", "B", "D", "A", "E", "IL"]
-
-    # Read the file
-    data = pd.read_fwf(filename, widths=col_widths, names=col_names, skiprows=34)
+    # The TRY file is parsed only once per process
+    data = load_TRY(filename)
 
-    # Store the columns as numpy arrays
-    temperature = data['t'].values
-    windspeed = data['WG'].values
-    direct_radiation = data['B'].values
-    diffuse_radiation = data['D'].values
-    global_radiation = direct_radiation + diffuse_radiation
-
-    return temperature, windspeed, direct_radiation, global_radiation
+    return data.t, data.WG, data.B, data.G
 
 # Constant for degree-radian conversion
 DEG_TO_RAD = np.pi / 180
@@ -133,6 +127,32 @@ def Calculate_Solar_Radiation(Irradiance_hori_L, D_L, Day_of_Year_L, Longitude,
     # Returns the total radiation intensity on the collector
     return GT_H_Gk
 
+def Calculate_TRY_Solar_Radiation(TRY_data, Longitude, STD_Longitude, Latitude, Albedo, East_West_collector_azimuth_angle, Collector_tilt_angle):
+    """
+    Imports the TRY data and calculates the solar radiation on the tilted surface.
+
+    Args:
+        TRY_data (str): Path to the TRY data file.
+        Longitude (float): Longitude of the location.
+        STD_Longitude (float): Standard longitude for the time zone.
+        Latitude (float): Latitude of the location.
+        Albedo (float): Albedo value.
+        East_West_collector_azimuth_angle (float): East-West collector azimuth angle.
+        Collector_tilt_angle (float): Collector tilt angle.
+
+    Returns:
+        tuple: Ambient temperature, wind speed and total irradiance on the tilted surface.
+    """
+    # Import TRY
+    Ta_L, W_L, D_L, G_L = import_TRY(TRY_data)
+
+    Day_of_Year_L = np.repeat(np.arange(1, 366), 24)
+    # Calculate the solar irradiation for the given data.
+    GT_L = Calculate_Solar_Radiation(G_L, D_L, Longitude, Day_of_Year_L, STD_Longitude, Latitude, Albedo,
+                                     East_West_collector_azimuth_angle, Collector_tilt_angle)
+
+    return Ta_L, W_L, GT_L
+
 def Calculate_PV(TRY_data, Gross_area, Longitude, STD_Longitude, Latitude, Albedo,
                  East_West_collector_azimuth_angle, Collector_tilt_angle):
     """
@@ -151,8 +171,12 @@ def Calculate_PV(TRY_data, Gross_area, Longitude, STD_Longitude, Latitude, Albed
     Returns:
         tuple: Annual PV yield (kWh), maximum power (kW), and power output array (W).
     """
-    # Import TRY
-    Ta_L, W_L, D_L, G_L = import_TRY(TRY_data)
+    # Import TRY and calculate the solar irradiation, both are reused from the irradiance cache for the same TRY file, location and orientation
+    key = irradiance_cache.get_key("Calculate_PV", TRY_data=os.path.abspath(TRY_data), TRY_modified=os.path.getmtime(TRY_data), Longitude=Longitude,
+                                   STD_Longitude=STD_Longitude, Latitude=Latitude, Albedo=Albedo, East_West_collector_azimuth_angle=East_West_collector_azimuth_angle,
+                                   Collector_tilt_angle=Collector_tilt_angle)
+    Ta_L, W_L, GT_L = irradiance_cache.get(key, lambda: Calculate_TRY_Solar_Radiation(TRY_data, Longitude, STD_Longitude, Latitude, Albedo,
+                                                                                      East_West_collector_azimuth_angle, Collector_tilt_angle))
 
     # Define constants for the photovoltaic calculation.
     eff_nom = 0.199  # Nominal efficiency
@@ -163,11 +187,6 @@ def Calculate_PV(TRY_data, Gross_area, Longitude, STD_Longitude, Latitude, Albed
     # Constants for the efficiency calculation depending on temperature and irradiation.
     k1, k2, k3, k4, k5, k6 = -0.017237, -0.040465, -0.004702, 0.000149, 0.000170, 0.000005
 
-    Day_of_Year_L = np.repeat(np.arange(1, 366), 24)
-    # Calculate the solar irradiation for the given data.
-    GT_L = Calculate_Solar_Radiation(G_L, D_L, Longitude, Day_of_Year_L, STD_Longitude, Latitude, Albedo,
-                                     East_West_collector_azimuth_angle, Collector_tilt_angle)
-
     # Calculate the average solar irradiation value (in kW/m^2).
     G1 = GT_L / 1000
 
@@ -8,6 +8,9 @@ Additional Information: Yield calculation program for solar thermal energy in he
 """
 
 # Import Bibliotheken
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
 
 # Konstante für Grad-Radian-Konversion
@@ -25,6 +28,137 @@ def deg_to_rad(deg):
     """
     return deg * DEG_TO_RAD
 
+def IAM_table(iam_data):
+    """
+    Converts the Incidence Angle Modifiers into a table sorted by the incidence angle.
+
+    Args:
+        iam_data (dict or np.ndarray): Incidence Angle Modifiers as dict {angle: value} in steps of 10° or as table.
+
+    Returns:
+        np.ndarray: Table with the incidence angles in the first and the modifiers in the second row.
+    """
+    if isinstance(iam_data, dict):
+        return np.array(sorted(iam_data.items()), dtype=float).T
+    return np.asarray(iam_data, dtype=float)
+
+def IAM(Incidence_angle, iam_table):
+    """
+    Interpolates the Incidence Angle Modifier linearly between the tabulated angles in steps of 10°.
+
+    The tabulated values are found by an index lookup instead of a dict lookup per time step, the interpolation formula is unchanged.
+
+    Args:
+        Incidence_angle (np.ndarray): Incidence angle in degrees.
+        iam_table (np.ndarray): Table of the Incidence Angle Modifiers from IAM_table.
+
+    Returns:
+        np.ndarray: Incidence Angle Modifier.
+    """
+    angles, values = iam_table
+    sverweis_1 = np.abs(Incidence_angle) - np.abs(Incidence_angle) % 10
+    sverweis_2 = values[np.clip(np.searchsorted(angles, sverweis_1), 0, len(values) - 1)]
+    sverweis_3 = (np.abs(Incidence_angle) + 10) - (np.abs(Incidence_angle) + 10) % 10
+    sverweis_4 = values[np.clip(np.searchsorted(angles, sverweis_3), 0, len(values) - 1)]
+
+    ergebnis = sverweis_2 + (np.abs(Incidence_angle) - sverweis_1) / (sverweis_3 - sverweis_1) * (sverweis_4 - sverweis_2)
+    return ergebnis
+
+class IrradianceCache:
+    """
+    LRU cache of irradiance calculations shared by solar thermal and photovoltaics.
+
+    During the optimization of the generator mix only the collector area and the storage volume change, so the irradiance on the
+    collector is the same for all evaluations. The results are stored per weather data, location, orientation and time range and
+    returned as read-only arrays.
+
+    Args:
+        maxsize (int, optional): Maximum number of stored calculations. Defaults to 16.
+    """
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+
+    @staticmethod
+    def get_key(name, arrays=(), **parameters):
+        """
+        Builds the cache key of a calculation.
+
+        Args:
+            name (str): Name of the calculation.
+            arrays (iterable of np.ndarray, optional): Input arrays, e.g. weather data and time steps, included by their hash.
+            **parameters: Scalar parameters such as location and orientation.
+
+        Returns:
+            tuple: Cache key.
+        """
+        array_hash = hashlib.blake2b(digest_size=16)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            array_hash.update(str((array.dtype.str, array.shape)).encode())
+            array_hash.update(array.tobytes())
+        return name, array_hash.digest(), tuple(sorted((key, repr(value)) for key, value in parameters.items()))
+
+    def get(self, key, calculate):
+        """
+        Returns the cached results or calculates and stores them.
+
+        Args:
+            key (tuple): Cache key from get_key.
+            calculate (callable): Function without arguments returning a tuple of arrays.
+
+        Returns:
+            tuple: Read-only result arrays.
+        """
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        results = tuple(np.asarray(result) for result in calculate())
+        for result in results:
+            result.flags.writeable = False
+
+        self.results[key] = results
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+        return results
+
+    def clear(self):
+        """
+        Removes all stored calculations.
+        """
+        self.results.clear()
+
+irradiance_cache = IrradianceCache()
+
+def Berechnung_Solarstrahlung_cached(Globalstrahlung_L, D_L, Tag_des_Jahres_L, time_steps, Longitude, STD_Longitude, Latitude, Albedo, IAM_W, IAM_N,
+                                     EWCaa, CTA):
+    """
+    Calculates solar radiation with Berechnung_Solarstrahlung, results are reused from the irradiance cache for identical weather data,
+    time range, location, orientation and incidence angle modifiers.
+
+    Args:
+        Globalstrahlung_L (np.ndarray): Global radiation data.
+        D_L (np.ndarray): Direct radiation data.
+        Tag_des_Jahres_L (np.ndarray): Day of the year data.
+        time_steps (np.ndarray): Array of time steps.
+        Longitude (float): Longitude of the location.
+        STD_Longitude (float): Standard longitude for the time zone.
+        Latitude (float): Latitude of the location.
+        Albedo (float): Albedo value.
+        IAM_W (dict or np.ndarray): Incidence Angle Modifier for EW orientation.
+        IAM_N (dict or np.ndarray): Incidence Angle Modifier for NS orientation.
+        EWCaa (float): East-West collector azimuth angle.
+        CTA (float): Collector tilt angle.
+
+    Returns:
+        tuple: Contains read-only arrays for total radiation on the inclined surface, beam radiation, diffuse radiation, and modified beam radiation.
+    """
+    key = irradiance_cache.get_key("Berechnung_Solarstrahlung", (Globalstrahlung_L, D_L, Tag_des_Jahres_L, time_steps), Longitude=Longitude,
+                                   STD_Longitude=STD_Longitude, Latitude=Latitude, Albedo=Albedo, IAM_W=IAM_table(IAM_W).tolist(), IAM_N=IAM_table(IAM_N).tolist(), EWCaa=EWCaa, CTA=CTA)
+    return irradiance_cache.get(key, lambda: Berechnung_Solarstrahlung(Globalstrahlung_L, D_L, Tag_des_Jahres_L, time_steps, Longitude, STD_Longitude,
+                                                                       Latitude, Albedo, IAM_W, IAM_N, EWCaa, CTA))
+
 def Berechnung_Solarstrahlung(Globalstrahlung_L, D_L, Tag_des_Jahres_L, time_steps, Longitude, STD_Longitude, Latitude, Albedo, IAM_W, IAM_N,
                               EWCaa, CTA):    
     """
@@ -39,8 +173,8 @@ def Berechnung_Solarstrahlung(Globalstrahlung_L, D_L, Tag_des_Jahres_L, time_ste
         STD_Longitude (float): Standard longitude for the time zone.
         Latitude (float): Latitude of the location.
         Albedo (float): Albedo value.
-        IAM_W (dict): Incidence Angle Modifier for EW orientation.
-        IAM_N (dict): Incidence Angle Modifier for NS orientation.
+        IAM_W (dict or np.ndarray): Incidence Angle Modifier for EW orientation, as dict or table from IAM_table.
+        IAM_N (dict or np.ndarray): Incidence Angle Modifier for NS orientation, as dict or table from IAM_table.
         EWCaa (float): East-West collector azimuth angle.
         CTA (float): Collector tilt angle.
 
@@ -92,20 +226,10 @@ def Berechnung_Solarstrahlung(Globalstrahlung_L, D_L, Tag_des_Jahres_L, time_ste
     Incidence_angle_EW = np.where(condition, f_EW, 89.999)
     Incidence_angle_NS = np.where(condition, f_NS, 89.999)
 
-    def IAM(Incidence_angle, iam_data):
-        sverweis_1 = np.abs(Incidence_angle) - np.abs(Incidence_angle) % 10
-        sverweis_2 = np.vectorize(iam_data.get)(sverweis_1)
-        sverweis_3 = (np.abs(Incidence_angle) + 10) - (np.abs(Incidence_angle) + 10) % 10
-        sverweis_4 = np.vectorize(iam_data.get)(sverweis_3)
-
-        ergebnis = sverweis_2 + (np.abs(Incidence_angle) - sverweis_1) / (sverweis_3 - sverweis_1) * (sverweis_4 -
-                                                                                                      sverweis_2)
-        return ergebnis
-
     # Für IAM_EW
-    IAM_EW = IAM(Incidence_angle_EW, IAM_W)
+    IAM_EW = IAM(Incidence_angle_EW, IAM_table(IAM_W))
     # Für IAM_NS
-    IAM_NS = IAM(Incidence_angle_NS, IAM_N)
+    IAM_NS = IAM(Incidence_angle_NS, IAM_table(IAM_N))
 
     # Berechnet das Verhältnis der Strahlungsintensität auf dem geneigten Kollektor zur horizontalen Oberfläche
     function_Rb = np.cos(deg_to_rad(IaC)) / np.cos(deg_to_rad(SZA))
@@ -10,12 +10,11 @@ Additional Information: Yield calculation program for solar thermal energy in he
 # Import Bibliotheken
 from math import pi, exp, log, sqrt
 import numpy as np
-from datetime import datetime, timezone
 
-from heat_generators.solar_radiation import Berechnung_Solarstrahlung
+from heat_generators.solar_radiation import Berechnung_Solarstrahlung_cached, IAM_table
 
 def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_steps, calc1, calc2, duration, Tsmax=90, Longitude=-14.4222, STD_Longitude=-15, Latitude=51.1676,
-                   East_West_collector_azimuth_angle=0, Collector_tilt_angle=36, Tm_rl=60, Qsa=0, Vorwärmung_K=8, DT_WT_Solar_K=5, DT_WT_Netz_K=5):
+                   East_West_collector_azimuth_angle=0, Collector_tilt_angle=36, Tm_rl=60, Qsa=0, Vorwärmung_K=8, DT_WT_Solar_K=5, DT_WT_Netz_K=5, fast_calculation=True):
     """
     Berechnung der thermischen Solaranlage (STA) zur Wärmegewinnung.
 
@@ -42,6 +41,7 @@ def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_s
         Vorwärmung_K (float, optional): Vorwärmung in Kelvin. Defaults to 8.
         DT_WT_Solar_K (float, optional): Temperaturdifferenz Wärmetauscher Solar in Kelvin. Defaults to 5.
         DT_WT_Netz_K (float, optional): Temperaturdifferenz Wärmetauscher Netz in Kelvin. Defaults to 5.
+        fast_calculation (bool, optional): Schnelle Berechnung der Zeitschritte mit Gleitkomma-Listen anstelle der Referenzschleife. Defaults to True.
 
     Returns:
         tuple: Gesamtwärmemenge, Wärmeoutput, Speicherladung und Speicherfüllstand.
@@ -62,7 +62,7 @@ def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_s
     if Bruttofläche_STA == 0 or VS == 0:
         return 0, np.zeros_like(Last_L), np.zeros_like(Last_L), np.zeros_like(Last_L)
     
-    Tag_des_Jahres_L = np.array([datetime.fromtimestamp(t.astype('datetime64[s]').astype(np.int64), tz=timezone.utc).timetuple().tm_yday for t in time_steps])
+    Tag_des_Jahres_L = (time_steps.astype('datetime64[D]') - time_steps.astype('datetime64[Y]')).astype(int) + 1
 
     # Definition Albedo-Wert
     Albedo = 0.2
@@ -87,6 +87,8 @@ def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_s
         IAM_W = {0: 1, 10: 1, 20: 0.99, 30: 0.98, 40: 0.96, 50: 0.91, 60: 0.82, 70: 0.53, 80: 0.27, 90: 0.0}
         IAM_N = {0: 1, 10: 1, 20: 0.99, 30: 0.98, 40: 0.96, 50: 0.91, 60: 0.82, 70: 0.53, 80: 0.27, 90: 0.0}
 
+        IAM_W, IAM_N = IAM_table(IAM_W), IAM_table(IAM_N)
+
     if Typ == "Vakuumröhrenkollektor":
         # Vorgabewerte Vakuumröhrenkollektor
         # Aperaturfläche ist Bezugsfläche
@@ -109,6 +111,8 @@ def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_s
         IAM_W = {0: 1, 10: 1.02, 20: 1.03, 30: 1.03, 40: 1.03, 50: 0.96, 60: 1.07, 70: 1.19, 80: 0.595, 90: 0.0}
         IAM_N = {0: 1, 10: 1, 20: 0.99, 30: 0.96, 40: 0.93, 50: 0.9, 60: 0.87, 70: 0.86, 80: 0.43, 90: 0.0}
 
+        IAM_W, IAM_N = IAM_table(IAM_W), IAM_table(IAM_N)
+
     # Vorgabewerte Rohrleitungen
     Y_R = 2  # 1 oberirdisch, 2 erdverlegt, 3...
     Lrbin_E = 80
@@ -140,12 +144,18 @@ def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_s
     # Vorgabewerte Speicher
     QSmax = 1.16 * VS * (Tsmax - Tm_rl)
 
-    GT_H_Gk, K_beam_L, GbT_L, GdT_H_Dk_L = Berechnung_Solarstrahlung(Globalstrahlung_L, Direktstrahlung_L, 
+    GT_H_Gk, K_beam_L, GbT_L, GdT_H_Dk_L = Berechnung_Solarstrahlung_cached(Globalstrahlung_L, Direktstrahlung_L, 
                                                                      Tag_des_Jahres_L, time_steps, Longitude,
                                                                      STD_Longitude, Latitude, Albedo, IAM_W, IAM_N,
                                                                      East_West_collector_azimuth_angle,
                                                                      Collector_tilt_angle)
 
+    if fast_calculation:
+        return Berechnung_STA_Zeitschritte(Eta0b_neu * K_beam_L * GbT_L, Eta0b_neu * Kthetadiff * GdT_H_Dk_L, Tag_des_Jahres_L, Temperatur_L,
+                                           Windgeschwindigkeit_L, Last_L, VLT_L, RLT_L, duration, Bezugsfläche, Koll_c1, Koll_c2, Koll_c3,
+                                           KollCeff_A, wcorr, Keq_RE, CRK, Lrbin_E, L_Erdreich, hs_RE, VRV_bin, KK, CKK, VRV, QSmax, VS, Tsmax,
+                                           Tm_rl, Qsa, Vorwärmung_K, DT_WT_Solar_K, DT_WT_Netz_K)
+
     Speicher_Wärmeoutput_L = []
     Speicherladung_L = []
     Speicherfüllstand_L = []
@@ -371,4 +381,232 @@ def Berechnung_STA(Bruttofläche_STA, VS, Typ, Last_L, VLT_L, RLT_L, TRY, time_s
 
         Zähler += 1
 
-    return Gesamtwärmemenge, np.array(Speicher_Wärmeoutput_L).astype("float64"), np.array(Speicherladung_L).astype("float64"), np.array(Speicherfüllstand_L).astype("float64")
\ No newline at end of file
+    return Gesamtwärmemenge, np.array(Speicher_Wärmeoutput_L).astype("float64"), np.array(Speicherladung_L).astype("float64"), np.array(Speicherfüllstand_L).astype("float64")
+
+def Berechnung_STA_Zeitschritte(Eta0b_neu_K_beam_GbT_L, Eta0b_neu_Kthetadiff_GdT_H_Dk_L, Tag_des_Jahres_L, Temperatur_L, Windgeschwindigkeit_L, Last_L,
+                                VLT_L, RLT_L, duration, Bezugsfläche, Koll_c1, Koll_c2, Koll_c3, KollCeff_A, wcorr, Keq_RE, CRK, Lrbin_E, L_Erdreich,
+                                hs_RE, VRV_bin, KK, CKK, VRV, QSmax, VS, Tsmax, Tm_rl, Qsa, Vorwärmung_K, DT_WT_Solar_K, DT_WT_Netz_K):
+    """
+    Schnelle Berechnung der Zeitschritte der thermischen Solaranlage mit den gleichen Ergebnissen wie die Referenzschleife in Berechnung_STA.
+
+    Die Eingangsdaten werden als zusammenhängende float64-Arrays übergeben und in Gleitkomma-Listen umgewandelt, die Strahlungsterme
+    werden vorab für alle Zeitschritte berechnet und die konstanten Exponentialfaktoren nur einmal bestimmt. Die Rechenoperationen
+    je Zeitschritt entsprechen in Reihenfolge und Klammerung der Referenzschleife.
+
+    Args:
+        Eta0b_neu_K_beam_GbT_L (array): Direktstrahlungsterm des Kollektors je Zeitschritt.
+        Eta0b_neu_Kthetadiff_GdT_H_Dk_L (array): Diffusstrahlungsterm des Kollektors je Zeitschritt.
+        Tag_des_Jahres_L (array): Tag des Jahres je Zeitschritt.
+        Temperatur_L (array): Außentemperatur.
+        Windgeschwindigkeit_L (array): Windgeschwindigkeit.
+        Last_L (array): Lastprofil.
+        VLT_L (array): Vorlauftemperaturprofil.
+        RLT_L (array): Rücklauftemperaturprofil.
+        duration (float): Zeitdauer der Berechnung.
+        Bezugsfläche (float): Bezugsfläche des Kollektorfeldes.
+        Koll_c1, Koll_c2, Koll_c3, KollCeff_A, wcorr (float): Kollektorkennwerte.
+        Keq_RE, CRK, Lrbin_E, L_Erdreich, hs_RE, VRV_bin, KK, CKK, VRV (float): Kennwerte der Verbindungsleitung und der internen Verrohrung.
+        QSmax, VS, Tsmax, Tm_rl, Qsa (float): Kennwerte des Speichers.
+        Vorwärmung_K, DT_WT_Solar_K, DT_WT_Netz_K (float): Temperaturdifferenzen.
+
+    Returns:
+        tuple: Gesamtwärmemenge, Wärmeoutput, Speicherladung und Speicherfüllstand.
+    """
+    Eta0b_neu_K_beam_GbT_L = np.ascontiguousarray(Eta0b_neu_K_beam_GbT_L, dtype=np.float64).tolist()
+    Eta0b_neu_Kthetadiff_GdT_H_Dk_L = np.ascontiguousarray(Eta0b_neu_Kthetadiff_GdT_H_Dk_L, dtype=np.float64).tolist()
+    Tag_des_Jahres_L = np.ascontiguousarray(Tag_des_Jahres_L).tolist()
+    Temperatur_L = np.ascontiguousarray(Temperatur_L, dtype=np.float64).tolist()
+    Windgeschwindigkeit_L = np.ascontiguousarray(Windgeschwindigkeit_L, dtype=np.float64).tolist()
+    Last_L = np.ascontiguousarray(Last_L, dtype=np.float64).tolist()
+    VLT_L = np.ascontiguousarray(VLT_L, dtype=np.float64).tolist()
+    RLT_L = np.ascontiguousarray(RLT_L, dtype=np.float64).tolist()
+
+    # Konstante Faktoren
+    exp_Koll = exp(-Koll_c1 / KollCeff_A * 3.6)
+    exp_RE = exp(-Keq_RE / CRK)
+    exp_int = exp(-KK / CKK)
+    Koll_Kapazität = KollCeff_A * Bezugsfläche
+    PSV_Faktor = 0.75 * (VS * 1000) ** 0.5 * 0.16
+
+    n = min(len(Eta0b_neu_K_beam_GbT_L), len(Eta0b_neu_Kthetadiff_GdT_H_Dk_L), len(Tag_des_Jahres_L), len(Temperatur_L), len(Windgeschwindigkeit_L),
+            len(Last_L), len(VLT_L), len(RLT_L))
+    Speicher_Wärmeoutput_L = [0.0] * n
+    Speicherladung_L = [0.0] * n
+    Speicherfüllstand_L = [0.0] * n
+    Gesamtwärmemenge = 0
+
+    if n == 0:
+        return Gesamtwärmemenge, np.zeros(0), np.zeros(0), np.zeros(0)
+
+    # Erster Zeitschritt
+    Temperatur, RLT = Temperatur_L[0], RLT_L[0]
+    TS_unten = RLT
+    Zieltemperatur_Solaranlage = TS_unten + Vorwärmung_K + DT_WT_Solar_K + DT_WT_Netz_K
+    TRL_Solar = RLT
+    Tm_a = (Zieltemperatur_Solaranlage + TRL_Solar) / 2
+    Pkoll_a = Pkoll_b = 0
+    Tgkoll_a = 9.3
+    T_koll_a = Temperatur - (Temperatur - Tgkoll_a) * exp_Koll + (Pkoll_a * 3600) / Koll_Kapazität
+    T_koll_b = Temperatur - (Temperatur - 0) * exp_Koll + (Pkoll_b * 3600) / Koll_Kapazität
+    Tgkoll = 9.3
+    TRV_bin_vl = TRV_bin_rl = TRV_int_vl = TRV_int_rl = Temperatur
+    Summe_PRV = 0
+    Kollektorfeldertrag = 0
+    PSout = min(Kollektorfeldertrag, Last_L[0])
+    QS = Qsa * 1000
+    PSV = 0
+    Tag_des_Jahres_alt = Tag_des_Jahres_L[0]
+    Stagnation = 0
+
+    Speicherfüllstand_L[0] = QS / QSmax
+    Speicherladung_L[0] = QS
+    Speicher_Wärmeoutput_L[0] = PSout
+    Gesamtwärmemenge += (PSout / 1000) * duration
+
+    for i in range(1, n):
+        Eta0b_neu_K_beam_GbT = Eta0b_neu_K_beam_GbT_L[i]
+        Eta0b_neu_Kthetadiff_GdT_H_Dk = Eta0b_neu_Kthetadiff_GdT_H_Dk_L[i]
+        Temperatur = Temperatur_L[i]
+        Windgeschwindigkeit = Windgeschwindigkeit_L[i]
+        Last, VLT, RLT = Last_L[i], VLT_L[i], RLT_L[i]
+
+        T_koll_a_alt = T_koll_a
+        T_koll_b_alt = T_koll_b
+        Tgkoll_a_alt = Tgkoll_a
+        Tgkoll_alt = Tgkoll
+        Summe_PRV_alt = Summe_PRV
+        Zieltemperatur_Solaranlage_alt = Zieltemperatur_Solaranlage
+        Kollektorfeldertrag_alt = Kollektorfeldertrag
+
+        # Temperatur unten im Speicher
+        if QS/QSmax >= 0.8:
+            TS_unten = RLT + DT_WT_Netz_K + (2/3 * (VLT - RLT) / 0.2 * QS/QSmax) + (1 / 3 * (VLT - RLT)) - (2/3 * (VLT - RLT) / 0.2 * QS/QSmax)
+        else:
+            TS_unten = RLT + DT_WT_Netz_K + (1 / 3 * (VLT - RLT) / 0.8) * QS/QSmax
+
+        Zieltemperatur_Solaranlage = TS_unten + Vorwärmung_K + DT_WT_Solar_K + DT_WT_Netz_K
+        TRL_Solar = TS_unten + DT_WT_Solar_K
+
+        # Kollektor A
+        dT = Tm_a - Temperatur
+        Pkoll_a = max(0, (Eta0b_neu_K_beam_GbT + Eta0b_neu_Kthetadiff_GdT_H_Dk - Koll_c1 * dT - Koll_c2 * dT ** 2 - Koll_c3 * wcorr * Windgeschwindigkeit * dT) * Bezugsfläche / 1000)
+        T_koll_a = Temperatur - (Temperatur - Tgkoll_a_alt) * exp_Koll + (Pkoll_a * 3600) / Koll_Kapazität
+
+        # Kollektor B
+        dT = T_koll_b_alt - Temperatur
+        Pkoll_b = max(0, (Eta0b_neu_K_beam_GbT + Eta0b_neu_Kthetadiff_GdT_H_Dk - Koll_c1 * dT - Koll_c2 * dT ** 2 - Koll_c3 * wcorr * Windgeschwindigkeit * dT) * Bezugsfläche / 1000)
+        T_koll_b = Temperatur - (Temperatur - Tgkoll_a_alt) * exp_Koll + (Pkoll_b * 3600) / Koll_Kapazität
+
+        Tgkoll_a = min(Zieltemperatur_Solaranlage, T_koll_a)
+        Tm_a = (Zieltemperatur_Solaranlage + TRL_Solar) / 2
+
+        # Mittlere Kollektortemperatur
+        Tm_koll_alt = (T_koll_a_alt + T_koll_b_alt) / 2
+        Tm_koll = (T_koll_a + T_koll_b) / 2
+        Tm_sys = (Zieltemperatur_Solaranlage + TRL_Solar) / 2
+        Tm = Tm_koll if Tm_koll < Tm_sys and Tm_koll_alt < Tm_sys else Tm_sys
+
+        # Kollektorleistung
+        dT = Tm - Temperatur
+        Pkoll = max(0, (Eta0b_neu_K_beam_GbT + Eta0b_neu_Kthetadiff_GdT_H_Dk - Koll_c1 * dT - Koll_c2 * dT ** 2 - Koll_c3 * wcorr * Windgeschwindigkeit * dT) * Bezugsfläche / 1000)
+
+        T_koll = Temperatur - (Temperatur - Tgkoll) * exp_Koll + (Pkoll * 3600) / Koll_Kapazität
+        Tgkoll = min(Zieltemperatur_Solaranlage, T_koll)
+
+        # Verluste Verbindungsleitung
+        TRV_bin_vl_alt = TRV_bin_vl
+        TRV_bin_rl_alt = TRV_bin_rl
+
+        ziel_erreich = Tgkoll >= Zieltemperatur_Solaranlage and Pkoll > 0
+        ziel_erhöht = Zieltemperatur_Solaranlage >= Zieltemperatur_Solaranlage_alt
+
+        if ziel_erreich:
+            TRV_bin_vl = Zieltemperatur_Solaranlage
+            TRV_bin_rl = TRL_Solar
+        else:
+            TRV_bin_vl = Temperatur - (Temperatur - TRV_bin_vl_alt) * exp_RE
+            TRV_bin_rl = Temperatur - (Temperatur - TRV_bin_rl_alt) * exp_RE
+
+        P_RVT_bin = Lrbin_E / 1000 * ((TRV_bin_vl + TRV_bin_rl) / 2 - Temperatur) * 2 * pi * L_Erdreich * hs_RE
+
+        if ziel_erhöht:
+            P_RVK_bin_vl = max((TRV_bin_vl_alt - TRV_bin_vl) * VRV_bin * 3790 / 3600, 0)
+            P_RVK_bin_rl = max((TRV_bin_rl_alt - TRV_bin_rl) * VRV_bin * 3790 / 3600, 0)
+        else:
+            P_RVK_bin_vl = 0
+            P_RVK_bin_rl = 0
+
+        # Verluste interne Rohrleitungen
+        TRV_int_vl_alt = TRV_int_vl
+        TRV_int_rl_alt = TRV_int_rl
+
+        if ziel_erreich:
+            TRV_int_vl = Zieltemperatur_Solaranlage
+            TRV_int_rl = TRL_Solar
+        else:
+            TRV_int_vl = Temperatur - (Temperatur - TRV_int_vl_alt) * exp_int
+            TRV_int_rl = Temperatur - (Temperatur - TRV_int_rl_alt) * exp_int
+
+        P_RVT_int_vl = (TRV_int_vl - Temperatur) * KK * Bezugsfläche / 1000 / 2
+        P_RVT_int_rl = (TRV_int_rl - Temperatur) * KK * Bezugsfläche / 1000 / 2
+
+        if Zieltemperatur_Solaranlage < Zieltemperatur_Solaranlage_alt:
+            P_RVK_int_vl = P_RVK_int_rl = 0
+        else:
+            P_RVK_int_vl = max((TRV_int_vl_alt - TRV_int_vl) * VRV * Bezugsfläche / 2 * 3790 / 3600, 0)
+            P_RVK_int_rl = max((TRV_int_rl_alt - TRV_int_rl) * VRV * Bezugsfläche / 2 * 3790 / 3600, 0)
+
+        PRV = max(P_RVT_bin, P_RVK_bin_vl, 0) + max(P_RVT_bin, P_RVK_bin_rl, 0) + \
+              max(P_RVT_int_vl, P_RVK_int_vl, 0) + max(P_RVT_int_rl, P_RVK_int_rl, 0)
+
+        # Kollektorfeldertrag
+        if T_koll > Tgkoll_alt:
+            value1 = (T_koll-Tgkoll)/(T_koll-Tgkoll_alt) * Pkoll if Tgkoll >= Zieltemperatur_Solaranlage else 0
+            Kollektorfeldertrag = max(0, min(Pkoll, value1)) * (1 if Stagnation <= 0 else 0)
+        else:
+            Kollektorfeldertrag = 0
+
+        # Rohrleitungsverluste aufsummiert
+        if (Kollektorfeldertrag == 0 and Kollektorfeldertrag_alt == 0) or Kollektorfeldertrag <= Summe_PRV_alt:
+            Summe_PRV = PRV + Summe_PRV_alt - Kollektorfeldertrag
+        else:
+            Summe_PRV = PRV
+
+        Zwischenwert = Kollektorfeldertrag - Summe_PRV_alt if Kollektorfeldertrag > Summe_PRV_alt else 0
+
+        PSout = min(Zwischenwert + QS, Last) if Zwischenwert + QS > 0 else 0
+
+        Zwischenwert_Stag_verl = max(0, QS - PSV + Zwischenwert - PSout - QSmax)
+        PSin = Zwischenwert - Zwischenwert_Stag_verl
+
+        if QS - PSV + PSin - PSout > QSmax:
+            QS = QSmax
+        else:
+            QS = QS - PSV + PSin - PSout
+
+        # Mitteltemperatur im Speicher
+        value1 = QS/QSmax
+        value2 = Zieltemperatur_Solaranlage - DT_WT_Solar_K
+        if QS <= 0:
+            ergebnis1 = value2
+        elif value1 < (value2 - Tm_rl) / (Tsmax - Tm_rl):
+            ergebnis1 = VLT + DT_WT_Netz_K
+        else:
+            ergebnis1 = Tsmax
+
+        Tms = value1 * ergebnis1 + (1 - value1) * TS_unten
+
+        PSV = PSV_Faktor * (Tms - Temperatur) / 1000
+
+        Tag_des_Jahres = Tag_des_Jahres_L[i]
+        if Tag_des_Jahres == Tag_des_Jahres_alt:
+            Stagnation = 1 if (1 if Zwischenwert > Last and QS >= QSmax else 0) + Stagnation > 0 else 0
+        else:
+            Stagnation = 0
+
+        Speicherfüllstand_L[i] = QS / QSmax
+        Speicherladung_L[i] = QS
+        Speicher_Wärmeoutput_L[i] = PSout
+        Gesamtwärmemenge += (PSout / 1000) * duration
+
+    return Gesamtwärmemenge, np.array(Speicher_Wärmeoutput_L, dtype=np.float64), np.array(Speicherladung_L, dtype=np.float64), np.array(Speicherfüllstand_L, dtype=np.float64)
@@ -0,0 +1,62 @@
+"""
+Filename: storage_dispatch.py
+Author: Dipl.-Ing. (FH) Jonas Pfeiffer
+Date: 2024-08-05
+Description: Dispatch of heat generators with thermal storage and on/off hysteresis, used by the CHP and the biomass boiler.
+
+"""
+
+import numpy as np
+
+def storage_dispatch(Last_L, heat_output, duration, capacity, initial_fill, min_fill, max_fill, generator_on):
+    """
+    Dispatch of a generator with thermal storage and on/off hysteresis.
+
+    The generator runs at full heat output and charges the storage until the upper fill level is reached, then the load is covered
+    by the storage until the lower fill level is reached. In the time step in which the generator is switched on again, neither the
+    generator nor the storage supply heat. The time steps are calculated with Python floats and lists.
+
+    Args:
+        Last_L (array-like): Load profile in kW.
+        heat_output (float): Thermal output of the generator in kW.
+        duration (float): Duration of each time step in hours.
+        capacity (float): Storage capacity in kWh.
+        initial_fill (float): Initial fill level as fraction of the capacity.
+        min_fill (float): Lower fill level as fraction of the capacity at which the generator is switched on.
+        max_fill (float): Upper fill level as fraction of the capacity at which the generator is switched off.
+        generator_on (bool): Operating state of the generator at the beginning.
+
+    Returns:
+        tuple: Heat output of the generator, heat output of the storage (negative when charging), storage fill in kWh and the
+        operating state of the generator at the end.
+    """
+    Last_L = np.asarray(Last_L)
+    speicher_fill = initial_fill * capacity
+    min_speicher_fill = min_fill * capacity
+    max_speicher_fill = max_fill * capacity
+
+    n = len(Last_L)
+    Wärmeleistung_kW = [0.0] * n
+    Wärmeleistung_Speicher_kW = [0.0] * n
+    speicher_fill_L = [0.0] * n
+
+    for i, last in enumerate(Last_L.tolist()):
+        if generator_on:
+            if speicher_fill >= max_speicher_fill:
+                generator_on = False
+            else:
+                Wärmeleistung_kW[i] = heat_output
+                if last < heat_output:
+                    Wärmeleistung_Speicher_kW[i] = last - heat_output
+                    speicher_fill = min(speicher_fill + (heat_output - last) * duration, capacity)
+        elif speicher_fill <= min_speicher_fill:
+            generator_on = True
+
+        if not generator_on:
+            Wärmeleistung_Speicher_kW[i] = last
+            speicher_fill = max(speicher_fill - last * duration, 0)
+
+        speicher_fill_L[i] = float(speicher_fill)
+
+    return (np.array(Wärmeleistung_kW).astype(Last_L.dtype), np.array(Wärmeleistung_Speicher_kW).astype(Last_L.dtype),
+            np.array(speicher_fill_L), generator_on)
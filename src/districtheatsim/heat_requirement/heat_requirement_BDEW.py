@@ -9,6 +9,9 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+from functools import lru_cache
+
+from utilities.test_reference_year import load_TRY
 
 def get_resource_path(relative_path):
     """
@@ -37,11 +40,7 @@ def import_TRY(filename):
     Returns:
         array: Numpy array containing temperature data.
     """
-    col_widths = [8, 8, 3, 3, 3, 6, 5, 4, 5, 2, 5, 4, 5, 5, 4, 5, 3]
-    col_names = ["RW", "HW", "MM", "DD", "HH", "t", "p", "WR", "WG", "N", "x", "RF", "B", "D", "A", "E", "IL"]
-    data = pd.read_fwf(filename, widths=col_widths, names=col_names, skiprows=34)
-    temperature = data['t'].values
-    return temperature
+    return load_TRY(filename).t
 
 def generate_year_months_days_weekdays(year):
     """
@@ -125,7 +124,113 @@ def get_weekday_factor(daily_weekdays, profiletype, subtype, daily_data):
     profile_row = daily_data[daily_data['Standardlastprofil'] == profile]
     if profile_row.empty:
         raise ValueError("Profile not found")
-    return np.array([profile_row.iloc[0][str(day)] for day in daily_weekdays]).astype(float)
+    weekday_factors = profile_row.iloc[0][[str(day) for day in range(1, 8)]].values.astype(float)
+    return weekday_factors[np.asarray(daily_weekdays) - 1]
+
+class HourlyCoefficients:
+    """
+    Dense array of the hourly coefficients of the BDEW SLP methods.
+
+    The hour factors are stored in an array indexed by profile type, weekday, temperature and hour, so the hour factors of a whole
+    year are looked up with fancy indexing. Combinations which are not in the data are NaN, like the missing rows of a left merge.
+
+    Args:
+        hourly_data (DataFrame): DataFrame containing hourly coefficients.
+    """
+    def __init__(self, hourly_data):
+        self.profile_types = {profiletype: i for i, profiletype in enumerate(hourly_data["Typ"].unique())}
+        self.temperatures = np.sort(hourly_data["Temperatur"].unique().astype(float))
+        self.hours = np.sort(hourly_data["Stunde"].unique())
+
+        self.values = np.full((len(self.profile_types), 7, len(self.temperatures), len(self.hours)), np.nan)
+        self.values[hourly_data["Typ"].map(self.profile_types).values, hourly_data["Wochentag"].values - 1,
+                    np.searchsorted(self.temperatures, hourly_data["Temperatur"].values.astype(float)),
+                    np.searchsorted(self.hours, hourly_data["Stunde"].values)] = hourly_data["Stundenfaktor"].values.astype(float)
+
+    def get_hour_factors(self, profiletype, weekdays, temperatures, hours):
+        """
+        Get the hour factors for the given weekdays, reference temperatures and hours.
+
+        Args:
+            profiletype (str): The profile type.
+            weekdays (array): Weekdays from 1 to 7.
+            temperatures (array): Reference temperatures.
+            hours (array): Hours of the day.
+
+        Returns:
+            array: Hour factors, NaN for combinations which are not in the data.
+        """
+        if profiletype not in self.profile_types:
+            return np.full(np.shape(temperatures), np.nan)
+
+        temperature_index = np.minimum(np.searchsorted(self.temperatures, temperatures), len(self.temperatures) - 1)
+        hour_index = np.minimum(np.searchsorted(self.hours, hours), len(self.hours) - 1)
+        found = (self.temperatures[temperature_index] == temperatures) & (self.hours[hour_index] == hours)
+        return np.where(found, self.values[self.profile_types[profiletype], np.asarray(weekdays) - 1, temperature_index, hour_index], np.nan)
+
+def read_hourly_coefficients():
+    """
+    Read the hourly coefficients of the BDEW SLP methods.
+
+    Returns:
+        DataFrame: DataFrame containing hourly coefficients, the hour factors written with a decimal comma are converted.
+    """
+    hourly_data = pd.read_csv(get_resource_path('data/BDEW profiles/hourly_coefficients.csv'), delimiter=';')
+    hourly_data["Stundenfaktor"] = hourly_data["Stundenfaktor"].astype(str).str.replace(",", ".").astype(float)
+    return hourly_data
+
+@lru_cache(maxsize=None)
+def load_coefficients():
+    """
+    Load the daily and hourly coefficients of the BDEW SLP methods, they are only read once.
+
+    Returns:
+        tuple: DataFrame containing the daily coefficients and the dense array of the hourly coefficients.
+    """
+    daily_data = pd.read_csv(get_resource_path('data/BDEW profiles/daily_coefficients.csv'), delimiter=';')
+    return daily_data, HourlyCoefficients(read_hourly_coefficients())
+
+def get_hour_factors_merge(hourly_data, profiletype, hourly_weekdays, lower_limit, upper_limit, daily_hours):
+    """
+    Reference implementation of the hour factor lookup with merges of the hourly time steps and the hourly coefficients.
+
+    Args:
+        hourly_data (DataFrame): DataFrame containing hourly coefficients.
+        profiletype (str): The profile type.
+        hourly_weekdays (array): Weekday of every hour.
+        lower_limit (array): Lower reference temperature of every hour.
+        upper_limit (array): Upper reference temperature of every hour.
+        daily_hours (array): Hour of the day of every hour.
+
+    Returns:
+        tuple: Hour factors of the lower and the upper reference temperature.
+    """
+    filtered_hourly_data = hourly_data[hourly_data["Typ"] == profiletype]
+
+    hourly_conditions = pd.DataFrame({
+        'Wochentag': hourly_weekdays,
+        'TemperaturLower': lower_limit,
+        'TemperaturUpper': upper_limit,
+        'Stunde': daily_hours
+    })
+
+    merged_data_T1 = pd.merge(
+        hourly_conditions,
+        filtered_hourly_data,
+        how='left',
+        left_on=['Wochentag', 'TemperaturLower', 'Stunde'],
+        right_on=['Wochentag', 'Temperatur', 'Stunde']
+    )
+
+    merged_data_T2 = pd.merge(
+        hourly_conditions,
+        filtered_hourly_data,
+        how='left',
+        left_on=['Wochentag', 'TemperaturUpper', 'Stunde'],
+        right_on=['Wochentag', 'Temperatur', 'Stunde']
+    )
+
+    return merged_data_T1["Stundenfaktor"].values.astype(float), merged_data_T2["Stundenfaktor"].values.astype(float)
 
 def calculation_load_profile(TRY, JWB_kWh, profiletype, subtype, holidays, year, real_ww_share=None):
     """
@@ -143,12 +248,35 @@ def calculation_load_profile(TRY, JWB_kWh, profiletype, subtype, holidays, year,
     Returns:
         tuple: Arrays of hourly intervals, total heat demand, heating demand, warm water demand, and temperature.
     """
-    days_of_year, months, days, daily_weekdays = generate_year_months_days_weekdays(year)
     hourly_temperature = import_TRY(TRY)
+    daily_data, hourly_coefficients = load_coefficients()
+    return calculate_load_profiles(hourly_temperature, daily_data, hourly_coefficients, JWB_kWh, profiletype, subtype, year, real_ww_share)
+
+def calculate_load_profiles(hourly_temperature, daily_data, hourly_coefficients, JWB_kWh, profiletype, subtype, year, real_ww_share=None):
+    """
+    Calculate the load profiles of one or more buildings of the same profile type and subtype based on the BDEW SLP methods.
+
+    The profile shape is calculated once, the yearly heat demands and warm water shares of the buildings are applied to it by
+    broadcasting.
+
+    Args:
+        hourly_temperature (array): Hourly temperature data of the TRY.
+        daily_data (DataFrame): DataFrame containing daily coefficients.
+        hourly_coefficients (HourlyCoefficients): Dense array of the hourly coefficients.
+        JWB_kWh (float or array): Yearly heat demand in kWh, a column vector (buildings x 1) for several buildings.
+        profiletype (str): The profile type.
+        subtype (str): The profile subtype.
+        year (int): Year for the calculation.
+        real_ww_share (float or array, optional): Real warm water share, a column vector (buildings x 1) for several buildings. Defaults to None.
+
+    Returns:
+        tuple: Arrays of hourly intervals, total heat demand, heating demand, warm water demand, and temperature. The demands have one row
+        per building if JWB_kWh is a column vector.
+    """
+    days_of_year, months, days, daily_weekdays = generate_year_months_days_weekdays(year)
     daily_avg_temperature = np.round(calculate_daily_averages(hourly_temperature), 1)
     daily_reference_temperature = np.round((daily_avg_temperature + 2.5) * 2, -1) / 2 - 2.5
 
-    daily_data = pd.read_csv(get_resource_path('data/BDEW profiles/daily_coefficients.csv'), delimiter=';')
     h_A, h_B, h_C, h_D, mH, bH, mW, bW = get_coefficients(profiletype, subtype, daily_data)
     lin_H = np.nan_to_num(mH * daily_avg_temperature + bH) if mH != 0 or bH != 0 else 0
     lin_W = np.nan_to_num(mW * daily_avg_temperature + bW) if mW != 0 or bW != 0 else 0
@@ -175,46 +303,21 @@ def calculation_load_profile(TRY, JWB_kWh, profiletype, subtype, holidays, year,
 
     daily_hours = np.tile(np.arange(24), len(days_of_year))
     hourly_weekdays = np.repeat(daily_weekdays, 24)
-    hourly_daily_heat_demand_heating = np.repeat(daily_heat_demand_heating, 24)
-    hourly_daily_heat_demand_warmwater = np.repeat(daily_heat_demand_warmwater, 24)
-
-    hourly_data = pd.read_csv(get_resource_path('data/BDEW profiles/hourly_coefficients.csv'), delimiter=';')
-    filtered_hourly_data = hourly_data[hourly_data["Typ"] == profiletype]
-
-    hourly_conditions = pd.DataFrame({
-        'Wochentag': hourly_weekdays,
-        'TemperaturLower': lower_limit,
-        'TemperaturUpper': upper_limit,
-        'Stunde': daily_hours
-    })
-
-    merged_data_T1 = pd.merge(
-        hourly_conditions,
-        filtered_hourly_data,
-        how='left',
-        left_on=['Wochentag', 'TemperaturLower', 'Stunde'],
-        right_on=['Wochentag', 'Temperatur', 'Stunde']
-    )
-
-    merged_data_T2 = pd.merge(
-        hourly_conditions,
-        filtered_hourly_data,
-        how='left',
-        left_on=['Wochentag', 'TemperaturUpper', 'Stunde'],
-        right_on=['Wochentag', 'Temperatur', 'Stunde']
-    )
+    hourly_daily_heat_demand_heating = np.repeat(daily_heat_demand_heating, 24, axis=-1)
+    hourly_daily_heat_demand_warmwater = np.repeat(daily_heat_demand_warmwater, 24, axis=-1)
 
-    hour_factor_T1 = merged_data_T1["Stundenfaktor"].values.astype(float)
-    hour_factor_T2 = merged_data_T2["Stundenfaktor"].values.astype(float)
+    hour_factor_T1 = hourly_coefficients.get_hour_factors(profiletype, hourly_weekdays, lower_limit, daily_hours)
+    hour_factor_T2 = hourly_coefficients.get_hour_factors(profiletype, hourly_weekdays, upper_limit, daily_hours)
 
     hour_factor_interpolation = hour_factor_T2 + (hour_factor_T1 - hour_factor_T2) * ((hourly_temperature - upper_limit) / 5)
     hourly_heat_demand_heating = np.nan_to_num((hourly_daily_heat_demand_heating * hour_factor_interpolation) / 100).astype(float)
     hourly_heat_demand_warmwater = np.nan_to_num((hourly_daily_heat_demand_warmwater * hour_factor_interpolation) / 100).astype(float)
 
-    hourly_heat_demand_heating_normed = np.nan_to_num((hourly_heat_demand_heating / np.sum(hourly_heat_demand_heating)) * JWB_kWh)
-    hourly_heat_demand_warmwater_normed = np.nan_to_num((hourly_heat_demand_warmwater / np.sum(hourly_heat_demand_warmwater)) * JWB_kWh)
+    hourly_heat_demand_heating_normed = np.nan_to_num((hourly_heat_demand_heating / np.sum(hourly_heat_demand_heating, axis=-1, keepdims=True)) * JWB_kWh)
+    hourly_heat_demand_warmwater_normed = np.nan_to_num((hourly_heat_demand_warmwater / np.sum(hourly_heat_demand_warmwater, axis=-1, keepdims=True)) * JWB_kWh)
 
-    initial_ww_share = np.sum(hourly_heat_demand_warmwater_normed) / (np.sum(hourly_heat_demand_heating_normed) + np.sum(hourly_heat_demand_warmwater_normed))
+    initial_ww_share = np.sum(hourly_heat_demand_warmwater_normed, axis=-1, keepdims=True) / (np.sum(hourly_heat_demand_heating_normed, axis=-1, keepdims=True) +
+                                                                                            np.sum(hourly_heat_demand_warmwater_normed, axis=-1, keepdims=True))
 
     if real_ww_share is not None:
         ww_correction_factor = real_ww_share / initial_ww_share
@@ -222,7 +325,7 @@ def calculation_load_profile(TRY, JWB_kWh, profiletype, subtype, holidays, year,
         hourly_heat_demand_warmwater_normed *= ww_correction_factor
         hourly_heat_demand_heating_normed *= heating_correction_factor
         total_demand = hourly_heat_demand_heating_normed + hourly_heat_demand_warmwater_normed
-        scale_factor = JWB_kWh / np.sum(total_demand)
+        scale_factor = JWB_kWh / np.sum(total_demand, axis=-1, keepdims=True)
         hourly_heat_demand_heating_normed *= scale_factor
         hourly_heat_demand_warmwater_normed *= scale_factor
 
@@ -9,6 +9,9 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+from functools import lru_cache
+
+from utilities.test_reference_year import load_TRY
 
 def get_resource_path(relative_path):
     """
@@ -27,6 +30,11 @@ def get_resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+# Feiertage und Faktoren der Typtage für die Berechnung
+holidays = np.array(["2019-01-01", "2019-04-19", "2019-04-22", "2019-05-01", "2019-05-30", 
+                     "2019-06-10", "2019-06-20", "2019-10-03", "2019-11-01", "2019-12-25", "2019-12-26"]).astype('datetime64[D]')
+factors_path = 'data/VDI 4655 profiles/VDI 4655 data/Faktoren.csv'
+
 def import_TRY(filename):
     """
     Import Test Reference Year (TRY) data for weather conditions.
@@ -37,12 +45,8 @@ def import_TRY(filename):
     Returns:
         tuple: Two numpy arrays containing temperature and cloud cover data.
     """
-    col_widths = [8, 8, 3, 3, 3, 6, 5, 4, 5, 2, 5, 4, 5, 5, 4, 5, 3]
-    col_names = ["RW", "HW", "MM", "DD", "HH", "t", "p", "WR", "WG", "N", "x", "RF", "B", "D", "A", "E", "IL"]
-    data = pd.read_fwf(filename, widths=col_widths, names=col_names, skiprows=34)
-    temperature = data['t'].values
-    cloud_cover = data['N'].values
-    return temperature, cloud_cover
+    data = load_TRY(filename)
+    return data.t, data.N
 
 def generate_year_months_days_weekdays(year):
     """
@@ -107,38 +111,120 @@ def quarter_hourly_data(data):
         array: Quarter-hourly data.
     """
     num_quarter_hours_per_day = 24 * 4
-    return np.repeat(data, num_quarter_hours_per_day)
+    return np.repeat(data, num_quarter_hours_per_day, axis=-1)
+
+class TypeDayProfiles:
+    """
+    Standardized quarter-hourly profiles and factors of the VDI 4655 type days of one climate zone.
+
+    The profiles of all building types and type days are stored in a tensor indexed by building type, type day and quarter hour,
+    the factors in an array indexed by building type and type day. The profile of a year is gathered from them by indexing with the
+    type day of every day.
+
+    Args:
+        factor_data (DataFrame): DataFrame containing the factors of the type days.
+        climate_zone (str, optional): Climate zone. Defaults to "9".
+    """
+    def __init__(self, factor_data, climate_zone="9"):
+        self.climate_zone = climate_zone
+        self.building_types = {building_type: i for i, building_type in enumerate(factor_data['Haustyp'].dropna().unique())}
+        self.type_days = {type_day: i for i, type_day in enumerate(factor_data['Typtag'].dropna().unique())}
+
+        # Strombedarf, Heizwärme und Warmwasser je Viertelstunde des Typtages
+        self.profiles = np.full((len(self.building_types), len(self.type_days), 24 * 4, 3), np.nan)
+        # Faktoren Fheiz,TT, Fel,TT und FTWW,TT des Typtages
+        self.factors = np.full((len(self.building_types), len(self.type_days), 3), np.nan)
+
+        factor_rows = factor_data.dropna(subset=['Profiltag']).drop_duplicates('Profiltag').set_index('Profiltag')
+        for building_type, i in self.building_types.items():
+            for type_day, j in self.type_days.items():
+                profile_day = f"{building_type}{climate_zone}{type_day}"
+                if profile_day in factor_rows.index:
+                    self.factors[i, j] = factor_rows.loc[profile_day, ['Fheiz,TT', 'Fel,TT', 'FTWW,TT']].values.astype(float)
+
+                profile_path = get_resource_path(f'data/VDI 4655 profiles/VDI 4655 load profiles/{building_type}{type_day}.csv')
+                if os.path.exists(profile_path):
+                    # Leere Zeilen am Ende einiger Dateien werden übersprungen
+                    profile = pd.read_csv(profile_path, sep=';').dropna(subset=['Zeit'])
+                    hours_minutes = profile['Zeit'].str.split(':', expand=True).astype(int).values
+                    quarter_hours = hours_minutes[:, 0] * 4 + hours_minutes[:, 1] // 15
+                    self.profiles[i, j, quarter_hours] = profile[['Strombedarf normiert', 'Heizwärme normiert', 'Warmwasser normiert']].values.astype(float)
+
+    def get_indices(self, building_type, type_days):
+        """
+        Get the indices of a building type and the type days in the tensor.
+
+        Args:
+            building_type (str): The type of building.
+            type_days (array): Type day of every day.
+
+        Returns:
+            tuple: Index of the building type and indices of the type days.
+        """
+        if building_type not in self.building_types:
+            raise ValueError(f"Für den Gebäudetyp {building_type} sind keine Profile der VDI 4655 vorhanden.")
+        unique_type_days, inverse = np.unique(type_days, return_inverse=True)
+        return self.building_types[building_type], np.array([self.type_days[type_day] for type_day in unique_type_days], dtype=int)[inverse]
+
+    def get_factors(self, building_type, type_days):
+        """
+        Get the factors of the type days of a building type.
+
+        Args:
+            building_type (str): The type of building.
+            type_days (array): Type day of every day.
+
+        Returns:
+            tuple: Arrays of the heating, electricity and hot water factors of every day.
+        """
+        building_type_index, type_day_indices = self.get_indices(building_type, type_days)
+        factors = self.factors[building_type_index, type_day_indices]
+        return factors[:, 0], factors[:, 1], factors[:, 2]
+
+    def get_profiles(self, building_type, type_days):
+        """
+        Get the standardized quarter-hourly profiles of the type days of a building type.
+
+        Args:
+            building_type (str): The type of building.
+            type_days (array): Type day of every day.
+
+        Returns:
+            tuple: Arrays of the quarter-hourly electricity, heating and hot water demand.
+        """
+        building_type_index, type_day_indices = self.get_indices(building_type, type_days)
+        profiles = self.profiles[building_type_index, type_day_indices].reshape(-1, 3)
+        return profiles[:, 0], profiles[:, 1], profiles[:, 2]
+
+@lru_cache(maxsize=None)
+def load_type_day_profiles(factors, climate_zone="9"):
+    """
+    Load the profiles and factors of the VDI 4655 type days of a climate zone, they are only read once.
+
+    Args:
+        factors (str): Path to the factors CSV file.
+        climate_zone (str, optional): Climate zone. Defaults to "9".
+
+    Returns:
+        TypeDayProfiles: Profiles and factors of the type days.
+    """
+    return TypeDayProfiles(pd.read_csv(factors, sep=';'), climate_zone)
 
-def standardized_quarter_hourly_profile(year, building_type, days_of_year, type_days):
+def standardized_quarter_hourly_profile(year, building_type, type_days, type_day_profiles):
     """
     Generate a standardized quarter-hourly profile.
 
     Args:
         year (int): The year for which to generate the profile.
         building_type (str): The type of building.
-        days_of_year (array): Array of days in the year.
         type_days (array): Array of type days.
+        type_day_profiles (TypeDayProfiles): Profiles and factors of the type days.
 
     Returns:
         tuple: Arrays of quarter-hourly intervals, electricity demand, heating demand, and hot water demand.
     """
     quarter_hourly_intervals = calculate_quarter_hourly_intervals(year)
-    daily_dates = np.array([np.datetime64(dt, 'D') for dt in quarter_hourly_intervals])
-    indices = np.searchsorted(days_of_year, daily_dates)
-    quarterly_type_days = type_days[indices % len(type_days)]
-    
-    all_type_days = np.unique(quarterly_type_days)
-    all_data = {f"{building_type}{type_day}": pd.read_csv(get_resource_path(f'data\\VDI 4655 profiles\\VDI 4655 load profiles\\{building_type}{type_day}.csv'), sep=';') for type_day in all_type_days}
-    
-    profile_days = np.char.add(building_type, quarterly_type_days)
-    times_str = np.datetime_as_string(quarter_hourly_intervals, unit='m')
-    times = np.array([t.split('T')[1] for t in times_str])
-    times_profile_df = pd.DataFrame({'Datum': np.repeat(days_of_year, 24*4), 'Zeit': times, 'ProfileDay': profile_days})
-    combined_df = pd.concat([df.assign(ProfileDay=profile_day) for profile_day, df in all_data.items()])
-    merged_df = pd.merge(times_profile_df, combined_df, on=['Zeit', 'ProfileDay'], how='left')
-    electricity_demand = merged_df['Strombedarf normiert'].values
-    heating_demand = merged_df['Heizwärme normiert'].values
-    hot_water_demand = merged_df['Warmwasser normiert'].values
+    electricity_demand, heating_demand, hot_water_demand = type_day_profiles.get_profiles(building_type, type_days)
     return quarter_hourly_intervals, electricity_demand, heating_demand, hot_water_demand
 
 def calculation_load_profile(TRY, factors, building_type, number_people_household, YEU_electricity_kWh, YEU_heating_kWh, YEU_hot_water_kWh, holidays, climate_zone="9", year=2019):
@@ -160,31 +246,50 @@ def calculation_load_profile(TRY, factors, building_type, number_people_househol
     Returns:
         tuple: Arrays of quarter-hourly intervals, electricity demand, heating demand, hot water demand, and temperature.
     """
-    days_of_year, months, days, weekdays = generate_year_months_days_weekdays(year)
     temperature, degree_of_coverage = import_TRY(TRY)
+    type_day_profiles = load_type_day_profiles(factors, climate_zone)
+    return calculate_load_profiles(temperature, degree_of_coverage, type_day_profiles, building_type, number_people_household, YEU_electricity_kWh,
+                                   YEU_heating_kWh, YEU_hot_water_kWh, holidays, climate_zone, year)
+
+def calculate_load_profiles(temperature, degree_of_coverage, type_day_profiles, building_type, number_people_household, YEU_electricity_kWh, YEU_heating_kWh,
+                            YEU_hot_water_kWh, holidays, climate_zone="9", year=2019):
+    """
+    Calculate the load profiles of one or more buildings of the same building type based on the VDI 4655 methods.
+
+    The type days and the standardized profile are determined once, the yearly demands of the buildings are applied to them by
+    broadcasting.
+
+    Args:
+        temperature (array): Hourly temperature data of the TRY.
+        degree_of_coverage (array): Hourly cloud cover data of the TRY.
+        type_day_profiles (TypeDayProfiles): Profiles and factors of the type days of the climate zone.
+        building_type (str): The type of building.
+        number_people_household (int): Number of people in the household.
+        YEU_electricity_kWh (float or array): Yearly electricity usage in kWh, a column vector (buildings x 1) for several buildings.
+        YEU_heating_kWh (float or array): Yearly heating usage in kWh, a column vector (buildings x 1) for several buildings.
+        YEU_hot_water_kWh (float or array): Yearly hot water usage in kWh, a column vector (buildings x 1) for several buildings.
+        holidays (array): Array of holiday dates.
+        climate_zone (str, optional): Climate zone, has to be the climate zone of the type day profiles. Defaults to "9".
+        year (int, optional): Year for the calculation. Defaults to 2019.
+
+    Returns:
+        tuple: Arrays of quarter-hourly intervals, electricity demand, heating demand, hot water demand, and temperature. The demands have
+        one row per building if the yearly demands are column vectors.
+    """
+    days_of_year, months, days, weekdays = generate_year_months_days_weekdays(year)
     daily_avg_temperature, daily_avg_degree_of_coverage = calculate_daily_averages(temperature, degree_of_coverage)
     season = np.where(daily_avg_temperature < 5, "W", np.where((daily_avg_temperature >= 5) & (daily_avg_temperature <= 15), "Ü", "S"))
     day_type = np.where((weekdays == 1) | np.isin(days_of_year, holidays), "S", "W")
     degree_of_coverage = np.where(season == "S", "X", np.where((daily_avg_degree_of_coverage >= 0) & (daily_avg_degree_of_coverage < 4), "H", "B"))
     type_day = np.char.add(np.char.add(season, day_type), degree_of_coverage)
-    profile_day = np.char.add((building_type + climate_zone), type_day)
-
-    factor_data = pd.read_csv(factors, sep=';')
-    f_heating_tt = np.zeros(len(profile_day))
-    f_el_tt = np.zeros(len(profile_day))
-    f_hotwater_tt = np.zeros(len(profile_day))
 
-    for i, tag in enumerate(profile_day):
-        index = factor_data[factor_data['Profiltag'] == tag].index[0]
-        f_heating_tt[i] = factor_data.loc[index, 'Fheiz,TT']
-        f_el_tt[i] = factor_data.loc[index, 'Fel,TT']
-        f_hotwater_tt[i] = factor_data.loc[index, 'FTWW,TT']
+    f_heating_tt, f_el_tt, f_hotwater_tt = type_day_profiles.get_factors(building_type, type_day)
 
     daily_electricity = YEU_electricity_kWh * ((1/365) + (number_people_household*f_el_tt))
     daily_heating = YEU_heating_kWh * f_heating_tt
     daily_hot_water = YEU_hot_water_kWh * ((1/365) + (number_people_household*f_hotwater_tt))
 
-    quarter_hourly_intervals, electricity_kWh, heating_kWh, hot_water_kWh = standardized_quarter_hourly_profile(year, building_type, days_of_year, type_day)
+    quarter_hourly_intervals, electricity_kWh, heating_kWh, hot_water_kWh = standardized_quarter_hourly_profile(year, building_type, type_day, type_day_profiles)
 
     quarter_hourly_daily_electricity = quarter_hourly_data(daily_electricity)
     quarter_hourly_daily_heating = quarter_hourly_data(daily_heating)
@@ -194,9 +299,9 @@ def calculation_load_profile(TRY, factors, building_type, number_people_househol
     heating_normed = heating_kWh * quarter_hourly_daily_heating
     hot_water_normed = hot_water_kWh * quarte_hourly_daily_hot_water
 
-    electricity_corrected = electricity_normed/sum(electricity_normed)*YEU_electricity_kWh
-    heating_corrected = heating_normed/sum(heating_normed)*YEU_heating_kWh
-    hot_water_corrected = hot_water_normed/sum(hot_water_normed)*YEU_hot_water_kWh
+    electricity_corrected = electricity_normed/np.sum(electricity_normed, axis=-1, keepdims=True)*YEU_electricity_kWh
+    heating_corrected = heating_normed/np.sum(heating_normed, axis=-1, keepdims=True)*YEU_heating_kWh
+    hot_water_corrected = hot_water_normed/np.sum(hot_water_normed, axis=-1, keepdims=True)*YEU_hot_water_kWh
 
     return quarter_hourly_intervals, electricity_corrected, heating_corrected, hot_water_corrected, temperature
 
@@ -217,10 +322,7 @@ def calculate(YEU_heating_kWh, YEU_hot_water_kWh, YEU_electricity_kWh=1, buildin
     Returns:
         tuple: Arrays of quarter-hourly intervals, total heat demand, heating demand, hot water demand, temperature, and electricity demand.
     """
-    holidays = np.array(["2019-01-01", "2019-04-19", "2019-04-22", "2019-05-01", "2019-05-30", 
-                         "2019-06-10", "2019-06-20", "2019-10-03", "2019-11-01", "2019-12-25", "2019-12-26"]).astype('datetime64[D]')
-    
-    factors = get_resource_path('data\\VDI 4655 profiles\\VDI 4655 data\\Faktoren.csv')
+    factors = get_resource_path(factors_path)
 
     time_15min, electricity_kWh_15min, heating_kWh_15min, hot_water_kWh_15min, temperature = calculation_load_profile(TRY, factors, building_type, number_people_household, 
                                                                                                   YEU_electricity_kWh, YEU_heating_kWh, YEU_hot_water_kWh, 
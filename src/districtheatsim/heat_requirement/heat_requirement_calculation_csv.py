@@ -6,8 +6,118 @@ Description: Contains the functions for calculating the heating demand for given
 """
 
 import numpy as np
+
 from heat_requirement import heat_requirement_VDI4655, heat_requirement_BDEW
 
+class HeatDemandProfileEngine:
+    """
+    Batch calculation of the heat demand profiles of many buildings.
+
+    The TRY and the coefficients of the BDEW and VDI 4655 methods are read once per engine. The buildings are grouped by calculation method,
+    profile type and subtype, the profile shape of each group is calculated once and scaled by the yearly demands of its buildings as a
+    (buildings x time steps) broadcast.
+
+    Args:
+        TRY (str): Path to the TRY data file.
+        year_BDEW (int, optional): Year of the calculation with the BDEW methods. Defaults to 2021.
+        year_VDI4655 (int, optional): Year of the calculation with the VDI 4655 methods. Defaults to 2019.
+        climate_zone (str, optional): Climate zone of the VDI 4655 methods. Defaults to "9".
+    """
+    def __init__(self, TRY, year_BDEW=2021, year_VDI4655=2019, climate_zone="9"):
+        self.year_BDEW = year_BDEW
+        self.year_VDI4655 = year_VDI4655
+        self.climate_zone = climate_zone
+        self.temperature, self.degree_of_coverage = heat_requirement_VDI4655.import_TRY(TRY)
+        self.BDEW_daily_data, self.BDEW_hourly_coefficients = heat_requirement_BDEW.load_coefficients()
+        # Die Typtage der VDI 4655 werden erst bei der ersten Berechnung eingelesen
+        self.VDI4655_type_day_profiles = None
+
+    def calculate_BDEW(self, YEU_kWh, building_type, subtyp, real_ww_share):
+        """
+        Calculate the profiles of buildings of the same profile type and subtype with the BDEW methods.
+
+        Args:
+            YEU_kWh (array): Yearly heat demand of the buildings in kWh.
+            building_type (str): Profile type of the buildings.
+            subtyp (str): Profile subtype of the buildings.
+            real_ww_share (array): Warm water share of the buildings.
+
+        Returns:
+            tuple: Hourly time steps and the total, heating and warm water demand in kW with one row per building.
+        """
+        hourly_intervals, total_kW, heating_kW, warmwater_kW, _ = heat_requirement_BDEW.calculate_load_profiles(
+            self.temperature, self.BDEW_daily_data, self.BDEW_hourly_coefficients, np.asarray(YEU_kWh, dtype=float)[:, None], building_type, subtyp,
+            self.year_BDEW, np.asarray(real_ww_share, dtype=float)[:, None])
+        return hourly_intervals, total_kW, heating_kW, warmwater_kW
+
+    def calculate_VDI4655(self, YEU_heating_kWh, YEU_hot_water_kWh, building_type, YEU_electricity_kWh=1, number_people_household=2):
+        """
+        Calculate the profiles of buildings of the same building type with the VDI 4655 methods.
+
+        Args:
+            YEU_heating_kWh (array): Yearly heating demand of the buildings in kWh.
+            YEU_hot_water_kWh (array): Yearly hot water demand of the buildings in kWh.
+            building_type (str): Building type of the buildings.
+            YEU_electricity_kWh (float, optional): Yearly electricity demand of the buildings in kWh. Defaults to 1.
+            number_people_household (int, optional): Number of people in the household. Defaults to 2.
+
+        Returns:
+            tuple: Quarter-hourly time steps and the total, heating and warm water demand in kW with one row per building.
+        """
+        if self.VDI4655_type_day_profiles is None:
+            self.VDI4655_type_day_profiles = heat_requirement_VDI4655.load_type_day_profiles(heat_requirement_VDI4655.get_resource_path(heat_requirement_VDI4655.factors_path),
+                                                                                            self.climate_zone)
+
+        time_15min, _, heating_kWh_15min, hot_water_kWh_15min, _ = heat_requirement_VDI4655.calculate_load_profiles(
+            self.temperature, self.degree_of_coverage, self.VDI4655_type_day_profiles, building_type, number_people_household, YEU_electricity_kWh,
+            np.asarray(YEU_heating_kWh, dtype=float)[:, None], np.asarray(YEU_hot_water_kWh, dtype=float)[:, None], heat_requirement_VDI4655.holidays,
+            self.climate_zone, self.year_VDI4655)
+        total_heat_kWh_15min = heating_kWh_15min + hot_water_kWh_15min
+        return time_15min, total_heat_kWh_15min * 4, heating_kWh_15min * 4, hot_water_kWh_15min * 4
+
+    def calculate(self, YEU_total_heat_kWh, building_types, subtypes, ww_shares, calc_methods):
+        """
+        Calculate the profiles of all buildings.
+
+        Args:
+            YEU_total_heat_kWh (array): Yearly total heat demand of the buildings in kWh.
+            building_types (array): Building or profile type of the buildings.
+            subtypes (array): Profile subtype of the buildings, only used by the BDEW methods.
+            ww_shares (array): Warm water share of the buildings.
+            calc_methods (array): Calculation method of the buildings, "VDI4655" or "BDEW".
+
+        Returns:
+            tuple: Time steps and the total, heating and warm water demand in kW with one row per building in the order of the input.
+        """
+        YEU_total_heat_kWh = np.asarray(YEU_total_heat_kWh, dtype=float)
+        ww_shares = np.asarray(ww_shares, dtype=float)
+        calc_methods = np.asarray(calc_methods)
+
+        groups = {}
+        for idx, (method, building_type, subtype) in enumerate(zip(calc_methods, building_types, subtypes)):
+            if method not in ("VDI4655", "BDEW"):
+                raise ValueError(f"Für den Gebäudetyp {building_type} ist keine gültige Berechnungsmethode hinterlegt.")
+            # Der Subtyp wird nur von den BDEW-Profilen verwendet
+            groups.setdefault((method, building_type, subtype if method == "BDEW" else None), []).append(idx)
+
+        total_heat_kW, heating_kW, warmwater_kW = [None] * len(YEU_total_heat_kWh), [None] * len(YEU_total_heat_kWh), [None] * len(YEU_total_heat_kWh)
+        yearly_time_steps = None
+        for (method, building_type, subtype), indices in groups.items():
+            indices = np.array(indices)
+            if method == "VDI4655":
+                time_steps, group_total_kW, group_heating_kW, group_warmwater_kW = self.calculate_VDI4655(
+                    YEU_total_heat_kWh[indices] * (1 - ww_shares[indices]), YEU_total_heat_kWh[indices] * ww_shares[indices], building_type)
+            else:
+                time_steps, group_total_kW, group_heating_kW, group_warmwater_kW = self.calculate_BDEW(YEU_total_heat_kWh[indices], building_type, subtype, ww_shares[indices])
+
+            for row, idx in enumerate(indices):
+                total_heat_kW[idx], heating_kW[idx], warmwater_kW[idx] = group_total_kW[row], group_heating_kW[row], group_warmwater_kW[row]
+            # Zeitschritte der Gruppe des letzten Gebäudes
+            if len(YEU_total_heat_kWh) - 1 in indices:
+                yearly_time_steps = time_steps
+
+        return yearly_time_steps, np.array(total_heat_kW), np.array(heating_kW), np.array(warmwater_kW)
+
 def generate_profiles_from_csv(data, TRY, calc_method="Datensatz", ww_demand=0.2, subtyp="03", min_air_temperature=-12.0):
     """
     Generate heating profiles from CSV data.
@@ -34,12 +144,6 @@ def generate_profiles_from_csv(data, TRY, calc_method="Datensatz", ww_demand=0.2
         print("Unable to read data from CSV.")
         return None
 
-    total_heat_W = []
-    heating_heat_W = []
-    warmwater_heat_W = []
-    max_heat_requirement_W = []
-    yearly_time_steps = None
-
     building_type_to_method = {
         "EFH": "VDI4655",
         "MFH": "VDI4655",
@@ -59,41 +163,19 @@ def generate_profiles_from_csv(data, TRY, calc_method="Datensatz", ww_demand=0.2
         "GHD": "BDEW",
     }
 
-    for idx, YEU in enumerate(YEU_total_heat_kWh):
-        if calc_method == "Datensatz":
-            try:
-                current_building_type = str(data.at[idx, "Gebäudetyp"])
-                current_subtype = str(data.at[idx, "Subtyp"])
-                current_ww_demand = data.at[idx, "WW_Anteil"]
-                current_calc_method = building_type_to_method.get(current_building_type, "StandardMethode")
-            except KeyError:
-                print("Building type column not found in CSV.")
-                current_calc_method = "StandardMethode"
-        else:
-            current_building_type = building_type
-            current_calc_method = calc_method
-
-        if current_calc_method == "VDI4655":
-            YEU_heating_kWh, YEU_hot_water_kWh = YEU_total_heat_kWh * (1-ww_demand), YEU_total_heat_kWh * ww_demand
-            heating, hot_water = YEU_heating_kWh[idx], YEU_hot_water_kWh[idx]
-            yearly_time_steps, hourly_heat_demand_total_kW, hourly_heat_demand_heating_kW, hourly_heat_demand_warmwater_kW, hourly_air_temperatures, electricity_kW = heat_requirement_VDI4655.calculate(heating, hot_water, building_type=current_building_type, TRY=TRY)
-
-        elif current_calc_method == "BDEW":
-            yearly_time_steps, hourly_heat_demand_total_kW, hourly_heat_demand_heating_kW, hourly_heat_demand_warmwater_kW, hourly_air_temperatures = heat_requirement_BDEW.calculate(YEU_kWh=YEU, building_type=current_building_type, subtyp=current_subtype, TRY=TRY, real_ww_share=current_ww_demand)
-
-        hourly_heat_demand_total_kW = np.where(hourly_heat_demand_total_kW < 0, 0, hourly_heat_demand_total_kW)
-        hourly_heat_demand_heating_kW = np.where(hourly_heat_demand_heating_kW < 0, 0, hourly_heat_demand_heating_kW)
-        hourly_heat_demand_warmwater_kW = np.where(hourly_heat_demand_warmwater_kW < 0, 0, hourly_heat_demand_warmwater_kW)
-
-        total_heat_W.append(hourly_heat_demand_total_kW * 1000)
-        heating_heat_W.append(hourly_heat_demand_heating_kW * 1000)
-        warmwater_heat_W.append(hourly_heat_demand_warmwater_kW * 1000)
-        max_heat_requirement_W.append(np.max(hourly_heat_demand_total_kW * 1000))
-
-    total_heat_W = np.array(total_heat_W)
-    heating_heat_W = np.array(heating_heat_W)
-    warmwater_heat_W = np.array(warmwater_heat_W)
-    max_heat_requirement_W = np.array(max_heat_requirement_W)
+    if calc_method == "Datensatz":
+        calc_methods = np.array([building_type_to_method.get(current_building_type, "StandardMethode") for current_building_type in building_type])
+    else:
+        calc_methods = np.full(len(building_type), calc_method)
+
+    engine = HeatDemandProfileEngine(TRY)
+    yearly_time_steps, total_heat_kW, heating_kW, warmwater_kW = engine.calculate(YEU_total_heat_kWh, building_type, subtyp, ww_demand, calc_methods)
+    hourly_air_temperatures = engine.temperature
+
+    total_heat_W = np.where(total_heat_kW < 0, 0, total_heat_kW) * 1000
+    heating_heat_W = np.where(heating_kW < 0, 0, heating_kW) * 1000
+    warmwater_heat_W = np.where(warmwater_kW < 0, 0, warmwater_kW) * 1000
+    max_heat_requirement_W = np.max(total_heat_W, axis=1)
 
     supply_temperature_curve, return_temperature_curve = calculate_temperature_curves(data, hourly_air_temperatures)
 
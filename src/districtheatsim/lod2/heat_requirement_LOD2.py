@@ -14,6 +14,7 @@ import sys
 import pandas as pd
 
 from lod2.filter_LOD2 import spatial_filter_with_polygon, process_lod2, calculate_centroid_and_geocode
+from utilities.test_reference_year import load_TRY
 
 def get_resource_path(relative_path):
     """
@@ -85,10 +86,7 @@ class Building:
         """
         Imports TRY data for weather conditions.
         """
-        col_widths = [8, 8, 3, 3, 3, 6, 5, 4, 5, 2, 5, 4, 5, 5, 4, 5, 3]  # Column widths for the data file
-        col_names = ["RW", "HW", "MM", "DD", "HH", "t", "p", "WR", "WG", "N", "x", "RF", "B", "D", "A", "E", "IL"]  # Column names
-        data = pd.read_fwf(self.filename_TRY, widths=col_widths, names=col_names, skiprows=34)  # Read the file
-        self.temperature = data['t'].values  # Store temperature data as numpy array
+        self.temperature = load_TRY(self.filename_TRY).t  # Temperature data, the TRY file is parsed only once per process
     
     def calc_heat_demand(self):
         """
@@ -2,10 +2,10 @@
 Filename: controllers.py
 Author: Dipl.-Ing. (FH) Jonas Pfeiffer
 Date: 2024-07-31
-Description: Contains two custom pandapipes Controllers for the net simulation.
+Description: Contains the custom pandapipes Controllers for the net simulation.
 """
 
-from pandapower.control.basic_controller import BasicCtrl
+from pandapower.control.basic_controller import BasicCtrl, Controller
 from math import pi
 import numpy as np
 
@@ -395,4 +395,324 @@ class ReturnTemperatureController(BasicCtrl):
                 print(f"Max iterations reached for heat_consumer_idx: {self.heat_consumer_idx}")
             return True
 
-        return False
\ No newline at end of file
+        return False
+
+
+class VectorizedReturnTemperatureController(BasicCtrl):
+    """
+    A controller for maintaining the return temperatures of all heat consumers in the network at once.
+
+    It implements the same control algorithm as the ReturnTemperatureController, but holds the targets, the PID state, the mass flow limits
+    and the previous temperatures of all heat consumers in NumPy arrays. The controlled mass flows are updated with one array operation
+    per control step instead of one controller object per heat consumer.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        target_return_temperature (array-like): Target return temperatures of the heat consumers.
+        min_supply_temperature (array-like, optional): Minimum supply temperatures of the heat consumers. Defaults to 65.
+        heat_consumer_idx (array-like, optional): Indices of the controlled heat consumers. Defaults to all heat consumers.
+        kp (float, optional): Proportional gain. Defaults to 0.95.
+        ki (float, optional): Integral gain. Defaults to 0.0.
+        kd (float, optional): Derivative gain. Defaults to 0.0.
+        tolerance (float, optional): Tolerance for temperature difference. Defaults to 2.
+        min_velocity (float, optional): Minimum velocity in m/s. Defaults to 0.01.
+        max_velocity (float, optional): Maximum velocity in m/s. Defaults to 2.
+        max_iterations (int, optional): Maximum number of iterations. Defaults to 100.
+        debug (bool, optional): Flag to enable debug output. Defaults to False.
+        **kwargs: Additional keyword arguments.
+    """
+    def __init__(self, net, target_return_temperature, min_supply_temperature=65, heat_consumer_idx=None, kp=0.95, ki=0.0, kd=0.0, tolerance=2, 
+                 min_velocity=0.01, max_velocity=2, max_iterations=100, debug=False, **kwargs):
+        super(VectorizedReturnTemperatureController, self).__init__(net, **kwargs)
+        self.heat_consumer_idx = np.asarray(net.heat_consumer.index if heat_consumer_idx is None else heat_consumer_idx)
+        number_heat_consumers = len(self.heat_consumer_idx)
+
+        self.target_return_temperature = np.broadcast_to(np.asarray(target_return_temperature, dtype=float), (number_heat_consumers,)).copy()
+        self.min_supply_temperature = np.broadcast_to(np.asarray(min_supply_temperature, dtype=float), (number_heat_consumers,)).copy()
+        self.original_target_return_temperature = self.target_return_temperature.copy()
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.cp = 4190  # Specific heat capacity in J/(kg K)
+        self.tolerance = tolerance
+        self.min_velocity = min_velocity
+        self.max_velocity = max_velocity
+        self.max_iterations = max_iterations
+
+        # Time series of the targets with the shape (time steps x heat consumers), set by update_return_temperature_controller
+        self.return_temperature_profiles = None
+        self.min_supply_temperature_profiles = None
+        self.debug = debug
+
+        self.calculate_mass_flow_limits(net)
+        self.at_min_mass_flow_limit = np.zeros(number_heat_consumers, dtype=bool)
+        self.at_max_mass_flow_limit = np.zeros(number_heat_consumers, dtype=bool)
+        self.reset_state()
+
+    def reset_state(self):
+        """Reset the iteration counters, the PID state and the previous temperatures of all heat consumers.
+        """
+        number_heat_consumers = len(self.heat_consumer_idx)
+        self.iteration = np.zeros(number_heat_consumers, dtype=int)
+        self.integral = np.zeros(number_heat_consumers)
+        self.last_error = np.full(number_heat_consumers, np.nan)
+        # The last two supply temperatures, the latest one is stored in the second column
+        self.previous_temperatures = np.full((number_heat_consumers, 2), np.nan)
+        self.previous_temperature_count = np.zeros(number_heat_consumers, dtype=int)
+        self.converged = np.zeros(number_heat_consumers, dtype=bool)
+
+    def time_step(self, net, time_step):
+        """Reset the controller parameters at the start of each time step.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+            time_step (int): The current time step.
+
+        Returns:
+            int: The current time step.
+        """
+        self.reset_state()
+        self.target_return_temperature = self.original_target_return_temperature.copy()
+
+        mass_flow = self.get_values(net.heat_consumer, "controlled_mdot_kg_per_s")
+        mass_flow = np.where(self.at_min_mass_flow_limit, self.min_mass_flow * 1.05, mass_flow)
+        mass_flow = np.where(self.at_max_mass_flow_limit, self.max_mass_flow * 0.95, mass_flow)
+        self.set_mass_flow(net, mass_flow)
+
+        # Check if profiles exist and get the targets for the current time step
+        if self.return_temperature_profiles is not None:
+            self.target_return_temperature = self.return_temperature_profiles[time_step].astype(float)
+            self.min_supply_temperature = self.min_supply_temperature_profiles[time_step].astype(float)
+
+        return time_step
+
+    def get_values(self, df, column):
+        """Get the values of a column for all controlled heat consumers.
+
+        Args:
+            df (DataFrame): The element or result DataFrame.
+            column (str): The column name.
+
+        Returns:
+            np.ndarray: The values of the controlled heat consumers.
+        """
+        return df[column].loc[self.heat_consumer_idx].values.astype(float)
+
+    def set_mass_flow(self, net, mass_flow):
+        """Write the controlled mass flows of all controlled heat consumers in one assignment.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+            mass_flow (np.ndarray): The new mass flows.
+        """
+        net.heat_consumer.loc[self.heat_consumer_idx, "controlled_mdot_kg_per_s"] = mass_flow
+
+    def calculate_mass_flow_limits(self, net):
+        """Calculate the minimum and maximum mass flow limits.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+        """
+        diameter = self.get_values(net.heat_consumer, "diameter_m")
+        area = (pi / 4) * (diameter ** 2)
+
+        self.min_mass_flow = self.min_velocity * area * 1000
+        self.max_mass_flow = self.max_velocity * area * 1000
+
+    def get_weighted_average_temperature(self):
+        """Calculate the weighted average of the previous temperatures, NaN where no previous temperature exists.
+
+        Returns:
+            np.ndarray: The weighted average temperatures.
+        """
+        older, latest = self.previous_temperatures[:, 0], self.previous_temperatures[:, 1]
+        weighted_avg = np.where(self.previous_temperature_count >= 2, (older + 2 * latest) / 3, latest)
+        return np.where(self.previous_temperature_count > 0, weighted_avg, np.nan)
+
+    def calculate_derivative(self, error, mask):
+        """Calculate the derivative component of the PID controller and store the errors of the masked heat consumers.
+
+        Args:
+            error (np.ndarray): The current errors.
+            mask (np.ndarray): Heat consumers whose last error is updated.
+
+        Returns:
+            np.ndarray: The derivatives of the errors.
+        """
+        derivative = np.where(np.isnan(self.last_error), 0, error - self.last_error)
+        self.last_error = np.where(mask, error, self.last_error)
+        return derivative
+
+    def control_step(self, net):
+        """Adjust the mass flows of all heat consumers which are not converged yet.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+        """
+        active = ~self.converged
+        self.iteration += active
+
+        qext_w = self.get_values(net.heat_consumer, "qext_w")
+        current_mass_flow = self.get_values(net.heat_consumer, "controlled_mdot_kg_per_s")
+        current_T_out = self.get_values(net.res_heat_consumer, "t_to_k") - 273.15
+        current_T_in = self.get_values(net.res_heat_consumer, "t_from_k") - 273.15
+
+        weighted_avg_T_in = self.get_weighted_average_temperature()
+        current_T_in = np.where(np.isnan(weighted_avg_T_in), current_T_in, weighted_avg_T_in)
+
+        # Not converging under that value
+        low_demand = active & (qext_w <= 500)
+        # Ensure the supply temperature does not fall below the minimum supply temperature
+        supply_not_met = active & ~low_demand & (current_T_in < self.min_supply_temperature)
+        regular = active & ~low_demand & ~supply_not_met
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Minimum supply temperature not met
+            error_supply = self.min_supply_temperature - current_T_in
+            derivative_supply = self.calculate_derivative(error_supply, supply_not_met)
+            pid_output_supply = (self.kp * error_supply) + (self.ki * self.integral) + (self.kd * derivative_supply)
+            mass_flow_supply = current_mass_flow + pid_output_supply * self.cp * (self.min_supply_temperature - current_T_out)
+
+            # Regular return temperature control, adjust target slightly to avoid division by zero
+            self.target_return_temperature = np.where(regular & (current_T_in == self.target_return_temperature), 
+                                                      self.target_return_temperature + 0.1, self.target_return_temperature)
+            error = self.target_return_temperature - current_T_out
+            self.integral = np.where(regular, self.integral + error, self.integral)
+            derivative = self.calculate_derivative(error, regular)
+            pid_output = (self.kp * error) + (self.ki * self.integral) + (self.kd * derivative)
+
+            delta_T = current_T_in - current_T_out
+            delta_T = np.where(delta_T == 0, 0.1, delta_T)
+            adjusted_delta_T = current_T_in - (current_T_out + pid_output)
+            adjusted_delta_T = np.where(adjusted_delta_T == 0, 0.1, adjusted_delta_T)
+
+            # At the first iteration the mass flow from the previous is taken, which leads to problems when correcting the mass flow
+            mass_flow_regular = np.where(self.iteration == 1, qext_w / (self.cp * adjusted_delta_T), 
+                                         current_mass_flow + qext_w / (self.cp * adjusted_delta_T) - qext_w / (self.cp * delta_T))
+
+        new_mass_flow = current_mass_flow.copy()
+        new_mass_flow[low_demand] = self.min_mass_flow[low_demand]
+        new_mass_flow[supply_not_met] = np.clip(mass_flow_supply, self.min_mass_flow, self.max_mass_flow)[supply_not_met]
+        new_mass_flow[regular] = np.clip(mass_flow_regular, self.min_mass_flow, self.max_mass_flow)[regular]
+
+        self.set_mass_flow(net, new_mass_flow)
+
+        if self.debug:
+            print(f"Active heat consumers: {np.count_nonzero(active)}, minimum supply temperature not met: {np.count_nonzero(supply_not_met)}, low demand: {np.count_nonzero(low_demand)}")
+
+        return super(VectorizedReturnTemperatureController, self).control_step(net)
+
+    def is_converged(self, net):
+        """Check if the controller has converged for all heat consumers.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+
+        Returns:
+            bool: True if converged, False otherwise.
+        """
+        qext_w = self.get_values(net.heat_consumer, "qext_w")
+        # Not converging under that value
+        active = qext_w > 500
+
+        # Check whether the temperatures have changed within the specified tolerance
+        current_T_in = self.get_values(net.res_heat_consumer, "t_from_k") - 273.15
+        previous_T_in = self.previous_temperatures[:, 1]
+        temperature_change = np.where(self.previous_temperature_count > 0, np.abs(current_T_in - previous_T_in), np.inf)
+        converged_T_in = temperature_change < self.tolerance
+
+        current_T_out = self.get_values(net.res_heat_consumer, "t_to_k") - 273.15
+        converged_T_out = np.abs(current_T_out - self.target_return_temperature) < self.tolerance
+
+        # Update the previous temperatures, only the last two temperatures are kept
+        self.previous_temperatures[active, 0] = self.previous_temperatures[active, 1]
+        self.previous_temperatures[active, 1] = current_T_in[active]
+        self.previous_temperature_count[active] = np.minimum(self.previous_temperature_count[active] + 1, 2)
+
+        # Check whether the mass flow limits have been reached
+        current_mass_flow = self.get_values(net.heat_consumer, "controlled_mdot_kg_per_s")
+        self.at_min_mass_flow_limit = np.where(active, current_mass_flow <= self.min_mass_flow, self.at_min_mass_flow_limit)
+        self.at_max_mass_flow_limit = np.where(active, current_mass_flow >= self.max_mass_flow, self.at_max_mass_flow_limit)
+
+        at_limit = (self.at_min_mass_flow_limit | self.at_max_mass_flow_limit) & (self.iteration > 10)
+        supply_not_met = current_T_in < self.min_supply_temperature
+        max_iterations_reached = self.iteration >= self.max_iterations
+
+        self.converged = ~active | at_limit | (~supply_not_met & ((converged_T_in & converged_T_out) | max_iterations_reached))
+
+        if self.debug:
+            print(f"Converged heat consumers: {np.count_nonzero(self.converged)} of {len(self.converged)}")
+
+        return bool(np.all(self.converged))
+
+class ProfileMatrixControl(Controller):
+    """
+    A controller which writes time series of several elements at once, replacing one ConstControl and one DFData per element.
+
+    The profiles are held as NumPy matrices with the shape (time steps x elements). At each time step the whole row is written
+    into the element table with one vectorized assignment.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        element (str): The element table, e.g. "heat_consumer".
+        profiles (dict): Mapping of the controlled variables, e.g. "qext_w", to their profile matrices.
+        element_index (array-like, optional): Indices of the controlled elements. Defaults to all elements of the table.
+        in_service (bool, optional): Indicates if the controller is in service. Defaults to True.
+        order (int, optional): Order of the controller. Defaults to -1.
+        level (int, optional): Level of the controller. Defaults to -1.
+        **kwargs: Additional keyword arguments.
+    """
+    def __init__(self, net, element, profiles, element_index=None, in_service=True, order=-1, level=-1, **kwargs):
+        super(ProfileMatrixControl, self).__init__(net, in_service=in_service, order=order, level=level, initial_run=False, **kwargs)
+        self.element = element
+        self.element_index = np.asarray(net[element].index if element_index is None else element_index)
+        self.profiles = {}
+        for variable, profile in profiles.items():
+            self.set_profile(variable, profile)
+        self.applied = False
+
+    def set_profile(self, variable, profile):
+        """Set the profile matrix of a variable.
+
+        Args:
+            variable (str): The controlled variable.
+            profile (array-like): Profile matrix with the shape (time steps x elements).
+        """
+        profile = np.atleast_2d(np.asarray(profile, dtype=float))
+        if profile.shape[1] != len(self.element_index):
+            raise ValueError(f"The profile matrix of {variable} must have one column per element ({len(self.element_index)}), got {profile.shape[1]}.")
+        self.profiles[variable] = profile
+
+    def time_step(self, net, time_step):
+        """Write the values of the current time step into the element table.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+            time_step (int): The current time step.
+
+        Returns:
+            int: The current time step.
+        """
+        self.applied = False
+        for variable, profile in self.profiles.items():
+            net[self.element].loc[self.element_index, variable] = profile[time_step]
+        return time_step
+
+    def is_converged(self, net):
+        """Check if the values of the current time step have been applied.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+
+        Returns:
+            bool: True if applied, False otherwise.
+        """
+        return self.applied
+
+    def control_step(self, net):
+        """Mark the values of the current time step as applied.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+        """
+        self.applied = True
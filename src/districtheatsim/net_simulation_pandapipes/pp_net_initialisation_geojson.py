@@ -11,11 +11,12 @@ import pandapipes as pp
 import json
 import pandas as pd
 
+from utilities.cop_service import load_COP_file
 from net_simulation_pandapipes.utilities import create_controllers, correct_flow_directions, COP_WP, init_diameter_types
 
 def initialize_geojson(vorlauf, ruecklauf, hast, erzeugeranlagen, json_path, COP_filename, min_supply_temperature_building, \
                        return_temperature_heat_consumer, supply_temperature_net, flow_pressure_pump, lift_pressure_pump, netconfiguration, pipetype, dT_RL, \
-                       v_max_pipe, material_filter, insulation_filter, v_max_heat_consumer, mass_flow_secondary_producers=0.5):
+                       v_max_pipe, material_filter, insulation_filter, v_max_heat_consumer, mass_flow_secondary_producers=0.5, vectorized_controllers=False):
     """Initialize the network using GeoJSON data and various parameters.
 
     Args:
@@ -38,6 +39,7 @@ def initialize_geojson(vorlauf, ruecklauf, hast, erzeugeranlagen, json_path, COP
         insulation_filter (str): Insulation filter for the pipes.
         v_max_heat_consumer (float): Maximum velocity for heat consumers.
         mass_flow_secondary_producers (float, optional): Mass flow for secondary producers. Defaults to 0.5.
+        vectorized_controllers (bool, optional): Use one vectorized return temperature controller for all heat consumers. Defaults to False.
 
     Returns:
         pandapipesNet: The initialized pandapipes network.
@@ -111,7 +113,7 @@ def initialize_geojson(vorlauf, ruecklauf, hast, erzeugeranlagen, json_path, COP
     strombedarf_hast_ges_W = []
     max_el_leistung_hast_ges_W = []
     if netconfiguration == "kaltes Netz":
-        COP_file_values = np.genfromtxt(COP_filename, delimiter=';')
+        COP_file_values = load_COP_file(COP_filename)
         COP, _ = COP_WP(supply_temperature_buildings, return_temperature_heat_consumer, COP_file_values)
         print(f"COP dezentrale Wärmepumpen Gebäude: {COP}")
 
@@ -139,7 +141,8 @@ def initialize_geojson(vorlauf, ruecklauf, hast, erzeugeranlagen, json_path, COP
 
     net = create_network(vorlauf, ruecklauf, hast, erzeugeranlagen, max_waerme_hast_ges_W, min_supply_temperature_building, return_temperature_heat_consumer, \
                             supply_temperature_net, flow_pressure_pump, lift_pressure_pump, pipetype, \
-                            v_max_pipe, material_filter, insulation_filter, v_max_heat_consumer=v_max_heat_consumer, mass_flow_secondary_producers=mass_flow_secondary_producers)
+                            v_max_pipe, material_filter, insulation_filter, v_max_heat_consumer=v_max_heat_consumer, mass_flow_secondary_producers=mass_flow_secondary_producers, \
+                            vectorized_controllers=vectorized_controllers)
     
     return net, yearly_time_steps, waerme_hast_ges_W, return_temperature_heat_consumer, supply_temperature_buildings, return_temperature_buildings, \
         supply_temperature_building_curve, return_temperature_building_curve, strombedarf_hast_ges_W, max_el_leistung_hast_ges_W
@@ -184,7 +187,7 @@ def get_all_point_coords_from_line_cords(all_line_coords):
 
 def create_network(gdf_flow_line, gdf_return_line, gdf_heat_exchanger, gdf_heat_producer, qext_w, supply_temperature_heat_consumer=75, return_temperature_heat_consumer=60, supply_temperature=85,
                    flow_pressure_pump=4, lift_pressure_pump=1.5, pipetype="KMR 100/250-2v", v_max_pipe=1, material_filter="KMR", insulation_filter="2v", 
-                   pipe_creation_mode="type", v_max_heat_consumer=2, main_producer_location_index=0, mass_flow_secondary_producers=0.5):
+                   pipe_creation_mode="type", v_max_heat_consumer=2, main_producer_location_index=0, mass_flow_secondary_producers=0.5, vectorized_controllers=False):
     """Create the pandapipes network using the provided data and parameters.
 
     Args:
@@ -206,6 +209,7 @@ def create_network(gdf_flow_line, gdf_return_line, gdf_heat_exchanger, gdf_heat_
         v_max_heat_consumer (float, optional): Maximum velocity for heat consumers. Defaults to 2.
         main_producer_location_index (int, optional): Index of the main producer location. Defaults to 0.
         mass_flow_secondary_producers (float, optional): Mass flow for secondary producers. Defaults to 0.5.
+        vectorized_controllers (bool, optional): Use one vectorized return temperature controller for all heat consumers. Defaults to False.
 
     Returns:
         pandapipesNet: The created pandapipes network.
@@ -340,7 +344,7 @@ def create_network(gdf_flow_line, gdf_return_line, gdf_heat_exchanger, gdf_heat_
             if i != main_producer_location_index:
                 create_circulation_pump_mass_flow(net, [all_heat_producer_coords[i]], {**junction_dict_vl, **junction_dict_rl}, "heat source slave")
 
-    net = create_controllers(net, qext_w, return_temperature_heat_consumer, supply_temperature_heat_consumer)
+    net = create_controllers(net, qext_w, return_temperature_heat_consumer, supply_temperature_heat_consumer, vectorized_controllers=vectorized_controllers)
     net = correct_flow_directions(net)
     net = init_diameter_types(net, v_max_pipe=v_max_pipe, material_filter=material_filter, insulation_filter=insulation_filter)
 
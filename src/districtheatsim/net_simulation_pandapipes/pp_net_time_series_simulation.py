@@ -5,6 +5,8 @@ Date: 2024-07-31
 Description: Script with functions for the implemented time series calculation.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+
 from pandapipes.timeseries import run_time_series
 from pandapower.control.controller.const_control import ConstControl
 from pandapower.timeseries import OutputWriter
@@ -13,8 +15,10 @@ from pandapower.timeseries import DFData
 import pandas as pd
 import numpy as np
 
-from net_simulation_pandapipes.controllers import ReturnTemperatureController
+from net_simulation_pandapipes.controllers import ReturnTemperatureController, VectorizedReturnTemperatureController, ProfileMatrixControl
 from net_simulation_pandapipes.utilities import COP_WP
+from utilities.cop_service import load_COP_file
+from net_simulation_pandapipes.result_storage import ResultStore, StreamingOutputWriter
 
 def update_const_controls(net, qext_w_profiles, time_steps, start, end):
     """Update constant controls with new data sources for time series simulation.
@@ -26,12 +30,19 @@ def update_const_controls(net, qext_w_profiles, time_steps, start, end):
         start (int): Start index for slicing the profiles.
         end (int): End index for slicing the profiles.
     """
+    # Map the heat consumers to their controllers once instead of scanning all controllers for every profile
+    const_controls = {}
+    for ctrl in net.controller.object.values:
+        if isinstance(ctrl, ProfileMatrixControl) and ctrl.element == 'heat_consumer':
+            # One row per time step and one column per heat consumer
+            ctrl.set_profile('qext_w', np.asarray(qext_w_profiles)[:, start:end].T)
+        elif isinstance(ctrl, ConstControl) and ctrl.variable == 'qext_w':
+            const_controls[ctrl.element_index] = ctrl
+
     for i, qext_w_profile in enumerate(qext_w_profiles):
-        df = pd.DataFrame(index=time_steps, data={f'qext_w_{i}': qext_w_profile[start:end]})
-        data_source = DFData(df)
-        for ctrl in net.controller.object.values:
-            if isinstance(ctrl, ConstControl) and ctrl.element_index == i and ctrl.variable == 'qext_w':
-                ctrl.data_source = data_source
+        if i in const_controls:
+            df = pd.DataFrame(index=time_steps, data={f'qext_w_{i}': qext_w_profile[start:end]})
+            const_controls[i].data_source = DFData(df)
 
 def update_return_temperature_controller(net, supply_temperature_heat_consumer, return_temperature_heat_consumer, time_steps, start, end):
     """Update return temperature controllers with new data sources for time series simulation.
@@ -56,6 +67,10 @@ def update_return_temperature_controller(net, supply_temperature_heat_consumer,
 
             ctrl.data_source = data_source_return_temp
             controller_count += 1
+        elif isinstance(ctrl, VectorizedReturnTemperatureController):
+            # One row per time step and one column per heat consumer
+            ctrl.return_temperature_profiles = np.asarray(return_temperature_heat_consumer)[:, start:end].T
+            ctrl.min_supply_temperature_profiles = np.asarray(supply_temperature_heat_consumer)[:, start:end].T
 
 def update_supply_temperature_controls(net, supply_temperature, time_steps, start, end):
     """Update supply temperature controls with new data sources for time series simulation.
@@ -145,7 +160,7 @@ def time_series_preprocessing(supply_temperature, supply_temperature_heat_consum
     waerme_hast_ges_W = []
     strom_hast_ges_W = []
     
-    COP_file_values = np.genfromtxt(COP_filename, delimiter=';')
+    COP_file_values = load_COP_file(COP_filename)
 
     if building_temp_checked == False and netconfiguration != "kaltes Netz":
         waerme_hast_ges_W = total_heat_W
@@ -156,15 +171,9 @@ def time_series_preprocessing(supply_temperature, supply_temperature_heat_consum
         COP, _ = COP_WP(supply_temperature_buildings, return_temperature_heat_consumer, COP_file_values)
         print(f"COP dezentrale Wärmepumpen Gebäude: {COP}")
 
-        for waerme_gebaeude, cop in zip(total_heat_W, COP):
-            strom_wp = waerme_gebaeude/cop
-            waerme_hast = waerme_gebaeude - strom_wp
-
-            waerme_hast_ges_W.append(waerme_hast)
-            strom_hast_ges_W.append(strom_wp)
-
-        waerme_hast_ges_W = np.array(waerme_hast_ges_W)
-        strom_hast_ges_W = np.array(strom_hast_ges_W)
+        # One COP per building for all hours
+        strom_hast_ges_W = np.asarray(total_heat_W) / COP[:, np.newaxis]
+        waerme_hast_ges_W = np.asarray(total_heat_W) - strom_hast_ges_W
     
     if building_temp_checked == True and netconfiguration != "kaltes Netz":
         supply_temperature_heat_consumer = supply_temperature_buildings_curve + dT_RL
@@ -174,23 +183,21 @@ def time_series_preprocessing(supply_temperature, supply_temperature_heat_consum
 
     elif building_temp_checked == True and netconfiguration == "kaltes Netz":
         supply_temperature_heat_consumer = return_temperature_heat_consumer + dT_RL
-        for st, rt, waerme_gebaeude in zip(supply_temperature_buildings_curve, return_temperature_heat_consumer, total_heat_W):
-            cop, _ = COP_WP(st, rt, COP_file_values)
+        # COP for the whole buildings x hours matrix in one call, the return temperatures are given per building or per building and hour
+        return_temperature_matrix = np.asarray(return_temperature_heat_consumer, dtype=float)
+        if return_temperature_matrix.ndim == 1:
+            return_temperature_matrix = return_temperature_matrix[:, np.newaxis]
+        COP, _ = COP_WP(np.asarray(supply_temperature_buildings_curve, dtype=float), return_temperature_matrix, COP_file_values)
 
-            strom_wp = waerme_gebaeude/cop
-            waerme_hast = waerme_gebaeude - strom_wp
-
-            waerme_hast_ges_W.append(waerme_hast)
-            strom_hast_ges_W.append(strom_wp)
-
-        waerme_hast_ges_W = np.array(waerme_hast_ges_W)
-        strom_hast_ges_W = np.array(strom_hast_ges_W)
+        strom_hast_ges_W = np.asarray(total_heat_W) / COP
+        waerme_hast_ges_W = np.asarray(total_heat_W) - strom_hast_ges_W
 
         print(f"Rücklauftemperatur HAST: {return_temperature_heat_consumer} °C")
 
     return waerme_hast_ges_W, strom_hast_ges_W, supply_temperature_heat_consumer, return_temperature_heat_consumer 
     
-def thermohydraulic_time_series_net(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature=85, supply_temperature_heat_consumer=75, return_temperature_heat_consumer=60):
+def thermohydraulic_time_series_net(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature=85, supply_temperature_heat_consumer=75, return_temperature_heat_consumer=60, 
+                                    num_workers=1, warmup_steps=6, results_path=None, cluster_tolerance=None):
     """Run a thermohydraulic time series simulation for the network.
 
     Args:
@@ -202,10 +209,25 @@ def thermohydraulic_time_series_net(net, yearly_time_steps, qext_w_profiles, sta
         supply_temperature (float, optional): Supply temperature. Defaults to 85.
         supply_temperature_heat_consumer (float, optional): Minimum supply temperature for heat consumers. Defaults to 75.
         return_temperature_heat_consumer (float, optional): Return temperature for heat consumers. Defaults to 60.
+        num_workers (int, optional): Number of worker processes. Values above 1 split the time range into chunks which are calculated in parallel. Defaults to 1.
+        warmup_steps (int, optional): Number of time steps each parallel chunk is calculated in advance to warm-start the controllers. Defaults to 6.
+        results_path (str, optional): Directory the results are streamed to. If None, the results are kept in memory. Defaults to None.
+        cluster_tolerance (float, optional): If given, only representative time steps are calculated, see thermohydraulic_time_series_net_clustered. The representative
+            time steps are calculated with num_workers worker processes. Defaults to None.
 
     Returns:
-        tuple: Updated yearly time steps, network, and results.
+        tuple: Updated yearly time steps, network, and results (dict of arrays or ResultStore if results_path is given).
     """
+    if cluster_tolerance is not None:
+        return thermohydraulic_time_series_net_clustered(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature, supply_temperature_heat_consumer, 
+                                                         return_temperature_heat_consumer, load_tolerance=cluster_tolerance, num_workers=num_workers, 
+                                                         warmup_steps=warmup_steps, results_path=results_path)
+
+    if num_workers > 1:
+        return thermohydraulic_time_series_net_parallel(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature, supply_temperature_heat_consumer, 
+                                                        return_temperature_heat_consumer, num_workers=num_workers, warmup_steps=warmup_steps, 
+                                                        results_path=results_path)
+
     # Prepare time series calculation
     yearly_time_steps = yearly_time_steps[start:end]
 
@@ -224,17 +246,258 @@ def thermohydraulic_time_series_net(net, yearly_time_steps, qext_w_profiles, sta
 
     # Log variables and run time series calculation
     log_variables = create_log_variables(net)
+    if results_path is not None:
+        StreamingOutputWriter(net, time_steps, results_path, log_variables=log_variables)
+        run_time_series.run_timeseries(net, time_steps, mode="all")
+        return yearly_time_steps, net, ResultStore(results_path)
+
     ow = OutputWriter(net, time_steps, output_path=None, log_variables=log_variables)
     run_time_series.run_timeseries(net, time_steps, mode="all")
 
     return yearly_time_steps, net, ow.np_results
 
+def slice_time_series(values, start, end):
+    """Slice a time series input along its time axis, scalar inputs are returned unchanged.
+
+    Args:
+        values (float, array or None): Scalar value, 1D time series or 2D array with one time series per heat consumer.
+        start (int): Start index for slicing.
+        end (int): End index for slicing.
+
+    Returns:
+        float, array or None: The sliced time series.
+    """
+    if isinstance(values, (list, np.ndarray)):
+        return np.asarray(values)[..., start:end]
+    return values
+
+def select_time_steps(values, time_steps):
+    """Select time steps of a time series input, scalar inputs are returned unchanged.
+
+    Args:
+        values (float, array or None): Scalar value, 1D time series or 2D array with one time series per heat consumer.
+        time_steps (array): Indices of the selected time steps.
+
+    Returns:
+        float, array or None: The selected time steps.
+    """
+    if isinstance(values, (list, np.ndarray)):
+        return np.asarray(values)[..., time_steps]
+    return values
+
+def cluster_time_steps(qext_w_profiles, temperature_profiles=(), load_tolerance=0.05, temperature_tolerance=1.0):
+    """Cluster the time steps by the load of the heat consumers and the temperatures.
+
+    The time steps are processed in the order of increasing total load. A time step is assigned to the closest representative time step
+    if its loads and temperatures all deviate less than the tolerances, otherwise it becomes a new representative time step. Every 
+    representative is an actual time step (medoid), so it can be calculated with the unchanged network model.
+
+    Args:
+        qext_w_profiles (array): External heat profiles with one row per heat consumer.
+        temperature_profiles (list of arrays, optional): Temperature profiles, 1D for the network or 2D with one row per heat consumer. Defaults to ().
+        load_tolerance (float, optional): Permitted load deviation relative to the peak load of each heat consumer. Defaults to 0.05.
+        temperature_tolerance (float, optional): Permitted temperature deviation in K. Defaults to 1.0.
+
+    Returns:
+        tuple: Indices of the representative time steps and the index of the representative for every time step.
+    """
+    qext_w_profiles = np.atleast_2d(np.asarray(qext_w_profiles, dtype=float))
+    peak_load = np.max(np.abs(qext_w_profiles), axis=1, keepdims=True)
+    peak_load[peak_load == 0] = 1
+
+    # Scaled state vectors, a deviation of 1 corresponds to the tolerance
+    states = [qext_w_profiles / peak_load / load_tolerance]
+    for temperature_profile in temperature_profiles:
+        states.append(np.atleast_2d(np.asarray(temperature_profile, dtype=float)) / temperature_tolerance)
+    states = np.vstack(states).T
+
+    labels = np.empty(len(states), dtype=int)
+    representatives = []
+    representative_states = np.empty((0, states.shape[1]))
+    for time_step in np.argsort(np.sum(qext_w_profiles, axis=0), kind="stable"):
+        if len(representatives) > 0:
+            deviation = np.max(np.abs(representative_states - states[time_step]), axis=1)
+            closest = np.argmin(deviation)
+            if deviation[closest] <= 1:
+                labels[time_step] = closest
+                continue
+        labels[time_step] = len(representatives)
+        representatives.append(time_step)
+        representative_states = np.vstack([representative_states, states[time_step]])
+
+    return np.array(representatives, dtype=int), labels
+
+def thermohydraulic_time_series_net_clustered(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature=85, supply_temperature_heat_consumer=75, 
+                                              return_temperature_heat_consumer=60, load_tolerance=0.05, temperature_tolerance=1.0, num_workers=1, warmup_steps=6, 
+                                              results_path=None):
+    """Run the thermohydraulic time series simulation only for representative time steps.
+
+    Time steps with nearly identical loads and temperatures are clustered (see cluster_time_steps). Only the representative time steps
+    are calculated, in the order of increasing load, and their results are mapped back to every time step of their cluster.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        yearly_time_steps (array): Array of yearly time steps.
+        qext_w_profiles (list of arrays): List of external heat profiles.
+        start (int): Start index for the simulation.
+        end (int): End index for the simulation.
+        supply_temperature (float, optional): Supply temperature. Defaults to 85.
+        supply_temperature_heat_consumer (float, optional): Minimum supply temperature for heat consumers. Defaults to 75.
+        return_temperature_heat_consumer (float, optional): Return temperature for heat consumers. Defaults to 60.
+        load_tolerance (float, optional): Permitted load deviation relative to the peak load of each heat consumer. Defaults to 0.05.
+        temperature_tolerance (float, optional): Permitted temperature deviation in K. Defaults to 1.0.
+        num_workers (int, optional): Number of worker processes the representative time steps are calculated with. Values above 1 split them into chunks
+            which are calculated in parallel. Defaults to 1.
+        warmup_steps (int, optional): Number of representative time steps each parallel chunk is calculated in advance to warm-start the controllers. Defaults to 6.
+        results_path (str, optional): Directory the mapped results are written to. If None, the results are kept in memory. Defaults to None.
+
+    Returns:
+        tuple: Updated yearly time steps, network, and results for every time step.
+    """
+    qext_w_profiles = np.asarray(qext_w_profiles)[:, start:end]
+    supply_temperature = slice_time_series(supply_temperature, start, end)
+    supply_temperature_heat_consumer = slice_time_series(supply_temperature_heat_consumer, start, end)
+    return_temperature_heat_consumer = slice_time_series(return_temperature_heat_consumer, start, end)
+
+    temperature_profiles = [values for values in (supply_temperature, supply_temperature_heat_consumer, return_temperature_heat_consumer) 
+                            if isinstance(values, np.ndarray)]
+    representatives, labels = cluster_time_steps(qext_w_profiles, temperature_profiles, load_tolerance, temperature_tolerance)
+    print(f"Zeitreihenrechnung mit {len(representatives)} repräsentativen von {end - start} Zeitschritten")
+
+    _, net, net_results = thermohydraulic_time_series_net(net, np.asarray(yearly_time_steps)[start:end][representatives], qext_w_profiles[:, representatives], 
+                                                          0, len(representatives), select_time_steps(supply_temperature, representatives), 
+                                                          select_time_steps(supply_temperature_heat_consumer, representatives), 
+                                                          select_time_steps(return_temperature_heat_consumer, representatives), num_workers=num_workers, 
+                                                          warmup_steps=warmup_steps)
+
+    # Map the results of the representative time steps to all time steps, the heat demand is taken from the profiles
+    net_results = {key: values[labels] for key, values in net_results.items()}
+    if "heat_consumer.qext_w" in net_results:
+        net_results["heat_consumer.qext_w"] = qext_w_profiles.T.astype(float)
+
+    if results_path is not None:
+        store = ResultStore(results_path)
+        for key, values in net_results.items():
+            results = store.create(key, values.shape)
+            results[:] = values
+            results.flush()
+        net_results = store
+
+    return yearly_time_steps[start:end], net, net_results
+
+def run_time_series_chunk(net, yearly_time_steps, qext_w_profiles, warmup_start, chunk_start, chunk_end, supply_temperature, 
+                          supply_temperature_heat_consumer, return_temperature_heat_consumer, results_path=None, results_offset=0):
+    """Calculate one chunk of the parallel time series simulation in a worker process.
+
+    The chunk is calculated from warmup_start on, so that the controllers start from a converged state. The results of the warm-up
+    time steps are discarded afterwards.
+
+    Args:
+        net (pandapipesNet): Copy of the pandapipes network owned by the worker.
+        yearly_time_steps (array): Array of yearly time steps.
+        qext_w_profiles (array): External heat profiles.
+        warmup_start (int): Start index of the warm-up window.
+        chunk_start (int): Start index of the chunk.
+        chunk_end (int): End index of the chunk.
+        supply_temperature (float or array): Supply temperature.
+        supply_temperature_heat_consumer (float or array): Minimum supply temperature for heat consumers.
+        return_temperature_heat_consumer (float or array): Return temperature for heat consumers.
+        results_path (str, optional): Directory of the result files the chunk is written to. Defaults to None.
+        results_offset (int, optional): Row of the first time step of the chunk in the result files. Defaults to 0.
+
+    Returns:
+        tuple: Network after the last time step of the chunk and the results of the chunk (None if they were written to results_path).
+    """
+    # Only the data of the chunk is passed to the time series calculation
+    qext_w_profiles = slice_time_series(qext_w_profiles, warmup_start, chunk_end)
+    supply_temperature = slice_time_series(supply_temperature, warmup_start, chunk_end)
+    supply_temperature_heat_consumer = slice_time_series(supply_temperature_heat_consumer, warmup_start, chunk_end)
+    return_temperature_heat_consumer = slice_time_series(return_temperature_heat_consumer, warmup_start, chunk_end)
+
+    _, net, net_results = thermohydraulic_time_series_net(net, yearly_time_steps[warmup_start:chunk_end], qext_w_profiles, 0, chunk_end - warmup_start, 
+                                                          supply_temperature, supply_temperature_heat_consumer, return_temperature_heat_consumer)
+
+    warmup_steps = chunk_start - warmup_start
+    if results_path is not None:
+        store = ResultStore(results_path)
+        for key, values in net_results.items():
+            store.write(key, results_offset, values[warmup_steps:])
+        return net, None
+
+    return net, {key: values[warmup_steps:] for key, values in net_results.items()}
+
+def thermohydraulic_time_series_net_parallel(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature=85, supply_temperature_heat_consumer=75, 
+                                             return_temperature_heat_consumer=60, num_workers=4, warmup_steps=6, results_path=None):
+    """Run the thermohydraulic time series simulation split into chunks which are calculated in parallel worker processes.
+
+    Every worker gets its own copy of the network. The results of the chunks are stitched together in the order of the time steps, 
+    so the returned results have the same structure as the results of thermohydraulic_time_series_net.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        yearly_time_steps (array): Array of yearly time steps.
+        qext_w_profiles (list of arrays): List of external heat profiles.
+        start (int): Start index for the simulation.
+        end (int): End index for the simulation.
+        supply_temperature (float, optional): Supply temperature. Defaults to 85.
+        supply_temperature_heat_consumer (float, optional): Minimum supply temperature for heat consumers. Defaults to 75.
+        return_temperature_heat_consumer (float, optional): Return temperature for heat consumers. Defaults to 60.
+        num_workers (int, optional): Number of worker processes. Defaults to 4.
+        warmup_steps (int, optional): Number of time steps each chunk is calculated in advance to warm-start the controllers. Defaults to 6.
+        results_path (str, optional): Directory the workers write their results to. If None, the results are returned in memory. Defaults to None.
+
+    Returns:
+        tuple: Updated yearly time steps, network after the last time step, and results.
+    """
+    chunks = [chunk for chunk in np.array_split(np.arange(start, end), num_workers) if len(chunk) > 0]
+
+    # The result files are created once, every worker writes the rows of its chunk
+    if results_path is not None:
+        store = ResultStore(results_path)
+        for table, variable in create_log_variables(net):
+            store.create(f"{table}.{variable}", (end - start, len(net[table.split("res_")[-1]]))).flush()
+
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = []
+        for chunk in chunks:
+            chunk_start, chunk_end = int(chunk[0]), int(chunk[-1]) + 1
+            warmup_start = max(start, chunk_start - warmup_steps)
+            futures.append(executor.submit(run_time_series_chunk, net, yearly_time_steps, qext_w_profiles, warmup_start, chunk_start, chunk_end, 
+                                           supply_temperature, supply_temperature_heat_consumer, return_temperature_heat_consumer, 
+                                           results_path=results_path, results_offset=chunk_start - start))
+
+        chunk_results = [future.result() for future in futures]
+
+    # Stitch the chunk results together, the network state is taken from the last chunk
+    net = chunk_results[-1][0]
+    if results_path is not None:
+        return yearly_time_steps[start:end], net, ResultStore(results_path)
+
+    net_results = {key: np.concatenate([results[key] for _, results in chunk_results], axis=0) for key in chunk_results[0][1]}
+
+    return yearly_time_steps[start:end], net, net_results
+
+def get_result_column(net_results, key, index):
+    """Read the results of one element from the results of the time series simulation.
+
+    Only the requested column is loaded when the results are stored on disk, the returned array does not reference the result files.
+
+    Args:
+        net_results (dict or ResultStore): Results of the time series simulation.
+        key (str): Name of the logged variable, e.g. "res_junction.t_k".
+        index (int): Column of the element.
+
+    Returns:
+        np.ndarray: Results of the element for all time steps.
+    """
+    return np.array(net_results[key][:, index])
+
 def calculate_results(net, net_results, cp_kJ_kgK=4.2):
     """Calculate and structure the simulation results.
 
     Args:
         net (pandapipesNet): The pandapipes network.
-        net_results (dict): Results of the time series simulation.
+        net_results (dict or ResultStore): Results of the time series simulation.
         cp_kJ_kgK (float, optional): Specific heat capacity of water in kJ/kg*K. Defaults to 4.2.
 
     Returns:
@@ -249,27 +512,33 @@ def calculate_results(net, net_results, cp_kJ_kgK=4.2):
     # Add results for the Pressure Pump
     if 'circ_pump_pressure' in net:
         for idx, row in net.circ_pump_pressure.iterrows():
+            mass_flow = get_result_column(net_results, "res_circ_pump_pressure.mdot_flow_kg_per_s", idx)
+            return_temp_k = get_result_column(net_results, "res_junction.t_k", net.circ_pump_pressure["return_junction"][0])
+            flow_temp_k = get_result_column(net_results, "res_junction.t_k", net.circ_pump_pressure["flow_junction"][0])
             pump_results["Heizentrale Haupteinspeisung"][idx] = {
-                "mass_flow": net_results["res_circ_pump_pressure.mdot_flow_kg_per_s"][:, 0],
-                "deltap": net_results["res_circ_pump_pressure.deltap_bar"][:, 0],
-                "return_temp": net_results["res_junction.t_k"][:, net.circ_pump_pressure["return_junction"][0]] - 273.15,
-                "flow_temp": net_results["res_junction.t_k"][:, net.circ_pump_pressure["flow_junction"][0]] - 273.15,
-                "return_pressure": net_results["res_junction.p_bar"][:, net.circ_pump_pressure["return_junction"][0]],
-                "flow_pressure": net_results["res_junction.p_bar"][:, net.circ_pump_pressure["flow_junction"][0]],
-                "qext_kW": net_results["res_circ_pump_pressure.mdot_flow_kg_per_s"][:, idx] * cp_kJ_kgK * (net_results["res_junction.t_k"][:, net.circ_pump_pressure["flow_junction"][0]] - net_results["res_junction.t_k"][:, net.circ_pump_pressure["return_junction"][0]])
+                "mass_flow": get_result_column(net_results, "res_circ_pump_pressure.mdot_flow_kg_per_s", 0),
+                "deltap": get_result_column(net_results, "res_circ_pump_pressure.deltap_bar", 0),
+                "return_temp": return_temp_k - 273.15,
+                "flow_temp": flow_temp_k - 273.15,
+                "return_pressure": get_result_column(net_results, "res_junction.p_bar", net.circ_pump_pressure["return_junction"][0]),
+                "flow_pressure": get_result_column(net_results, "res_junction.p_bar", net.circ_pump_pressure["flow_junction"][0]),
+                "qext_kW": mass_flow * cp_kJ_kgK * (flow_temp_k - return_temp_k)
             }
 
     # Add results for the Mass Pumps
     if 'circ_pump_mass' in net:
         for idx, row in net.circ_pump_mass.iterrows():
+            mass_flow = get_result_column(net_results, "res_circ_pump_mass.mdot_flow_kg_per_s", idx)
+            return_temp_k = get_result_column(net_results, "res_junction.t_k", net.circ_pump_mass["return_junction"][0])
+            flow_temp_k = get_result_column(net_results, "res_junction.t_k", net.circ_pump_mass["flow_junction"][0])
             pump_results["weitere Einspeisung"][idx] = {
-                "mass_flow": net_results["res_circ_pump_mass.mdot_flow_kg_per_s"][:, idx],
-                "deltap": net_results["res_circ_pump_mass.deltap_bar"][:, idx],
-                "return_temp": net_results["res_junction.t_k"][:, net.circ_pump_mass["return_junction"][0]] - 273.15,
-                "flow_temp": net_results["res_junction.t_k"][:, net.circ_pump_mass["flow_junction"][0]] - 273.15,
-                "return_pressure": net_results["res_junction.p_bar"][:, net.circ_pump_mass["return_junction"][0]],
-                "flow_pressure": net_results["res_junction.p_bar"][:, net.circ_pump_mass["flow_junction"][0]],
-                "qext_kW": net_results["res_circ_pump_mass.mdot_flow_kg_per_s"][:, idx] * cp_kJ_kgK * (net_results["res_junction.t_k"][:, net.circ_pump_mass["flow_junction"][0]] - net_results["res_junction.t_k"][:, net.circ_pump_mass["return_junction"][0]])
+                "mass_flow": mass_flow,
+                "deltap": get_result_column(net_results, "res_circ_pump_mass.deltap_bar", idx),
+                "return_temp": return_temp_k - 273.15,
+                "flow_temp": flow_temp_k - 273.15,
+                "return_pressure": get_result_column(net_results, "res_junction.p_bar", net.circ_pump_mass["return_junction"][0]),
+                "flow_pressure": get_result_column(net_results, "res_junction.p_bar", net.circ_pump_mass["flow_junction"][0]),
+                "qext_kW": mass_flow * cp_kJ_kgK * (flow_temp_k - return_temp_k)
             }
 
     return pump_results
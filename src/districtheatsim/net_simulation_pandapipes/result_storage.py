@@ -0,0 +1,97 @@
+"""
+Filename: result_storage.py
+Author: Dipl.-Ing. (FH) Jonas Pfeiffer
+Date: 2024-08-05
+Description: Contains the on-disk storage for the results of the time series calculation.
+"""
+
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+from pandapower.timeseries import OutputWriter
+
+class ResultStore(Mapping):
+    """Memory-mapped storage of the logged results of a time series calculation.
+
+    Every logged variable is stored as a NumPy file with one row per time step and one column per element in the results directory.
+    Reading a variable returns a read-only memory map, so only the accessed parts of the results are loaded into memory.
+
+    Args:
+        results_path (str): Directory of the result files.
+    """
+    def __init__(self, results_path):
+        self.results_path = results_path
+        os.makedirs(results_path, exist_ok=True)
+
+    def get_file_path(self, name):
+        """Get the path of the result file of a logged variable.
+
+        Args:
+            name (str): Name of the logged variable, e.g. "res_junction.t_k".
+
+        Returns:
+            str: Path of the result file.
+        """
+        return os.path.join(self.results_path, f"{name}.npy")
+
+    def create(self, name, shape):
+        """Create the result file of a logged variable.
+
+        Args:
+            name (str): Name of the logged variable.
+            shape (tuple): Number of time steps and number of elements.
+
+        Returns:
+            np.memmap: Writable memory map of the result file.
+        """
+        return np.lib.format.open_memmap(self.get_file_path(name), mode='w+', dtype=np.float64, shape=shape)
+
+    def write(self, name, start, values):
+        """Write the results of consecutive time steps into an existing result file.
+
+        Args:
+            name (str): Name of the logged variable.
+            start (int): Row of the first time step.
+            values (np.ndarray): Results with one row per time step.
+        """
+        results = np.load(self.get_file_path(name), mmap_mode='r+')
+        results[start:start + len(values)] = values
+        results.flush()
+        del results
+
+    def __getitem__(self, name):
+        file_path = self.get_file_path(name)
+        if not os.path.exists(file_path):
+            raise KeyError(name)
+        return np.load(file_path, mmap_mode='r')
+
+    def __iter__(self):
+        return iter(sorted(os.path.splitext(file_name)[0] for file_name in os.listdir(self.results_path) if file_name.endswith(".npy")))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+class StreamingOutputWriter(OutputWriter):
+    """OutputWriter which streams the logged results of every time step into a ResultStore instead of keeping them in memory.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        time_steps (range): Time steps of the time series calculation.
+        results_path (str): Directory of the result files.
+        log_variables (list, optional): Variables to log. Defaults to None.
+    """
+    def __init__(self, net, time_steps, results_path, log_variables=None):
+        super().__init__(net, time_steps, output_path=None, log_variables=log_variables)
+        self.store = ResultStore(results_path)
+
+    def _init_np_array(self, partial_func):
+        super()._init_np_array(partial_func)
+        name = self._get_np_name(partial_func.args)
+        self.np_results[name] = self.store.create(name, self.np_results[name].shape)
+
+    def _np_to_pd(self):
+        # The results are not converted to DataFrames, they are only written to disk
+        for results in self.np_results.values():
+            results.flush()
@@ -0,0 +1,148 @@
+"""
+Filename: surrogate_model.py
+Author: Dipl.-Ing. (FH) Jonas Pfeiffer
+Date: 2024-08-05
+Description: Contains a reduced-order surrogate model of the network for fast annual calculations.
+"""
+
+import copy
+import logging
+
+import numpy as np
+
+from net_simulation_pandapipes.pp_net_time_series_simulation import thermohydraulic_time_series_net, calculate_results, select_time_steps
+
+class SurrogateNetModel:
+    """Reduced-order model of the network fitted from snapshots of the full thermohydraulic calculation.
+
+    The snapshots are calculated at representative load levels. For every pump and result the model fits a polynomial of the total
+    heat load and the supply temperature, the heat losses of the network are fitted the same way. The evaluation of a whole year is a
+    vectorized polynomial evaluation.
+
+    Args:
+        degree (int, optional): Degree of the polynomials. Defaults to 2.
+    """
+    def __init__(self, degree=2):
+        self.degree = degree
+        self.coefficients = {}
+        self.heat_loss_coefficients = None
+
+    def get_features(self, total_heat_kW, supply_temperature):
+        """Build the polynomial features of the heat load and the supply temperature.
+
+        Args:
+            total_heat_kW (array): Total heat load of the heat consumers in kW.
+            supply_temperature (array): Supply temperature in °C.
+
+        Returns:
+            np.ndarray: Feature matrix with one row per time step.
+        """
+        load = np.asarray(total_heat_kW, dtype=float) / self.load_scale
+        temperature = (np.asarray(supply_temperature, dtype=float) - self.temperature_offset) / self.temperature_scale
+        return np.column_stack([load**i * temperature**j for i in range(self.degree + 1) for j in range(self.degree + 1 - i)])
+
+    def fit(self, total_heat_kW, supply_temperature, pump_results):
+        """Fit the model to the results of the snapshot calculation.
+
+        Args:
+            total_heat_kW (array): Total heat load of the heat consumers of the snapshots in kW.
+            supply_temperature (array): Supply temperature of the snapshots in °C.
+            pump_results (dict): Results of the snapshots as returned by calculate_results.
+
+        Returns:
+            SurrogateNetModel: The fitted model.
+        """
+        total_heat_kW = np.asarray(total_heat_kW, dtype=float)
+        supply_temperature = np.asarray(supply_temperature, dtype=float)
+        self.load_scale = max(np.max(np.abs(total_heat_kW)), 1e-6)
+        self.temperature_offset = np.mean(supply_temperature)
+        self.temperature_scale = max(np.ptp(supply_temperature), 1.0)
+
+        features = self.get_features(total_heat_kW, supply_temperature)
+        self.coefficients = {pump_type: {idx: {result: np.linalg.lstsq(features, values, rcond=None)[0] for result, values in pump_data.items()}
+                                         for idx, pump_data in pumps.items()} for pump_type, pumps in pump_results.items()}
+
+        heat_loss_kW = np.sum([pump_data["qext_kW"] for pumps in pump_results.values() for pump_data in pumps.values()], axis=0) - total_heat_kW
+        self.heat_loss_coefficients = np.linalg.lstsq(features, heat_loss_kW, rcond=None)[0]
+
+        return self
+
+    def predict_heat_loss(self, total_heat_kW, supply_temperature):
+        """Evaluate the heat losses of the network.
+
+        Args:
+            total_heat_kW (array): Total heat load of the heat consumers in kW.
+            supply_temperature (array): Supply temperature in °C.
+
+        Returns:
+            np.ndarray: Heat losses of the network in kW.
+        """
+        return self.get_features(total_heat_kW, supply_temperature) @ self.heat_loss_coefficients
+
+    def predict(self, total_heat_kW, supply_temperature):
+        """Evaluate the model for all time steps.
+
+        The heat output of the main pump is calculated from the energy balance of the heat load, the heat losses and the heat output
+        of the other pumps.
+
+        Args:
+            total_heat_kW (array): Total heat load of the heat consumers in kW.
+            supply_temperature (array): Supply temperature in °C.
+
+        Returns:
+            dict: Results with the same structure as the results of calculate_results.
+        """
+        features = self.get_features(total_heat_kW, supply_temperature)
+        pump_results = {pump_type: {idx: {result: features @ coefficients for result, coefficients in pump_coefficients.items()}
+                                    for idx, pump_coefficients in pumps.items()} for pump_type, pumps in self.coefficients.items()}
+
+        main_pumps = pump_results.get("Heizentrale Haupteinspeisung", {})
+        if main_pumps:
+            secondary_heat_kW = np.sum([pump_data["qext_kW"] for pump_type, pumps in pump_results.items() if pump_type != "Heizentrale Haupteinspeisung"
+                                        for pump_data in pumps.values()] or [0], axis=0)
+            main_pump = main_pumps[next(iter(main_pumps))]
+            main_pump["qext_kW"] = np.asarray(total_heat_kW, dtype=float) + self.predict_heat_loss(total_heat_kW, supply_temperature) - secondary_heat_kW
+
+        return pump_results
+
+def surrogate_time_series_net(net, yearly_time_steps, qext_w_profiles, start, end, supply_temperature=85, supply_temperature_heat_consumer=75,
+                              return_temperature_heat_consumer=60, n_snapshots=12, degree=2):
+    """Run a fast time series calculation with a surrogate model fitted from snapshots of the full calculation.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        yearly_time_steps (array): Array of yearly time steps.
+        qext_w_profiles (list of arrays): List of external heat profiles.
+        start (int): Start index for the simulation.
+        end (int): End index for the simulation.
+        supply_temperature (float or array, optional): Supply temperature. Defaults to 85.
+        supply_temperature_heat_consumer (float or array, optional): Minimum supply temperature for heat consumers. Defaults to 75.
+        return_temperature_heat_consumer (float or array, optional): Return temperature for heat consumers. Defaults to 60.
+        n_snapshots (int, optional): Number of load levels calculated with the full model. Defaults to 12.
+        degree (int, optional): Degree of the polynomials of the surrogate model. Defaults to 2.
+
+    Returns:
+        tuple: Time steps, network after the snapshot calculation, and pump results with the structure of calculate_results.
+    """
+    qext_w_profiles = np.asarray(qext_w_profiles)
+    total_heat_kW = np.sum(qext_w_profiles, axis=0)[start:end] / 1000
+    if isinstance(supply_temperature, (list, np.ndarray)):
+        supply_temperature_curve = np.asarray(supply_temperature, dtype=float)[start:end]
+    else:
+        supply_temperature_curve = np.full(end - start, supply_temperature, dtype=float)
+
+    # Representative load levels, the snapshots are calculated in the order of increasing load
+    load_order = np.argsort(total_heat_kW, kind="stable")
+    snapshots = np.unique(load_order[np.round(np.linspace(0, len(load_order) - 1, min(n_snapshots, len(load_order)))).astype(int)])
+    snapshots = snapshots[np.argsort(total_heat_kW[snapshots], kind="stable")] + start
+
+    _, net, net_results = thermohydraulic_time_series_net(copy.deepcopy(net), np.asarray(yearly_time_steps)[snapshots], qext_w_profiles[:, snapshots], 0, len(snapshots),
+                                                          select_time_steps(supply_temperature, snapshots),
+                                                          select_time_steps(supply_temperature_heat_consumer, snapshots),
+                                                          select_time_steps(return_temperature_heat_consumer, snapshots))
+    snapshot_results = calculate_results(net, net_results)
+
+    model = SurrogateNetModel(degree=degree).fit(total_heat_kW[snapshots - start], supply_temperature_curve[snapshots - start], snapshot_results)
+    logging.info(f"Surrogate model fitted from {len(snapshots)} snapshots")
+
+    return yearly_time_steps[start:end], net, model.predict(total_heat_kW, supply_temperature_curve)
@@ -9,12 +9,12 @@ import time
 import logging
 import sys
 import os
+from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import LineString
-from scipy.interpolate import RegularGridInterpolator
 
 import pandapipes as pp
 from pandapipes.control.run_control import run_control
@@ -22,7 +22,9 @@ from pandapipes.control.run_control import run_control
 from pandapower.timeseries import DFData
 from pandapower.control.controller.const_control import ConstControl
 
-from net_simulation_pandapipes.controllers import ReturnTemperatureController, WorstPointPressureController
+from utilities.cop_service import get_COP_service
+
+from net_simulation_pandapipes.controllers import ReturnTemperatureController, VectorizedReturnTemperatureController, WorstPointPressureController, ProfileMatrixControl
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -45,42 +47,215 @@ def get_resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-def COP_WP(VLT_L, QT, values=np.genfromtxt(get_resource_path('data/COP/Kennlinien WP.csv'), delimiter=';')):
+def COP_WP(VLT_L, QT, values=None):
     """Calculate the Coefficient of Performance (COP) for a heat pump based on supply and source temperatures.
 
     Args:
-        VLT_L (array-like): Array of supply temperatures.
-        QT (float or array-like): Source temperature or array of source temperatures.
-        values (np.ndarray): COP values loaded from a CSV file. Defaults to loading from 'heat_generators\Kennlinien WP.csv'.
+        VLT_L (array-like): Array of supply temperatures, can be multidimensional, e.g. buildings x hours.
+        QT (float or array-like): Source temperature or array of source temperatures which can be broadcast to the shape of VLT_L.
+        values (np.ndarray, optional): COP values loaded from a CSV file. Defaults to the values of 'data/COP/Kennlinien WP.csv'.
 
     Returns:
         tuple: COP values and possibly adjusted supply temperatures.
     """
-    row_header = values[0, 1:]  # Supply temperatures
-    col_header = values[1:, 0]  # Source temperatures
-    values = values[1:, 1:]
-    f = RegularGridInterpolator((col_header, row_header), values, method='linear')
-
-    # Technical limit of the heat pump is a temperature range of 75 °C
-    VLT_L = np.minimum(VLT_L, 75 + QT)
-    VLT_L = np.maximum(VLT_L, 35)
-
-    # Check whether QT is a number or an array
-    if np.isscalar(QT):
-        # If QT is a number, we create an array with that number
-        QT_array = np.full_like(VLT_L, QT)
-    else:
-        # If QT is already an array, we check if it has the same length as VLT_L
-        if len(QT) != len(VLT_L):
-            raise ValueError("QT must either be a single number or an array with the same length as VLT_L.")
-        QT_array = QT
+    return get_COP_service(values).evaluate(VLT_L, QT, min_supply_temperature=35)
 
-    # Calculation of COP_L
-    COP_L = f(np.column_stack((QT_array, VLT_L)))
+class PipeflowSession:
+    """Solver session for the repeated pipeflow calculations of the diameter optimization.
 
-    return COP_L, VLT_L
+    The session warm-starts every calculation from the previous solution, allows hydraulic-only calculations while only velocities
+    are checked and caches the results keyed on the diameters of the network. Configurations which were already calculated are
+    restored from the cache instead of being solved again.
 
-def net_optimization(net, v_max_pipe, v_max_heat_exchanger, material_filter, insulation_filter):
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        warm_start (bool, optional): Use the previous solution as initial guess. Defaults to True.
+        cache_size (int, optional): Maximum number of cached results. Defaults to 256.
+    """
+    def __init__(self, net, warm_start=True, cache_size=256):
+        self.net = net
+        self.warm_start = warm_start
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """Reset the solve count, the cache hits and the cumulative solver time.
+        """
+        self.solve_count = 0
+        self.cache_hits = 0
+        self.solver_time = 0.0
+
+    def get_key(self, mode):
+        """Get the cache key of the current network configuration.
+
+        Args:
+            mode (str): Calculation mode of the pipeflow.
+
+        Returns:
+            tuple: Calculation mode and the diameters and pipe parameters of the network.
+        """
+        net = self.net
+        arrays = [net.pipe.diameter_m.values, net.pipe.k_mm.values, net.pipe.alpha_w_per_m2k.values]
+        for element in ["heat_consumer", "heat_exchanger", "flow_control"]:
+            if element in net and not net[element].empty:
+                arrays.append(net[element].diameter_m.values)
+        return mode, np.concatenate(arrays).astype(float).tobytes()
+
+    def pipeflow(self, mode="all"):
+        """Calculate the pipeflow or restore the results of an identical configuration from the cache.
+
+        Args:
+            mode (str, optional): Calculation mode, "hydraulics" skips the thermal calculation. Defaults to "all".
+        """
+        net = self.net
+        key = self.get_key(mode)
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            for table, results in self.cache[key].items():
+                net[table] = results.copy()
+            self.cache_hits += 1
+            return
+
+        # Use the previous solution as initial guess, the junction inputs are only changed during the calculation
+        initial_values = net.junction[["pn_bar", "tfluid_k"]].copy()
+        if self.warm_start and "res_junction" in net and len(net.res_junction) == len(net.junction):
+            net.junction["pn_bar"] = net.res_junction["p_bar"].fillna(net.junction["pn_bar"])
+            net.junction["tfluid_k"] = net.res_junction["t_k"].fillna(net.junction["tfluid_k"])
+
+        start_time = time.time()
+        try:
+            pp.pipeflow(net, mode=mode)
+        finally:
+            net.junction[["pn_bar", "tfluid_k"]] = initial_values
+        self.solver_time += time.time() - start_time
+        self.solve_count += 1
+
+        self.cache[key] = {table: net[table].copy() for table in net.keys() if table.startswith("res_") and isinstance(net[table], pd.DataFrame)}
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def log_statistics(self, name):
+        """Log the solve count and the cumulative solver time.
+
+        Args:
+            name (str): Name of the optimization run.
+        """
+        logging.info(f"{name}: {self.solve_count} pipeflow calculations, {self.cache_hits} cached results, {self.solver_time:.2f} seconds solver time")
+
+class PipeCatalog:
+    """Array-backed catalog of the pipe standard types of one material and insulation.
+
+    The catalog is sorted by the inner diameter and cached per material/insulation filter, so the standard types are only
+    filtered once. Nearest-type and next-larger/next-smaller queries work on arrays of pipes.
+
+    Args:
+        entries (tuple): Tuples of type name, inner diameter in mm, roughness in mm and heat transfer coefficient in W/m²K.
+    """
+    _cache = {}
+
+    def __init__(self, entries):
+        if not entries:
+            raise ValueError("Keine Rohrtypen für den gewählten Material- und Dämmungsfilter gefunden.")
+        entries = sorted(entries, key=lambda entry: entry[1])
+        self.type_names = np.array([entry[0] for entry in entries], dtype=object)
+        self.inner_diameter_m = np.array([entry[1] for entry in entries], dtype=float) / 1000
+        self.k_mm = np.array([entry[2] for entry in entries], dtype=float)
+        self.alpha_w_per_m2k = np.array([entry[3] for entry in entries], dtype=float)
+        self.type_positions = {name: position for position, name in enumerate(self.type_names)}
+
+    def __len__(self):
+        return len(self.type_names)
+
+    @classmethod
+    def from_net(cls, net, material_filter="KMR", insulation_filter="2v"):
+        """Get the cached catalog of the pipe standard types of the network.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+            material_filter (str): Material filter for the pipe types.
+            insulation_filter (str): Insulation filter for the pipe types.
+
+        Returns:
+            PipeCatalog: The catalog of the filtered pipe types.
+        """
+        entries = tuple((name, float(data['inner_diameter_mm']), float(data['RAU']), float(data['WDZAHL']))
+                        for name, data in net.std_types["pipe"].items()
+                        if data.get('material') == material_filter and data.get('insulation') == insulation_filter)
+        key = (material_filter, insulation_filter, entries)
+        if key not in cls._cache:
+            cls._cache[key] = cls(entries)
+        return cls._cache[key]
+
+    def positions(self, std_types):
+        """Get the catalog positions of standard types.
+
+        Args:
+            std_types (array-like): Names of the standard types.
+
+        Returns:
+            np.ndarray: Positions of the standard types in the catalog.
+        """
+        return np.array([self.type_positions[std_type] for std_type in std_types], dtype=int)
+
+    def nearest(self, diameter_m):
+        """Get the positions of the types with the inner diameter closest to the given diameters.
+
+        Args:
+            diameter_m (array-like): Diameters in m.
+
+        Returns:
+            np.ndarray: Positions of the closest types, ties are resolved to the smaller type.
+        """
+        diameter_m = np.asarray(diameter_m, dtype=float)
+        upper = np.clip(np.searchsorted(self.inner_diameter_m, diameter_m, side='left'), 0, len(self) - 1)
+        lower = np.maximum(upper - 1, 0)
+        closest = np.where(np.abs(self.inner_diameter_m[lower] - diameter_m) <= np.abs(self.inner_diameter_m[upper] - diameter_m), lower, upper)
+        return np.where(np.isnan(diameter_m), 0, closest)
+
+    def smallest_sufficient(self, diameter_m):
+        """Get the positions of the smallest types with an inner diameter of at least the given diameters.
+
+        Args:
+            diameter_m (array-like): Required diameters in m.
+
+        Returns:
+            np.ndarray: Positions of the types, limited to the largest type.
+        """
+        return np.clip(np.searchsorted(self.inner_diameter_m, np.asarray(diameter_m, dtype=float), side='left'), 0, len(self) - 1)
+
+    def next_larger(self, positions):
+        """Get the positions of the next larger types, limited to the largest type.
+        """
+        return np.minimum(np.asarray(positions) + 1, len(self) - 1)
+
+    def next_smaller(self, positions):
+        """Get the positions of the next smaller types, limited to the smallest type.
+        """
+        return np.maximum(np.asarray(positions) - 1, 0)
+
+    def assign(self, net, positions, pipe_indices=None):
+        """Assign the standard type, diameter, roughness and heat transfer coefficient to the pipes.
+
+        Args:
+            net (pandapipesNet): The pandapipes network.
+            positions (array-like): Catalog positions of the new types.
+            pipe_indices (array-like, optional): Indices of the pipes. Defaults to all pipes.
+        """
+        positions = np.asarray(positions, dtype=int)
+        if pipe_indices is None:
+            net.pipe['std_type'] = self.type_names[positions]
+            net.pipe['diameter_m'] = self.inner_diameter_m[positions]
+            net.pipe['k_mm'] = self.k_mm[positions]
+            net.pipe['alpha_w_per_m2k'] = self.alpha_w_per_m2k[positions]
+        else:
+            net.pipe.loc[pipe_indices, 'std_type'] = self.type_names[positions]
+            net.pipe.loc[pipe_indices, 'diameter_m'] = self.inner_diameter_m[positions]
+            net.pipe.loc[pipe_indices, 'k_mm'] = self.k_mm[positions]
+            net.pipe.loc[pipe_indices, 'alpha_w_per_m2k'] = self.alpha_w_per_m2k[positions]
+
+def net_optimization(net, v_max_pipe, v_max_heat_exchanger, material_filter, insulation_filter, strategy="sequential"):
     """Optimize the network by adjusting diameters and materials to meet specified velocity constraints.
 
     Args:
@@ -89,14 +264,23 @@ def net_optimization(net, v_max_pipe, v_max_heat_exchanger, material_filter, ins
         v_max_heat_exchanger (float): Maximum allowed velocity in heat exchangers.
         material_filter (str): Material filter for pipe optimization.
         insulation_filter (str): Insulation filter for pipe optimization.
+        strategy (str, optional): Optimization strategy for the pipe types, "sequential" changes one pipe per pipeflow calculation,
+            "batch" resizes all pipes per iteration. Defaults to "sequential".
 
     Returns:
         pandapipesNet: The optimized pandapipes network.
     """
     run_control(net, mode="all")
 
-    net = optimize_diameter_types(net, v_max=v_max_pipe, material_filter=material_filter, insulation_filter=insulation_filter)
-    net = optimize_diameter_parameters(net, element="heat_consumer", v_max=v_max_heat_exchanger)
+    session = PipeflowSession(net)
+    if strategy == "sequential":
+        net = optimize_diameter_types(net, v_max=v_max_pipe, material_filter=material_filter, insulation_filter=insulation_filter, session=session)
+    elif strategy == "batch":
+        net = optimize_diameter_types_batch(net, v_max=v_max_pipe, material_filter=material_filter, insulation_filter=insulation_filter, session=session)
+    else:
+        raise ValueError(f"Unbekannte Optimierungsstrategie: {strategy}")
+    logging.info(f"Pipe optimization strategy '{strategy}' used {session.solve_count} pipeflow calculations")
+    net = optimize_diameter_parameters(net, element="heat_consumer", v_max=v_max_heat_exchanger, session=session)
 
     # Recalculate maximum and minimum mass flows in the controller
     net = recalculate_all_mass_flow_limits(net)
@@ -105,7 +289,7 @@ def net_optimization(net, v_max_pipe, v_max_heat_exchanger, material_filter, ins
 
     return net
 
-def create_controllers(net, qext_w, return_temperature_heat_consumer, supply_temperature_heat_consumer):
+def create_controllers(net, qext_w, return_temperature_heat_consumer, supply_temperature_heat_consumer, vectorized_controllers=False):
     """Create controllers for the network to manage heat consumers.
 
     Args:
@@ -113,6 +297,8 @@ def create_controllers(net, qext_w, return_temperature_heat_consumer, supply_tem
         qext_w (array-like): External heat values for heat consumers.
         return_temperature_heat_consumer (array-like): Target return temperatures for heat consumers.
         supply_temperature_heat_consumer (array-like): Minimum supply temperatures for heat consumers.
+        vectorized_controllers (bool, optional): Use one ProfileMatrixControl and one VectorizedReturnTemperatureController for all heat consumers 
+            instead of one ConstControl and one ReturnTemperatureController per heat consumer. Defaults to False.
 
     Returns:
         pandapipesNet: The pandapipes network with controllers added.
@@ -120,18 +306,26 @@ def create_controllers(net, qext_w, return_temperature_heat_consumer, supply_tem
     if len(qext_w) != len(return_temperature_heat_consumer):
         raise ValueError("The lengths of qext_w and return_temperature_heat_consumer must be the same.")
 
-    # Creates controllers for the network
-    for i in range(len(net.heat_consumer)):
-        # Create a simple DFData object for qext_w with the specific value for this pass
-        placeholder_df = pd.DataFrame({f'qext_w_{i}': [qext_w[i]]})
-        placeholder_data_source = DFData(placeholder_df)
+    if vectorized_controllers:
+        # One profile row with the specific values for this pass
+        ProfileMatrixControl(net, element='heat_consumer', profiles={'qext_w': np.atleast_2d(qext_w)})
 
-        ConstControl(net, element='heat_consumer', variable='qext_w', element_index=i, data_source=placeholder_data_source, profile_name=f'qext_w_{i}')
-        
-        # Adjustment for using return_temperature as an array
-        T_controller = ReturnTemperatureController(net, heat_consumer_idx=i, target_return_temperature=return_temperature_heat_consumer[i], min_supply_temperature=supply_temperature_heat_consumer[i])
+        T_controller = VectorizedReturnTemperatureController(net, target_return_temperature=return_temperature_heat_consumer, min_supply_temperature=supply_temperature_heat_consumer)
         net.controller.loc[len(net.controller)] = [T_controller, True, -1, -1, False, False]
 
+    else:
+        # Creates controllers for the network
+        for i in range(len(net.heat_consumer)):
+            # Create a simple DFData object for qext_w with the specific value for this pass
+            placeholder_df = pd.DataFrame({f'qext_w_{i}': [qext_w[i]]})
+            placeholder_data_source = DFData(placeholder_df)
+
+            ConstControl(net, element='heat_consumer', variable='qext_w', element_index=i, data_source=placeholder_data_source, profile_name=f'qext_w_{i}')
+            
+            # Adjustment for using return_temperature as an array
+            T_controller = ReturnTemperatureController(net, heat_consumer_idx=i, target_return_temperature=return_temperature_heat_consumer[i], min_supply_temperature=supply_temperature_heat_consumer[i])
+            net.controller.loc[len(net.controller)] = [T_controller, True, -1, -1, False, False]
+
     dp_min, idx_dp_min = calculate_worst_point(net)  # This function must be defined
     dp_controller = WorstPointPressureController(net, idx_dp_min)  # This class must be defined
     net.controller.loc[len(net.controller)] = [dp_controller, True, -1, -1, False, False]
@@ -148,7 +342,7 @@ def recalculate_all_mass_flow_limits(net):
         pandapipesNet: The pandapipes network with recalculated mass flow limits.
     """
     for idx, controller in net.controller.iterrows():
-        if isinstance(controller['object'], ReturnTemperatureController):
+        if isinstance(controller['object'], (ReturnTemperatureController, VectorizedReturnTemperatureController)):
             controller['object'].calculate_mass_flow_limits(net)
 
     return net
@@ -180,7 +374,7 @@ def correct_flow_directions(net):
 
     return net
 
-def optimize_diameter_parameters(net, element="pipe", v_max=2, dx=0.001):
+def optimize_diameter_parameters(net, element="pipe", v_max=2, dx=0.001, session=None):
     """Optimize the diameters of the network elements to meet the specified maximum velocity.
 
     Args:
@@ -188,12 +382,17 @@ def optimize_diameter_parameters(net, element="pipe", v_max=2, dx=0.001):
         element (str): The element type to optimize (default is "pipe").
         v_max (float): Maximum allowed velocity in the elements (default is 2 m/s).
         dx (float): Step size for diameter adjustments (default is 0.001 m).
+        session (PipeflowSession, optional): Solver session for the pipeflow calculations. Defaults to a new session.
 
     Returns:
         pandapipesNet: The optimized pandapipes network.
     """
+    if session is None:
+        session = PipeflowSession(net)
+    session.reset_statistics()
+
     v_max /= 1.5
-    pp.pipeflow(net, mode="all")
+    session.pipeflow(mode="all")
     element_df = getattr(net, element)  # Access the element's DataFrame
     res_df = getattr(net, f"res_{element}")  # Access the result DataFrame
             
@@ -213,7 +412,8 @@ def optimize_diameter_parameters(net, element="pipe", v_max=2, dx=0.001):
            # Shrink as long as speed < v_max and check
             elif current_velocity < v_max:
                 element_df.at[idx, 'diameter_m'] -= dx
-                pp.pipeflow(net, mode="all")
+                # Only the velocity is checked, so the thermal calculation is skipped
+                session.pipeflow(mode="hydraulics")
                 element_df = getattr(net, element)  # Access the element's DataFrame
                 res_df = getattr(net, f"res_{element}")  # Access the result DataFrame
                 new_velocity = res_df.v_mean_m_per_s[idx]
@@ -225,10 +425,13 @@ def optimize_diameter_parameters(net, element="pipe", v_max=2, dx=0.001):
                     change_made = True
         
         if change_made:
-            pp.pipeflow(net, mode="all")  # Recalculation only if changes were made
+            session.pipeflow(mode="hydraulics")  # Recalculation only if changes were made
             element_df = getattr(net, element)
             res_df = getattr(net, f"res_{element}")
 
+    session.pipeflow(mode="all")
+    session.log_statistics(f"Diameter optimization {element}")
+
     return net
 
 def init_diameter_types(net, v_max_pipe=1.0, material_filter="KMR", insulation_filter="2v"):
@@ -247,30 +450,18 @@ def init_diameter_types(net, v_max_pipe=1.0, material_filter="KMR", insulation_f
     pp.pipeflow(net, mode="all")
     logging.info(f"Initial pipeflow calculation took {time.time() - start_time_total:.2f} seconds")
 
-    pipe_std_types = pp.std_types.available_std_types(net, "pipe")
-    filtered_by_material = pipe_std_types[pipe_std_types['material'] == material_filter]
-    filtered_by_material_and_insulation = filtered_by_material[filtered_by_material['insulation'] == insulation_filter]
-
-    type_position_dict = {type_name: i for i, type_name in enumerate(filtered_by_material_and_insulation.index)}
+    catalog = PipeCatalog.from_net(net, material_filter, insulation_filter)
 
-    # Initial diameter adjustment
-    for pipe_idx, velocity in enumerate(net.res_pipe.v_mean_m_per_s):
-        current_diameter = net.pipe.at[pipe_idx, 'diameter_m']
-        required_diameter = current_diameter * (velocity / v_max_pipe)**0.5
-        # Find the closest available standard type
-        closest_type = min(filtered_by_material_and_insulation.index, key=lambda x: abs(filtered_by_material_and_insulation.loc[x, 'inner_diameter_mm'] / 1000 - required_diameter))
-        net.pipe.std_type.at[pipe_idx] = closest_type
-        properties = filtered_by_material_and_insulation.loc[closest_type]
-        net.pipe.at[pipe_idx, 'diameter_m'] = properties['inner_diameter_mm'] / 1000
-        net.pipe.at[pipe_idx, 'k_mm'] = properties['RAU']
-        net.pipe.at[pipe_idx, 'alpha_w_per_m2k'] = properties['WDZAHL']
+    # Initial diameter adjustment to the closest available standard types
+    required_diameter = net.pipe.diameter_m.values * (net.res_pipe.v_mean_m_per_s.values / v_max_pipe)**0.5
+    catalog.assign(net, catalog.nearest(required_diameter))
 
     pp.pipeflow(net, mode="all")
     logging.info(f"Post-initial diameter adjustment pipeflow calculation took {time.time() - start_time_total:.2f} seconds")
 
     return net
 
-def optimize_diameter_types(net, v_max=1.0, material_filter="KMR", insulation_filter="2v"):
+def optimize_diameter_types(net, v_max=1.0, material_filter="KMR", insulation_filter="2v", session=None):
     """Optimize the diameters and types of pipes in the network based on the specified velocity and filters.
 
     Args:
@@ -278,37 +469,31 @@ def optimize_diameter_types(net, v_max=1.0, material_filter="KMR", insulation_fi
         v_max (float): Maximum allowed velocity in pipes.
         material_filter (str): Material filter for pipe optimization.
         insulation_filter (str): Insulation filter for pipe optimization.
+        session (PipeflowSession, optional): Solver session for the pipeflow calculations. Defaults to a new session.
 
     Returns:
         pandapipesNet: The optimized pandapipes network.
     """
+    if session is None:
+        session = PipeflowSession(net)
+    session.reset_statistics()
+
     start_time_total = time.time()
-    pp.pipeflow(net, mode="all")
+    session.pipeflow(mode="all")
     logging.info(f"Initial pipeflow calculation took {time.time() - start_time_total:.2f} seconds")
 
-    pipe_std_types = pp.std_types.available_std_types(net, "pipe")
-    filtered_by_material = pipe_std_types[pipe_std_types['material'] == material_filter]
-    filtered_by_material_and_insulation = filtered_by_material[filtered_by_material['insulation'] == insulation_filter]
-
-    type_position_dict = {type_name: i for i, type_name in enumerate(filtered_by_material_and_insulation.index)}
+    catalog = PipeCatalog.from_net(net, material_filter, insulation_filter)
 
-    # Initial diameter adjustment
-    for pipe_idx, velocity in enumerate(net.res_pipe.v_mean_m_per_s):
-        current_diameter = net.pipe.at[pipe_idx, 'diameter_m']
-        required_diameter = current_diameter * (velocity / v_max)**0.5
-        # Find the closest available standard type
-        closest_type = min(filtered_by_material_and_insulation.index, key=lambda x: abs(filtered_by_material_and_insulation.loc[x, 'inner_diameter_mm'] / 1000 - required_diameter))
-        net.pipe.std_type.at[pipe_idx] = closest_type
-        properties = filtered_by_material_and_insulation.loc[closest_type]
-        net.pipe.at[pipe_idx, 'diameter_m'] = properties['inner_diameter_mm'] / 1000
-        net.pipe.at[pipe_idx, 'k_mm'] = properties['RAU']
-        net.pipe.at[pipe_idx, 'alpha_w_per_m2k'] = properties['WDZAHL']
+    # Initial diameter adjustment to the closest available standard types
+    required_diameter = net.pipe.diameter_m.values * (net.res_pipe.v_mean_m_per_s.values / v_max)**0.5
+    catalog.assign(net, catalog.nearest(required_diameter))
 
-    pp.pipeflow(net, mode="all")
+    session.pipeflow(mode="hydraulics")
     logging.info(f"Post-initial diameter adjustment pipeflow calculation took {time.time() - start_time_total:.2f} seconds")
 
     # Add a column to track if a pipe is optimized
     net.pipe['optimized'] = False
+    positions = catalog.positions(net.pipe.std_type.values)
 
     change_made = True
     iteration_count = 0
@@ -326,38 +511,27 @@ def optimize_diameter_types(net, v_max=1.0, material_filter="KMR", insulation_fi
                 pipes_within_target += 1
                 continue
 
-            current_type = net.pipe.std_type.at[pipe_idx]
-            current_type_position = type_position_dict[current_type]
+            current_type_position = positions[pipe_idx]
 
-            if velocity > v_max and current_type_position < len(filtered_by_material_and_insulation) - 1:
-                new_type = filtered_by_material_and_insulation.index[current_type_position + 1]
-                net.pipe.std_type.at[pipe_idx] = new_type
-                properties = filtered_by_material_and_insulation.loc[new_type]
-                net.pipe.at[pipe_idx, 'diameter_m'] = properties['inner_diameter_mm'] / 1000
-                net.pipe.at[pipe_idx, 'k_mm'] = properties['RAU']
-                net.pipe.at[pipe_idx, 'alpha_w_per_m2k'] = properties['WDZAHL']
+            if velocity > v_max and current_type_position < len(catalog) - 1:
+                positions[pipe_idx] = catalog.next_larger(current_type_position)
+                catalog.assign(net, positions[pipe_idx], pipe_idx)
                 change_made = True
                 pipes_outside_target += 1
 
             elif velocity <= v_max and current_type_position > 0:
-                new_type = filtered_by_material_and_insulation.index[current_type_position - 1]
-                net.pipe.std_type.at[pipe_idx] = new_type
-                properties = filtered_by_material_and_insulation.loc[new_type]
-                net.pipe.at[pipe_idx, 'diameter_m'] = properties['inner_diameter_mm'] / 1000
-                net.pipe.at[pipe_idx, 'k_mm'] = properties['RAU']
-                net.pipe.at[pipe_idx, 'alpha_w_per_m2k'] = properties['WDZAHL']
-
-                pp.pipeflow(net, mode="all")
+                positions[pipe_idx] = catalog.next_smaller(current_type_position)
+                catalog.assign(net, positions[pipe_idx], pipe_idx)
+
+                # Only the velocity is checked, so the thermal calculation is skipped
+                session.pipeflow(mode="hydraulics")
                 new_velocity = net.res_pipe.v_mean_m_per_s[pipe_idx]
 
                 if new_velocity <= v_max:
                     change_made = True
                 else:
-                    net.pipe.std_type.at[pipe_idx] = current_type
-                    properties = filtered_by_material_and_insulation.loc[current_type]
-                    net.pipe.at[pipe_idx, 'diameter_m'] = properties['inner_diameter_mm'] / 1000
-                    net.pipe.at[pipe_idx, 'k_mm'] = properties['RAU']
-                    net.pipe.at[pipe_idx, 'alpha_w_per_m2k'] = properties['WDZAHL']
+                    positions[pipe_idx] = current_type_position
+                    catalog.assign(net, current_type_position, pipe_idx)
                     
                     net.pipe.at[pipe_idx, 'optimized'] = True
                     pipes_within_target += 1
@@ -368,11 +542,83 @@ def optimize_diameter_types(net, v_max=1.0, material_filter="KMR", insulation_fi
         iteration_count += 1
         if change_made:
             iteration_pipeflow_start = time.time()
-            pp.pipeflow(net, mode="all")
+            session.pipeflow(mode="hydraulics")
         
         logging.info(f"Iteration {iteration_count}: {pipes_within_target} pipes within target velocity, {pipes_outside_target} pipes outside target velocity")
         logging.info(f"Iteration {iteration_count} took {time.time() - iteration_start_time:.2f} seconds")
 
+    session.pipeflow(mode="all")
+    session.log_statistics("Diameter optimization pipes (sequential)")
+    logging.info(f"Total optimization time: {time.time() - start_time_total:.2f} seconds")
+    return net
+
+def optimize_diameter_types_batch(net, v_max=1.0, material_filter="KMR", insulation_filter="2v", session=None, damping=0.5, max_iterations=50):
+    """Optimize the pipe types by resizing all pipes at once in every iteration.
+
+    The required diameter of every pipe is derived from its current velocity and the smallest standard type which is large enough
+    is selected with a vectorized search over the sorted inner diameters. The network is recalculated after each iteration until
+    no pipe type changes, so the number of pipeflow calculations depends on the depth of the network instead of the number of pipes.
+
+    Args:
+        net (pandapipesNet): The pandapipes network.
+        v_max (float): Maximum allowed velocity in pipes.
+        material_filter (str): Material filter for pipe optimization.
+        insulation_filter (str): Insulation filter for pipe optimization.
+        session (PipeflowSession, optional): Solver session for the pipeflow calculations. Defaults to a new session.
+        damping (float, optional): Fraction of the type step applied per iteration, at least one type is changed. Defaults to 0.5.
+        max_iterations (int, optional): Maximum number of iterations. Defaults to 50.
+
+    Returns:
+        pandapipesNet: The optimized pandapipes network.
+    """
+    if session is None:
+        session = PipeflowSession(net)
+    session.reset_statistics()
+
+    start_time_total = time.time()
+
+    catalog = PipeCatalog.from_net(net, material_filter, insulation_filter)
+
+    # Start from the smallest sufficient standard type of the current diameters
+    positions = catalog.smallest_sufficient(net.pipe.diameter_m.values)
+    catalog.assign(net, positions)
+    visited = set()
+
+    for iteration_count in range(1, max_iterations + 1):
+        session.pipeflow(mode="hydraulics")
+
+        # Required diameter for the current volume flow at the maximum velocity
+        velocity = np.abs(net.res_pipe.v_mean_m_per_s.values)
+        required_diameter = net.pipe.diameter_m.values * np.sqrt(velocity / v_max)
+        target_positions = catalog.smallest_sufficient(required_diameter)
+
+        # Damped step towards the target, changed pipes move at least one type
+        step = target_positions - positions
+        damped_step = np.sign(step) * np.maximum(np.round(np.abs(step) * damping), 1).astype(int)
+        new_positions = np.where(step != 0, positions + damped_step, positions)
+
+        pipes_outside_target = int(np.sum(velocity > v_max))
+        logging.info(f"Iteration {iteration_count}: {len(positions) - pipes_outside_target} pipes within target velocity, {pipes_outside_target} pipes outside target velocity, {int(np.sum(step != 0))} pipe types changed")
+
+        if np.array_equal(new_positions, positions):
+            break
+
+        # Meshed networks may oscillate between configurations, keep the larger types in this case
+        key = new_positions.tobytes()
+        if key in visited:
+            new_positions = np.maximum(new_positions, positions)
+            catalog.assign(net, new_positions)
+            session.pipeflow(mode="hydraulics")
+            break
+        visited.add(positions.tobytes())
+
+        positions = new_positions
+        catalog.assign(net, positions)
+    else:
+        logging.warning(f"Batch diameter optimization did not converge within {max_iterations} iterations")
+
+    session.pipeflow(mode="all")
+    session.log_statistics("Diameter optimization pipes (batch)")
     logging.info(f"Total optimization time: {time.time() - start_time_total:.2f} seconds")
     return net
 
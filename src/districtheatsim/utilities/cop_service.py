@@ -0,0 +1,203 @@
+"""
+Filename: cop_service.py
+Author: Dipl.-Ing. (FH) Jonas Pfeiffer
+Date: 2024-08-05
+Description: Shared COP calculation for the heat pumps of the heat generators and the network simulation.
+"""
+
+import os
+import sys
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+def get_resource_path(relative_path):
+    """Get the absolute path to the resource, works for dev and for PyInstaller.
+
+    Args:
+        relative_path (str): The relative path to the resource.
+
+    Returns:
+        str: The absolute path to the resource.
+    """
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    return os.path.join(base_path, relative_path)
+
+DEFAULT_COP_FILE = get_resource_path('data/COP/Kennlinien WP.csv')
+
+@lru_cache(maxsize=None)
+def load_COP_file(filename):
+    """Load the COP characteristic field of a heat pump from a CSV file, every file is only read once.
+
+    Args:
+        filename (str): Path to the COP data file.
+
+    Returns:
+        np.ndarray: Read-only COP values with the supply temperatures in the first row and the source temperatures in the first column.
+    """
+    values = np.genfromtxt(filename, delimiter=';')
+    values.setflags(write=False)
+    return values
+
+class COPInterpolator:
+    """Bilinear interpolation of a COP characteristic field over source and supply temperature.
+
+    The result equals a linear RegularGridInterpolator, but source and supply temperatures are broadcast against each other instead
+    of being stacked to points. If the source temperature is constant along the last axis, e.g. one source temperature per building
+    combined with the hourly supply temperatures, the COP curve of every row is interpolated once and evaluated with np.interp.
+
+    Args:
+        values (np.ndarray): COP values with the supply temperatures in the first row and the source temperatures in the first column.
+    """
+    def __init__(self, values):
+        self.source_temperatures = values[1:, 0]
+        self.supply_temperatures = values[0, 1:]
+        self.cop = values[1:, 1:]
+
+    @staticmethod
+    def get_segments(grid, temperatures, dimension):
+        """Get the grid segments and the relative positions within the segments.
+
+        Args:
+            grid (np.ndarray): Ascending grid temperatures.
+            temperatures (np.ndarray): Requested temperatures.
+            dimension (int): Dimension of the grid for the error message.
+
+        Returns:
+            tuple: Segment indices and relative positions.
+        """
+        if np.any(temperatures < grid[0]) or np.any(temperatures > grid[-1]):
+            raise ValueError(f"One of the requested xi is out of bounds in dimension {dimension}")
+        index = np.clip(np.searchsorted(grid, temperatures, side='right') - 1, 0, len(grid) - 2)
+        return index, (temperatures - grid[index]) / (grid[index + 1] - grid[index])
+
+    def __call__(self, source_temperature, supply_temperature):
+        """Evaluate the COP.
+
+        Args:
+            source_temperature (float or array-like): Source temperatures.
+            supply_temperature (float or array-like): Supply temperatures, broadcastable with the source temperatures.
+
+        Returns:
+            np.ndarray: COP values in the broadcast shape of the temperatures.
+        """
+        source_temperature = np.asarray(source_temperature, dtype=float)
+        supply_temperature = np.asarray(supply_temperature, dtype=float)
+        shape = np.broadcast_shapes(source_temperature.shape, supply_temperature.shape)
+        if 0 in shape:
+            return np.zeros(shape)
+
+        i, weight_source = self.get_segments(self.source_temperatures, source_temperature, 0)
+
+        if len(shape) > 0 and (source_temperature.ndim == 0 or source_temperature.shape[-1] == 1):
+            if np.any(supply_temperature < self.supply_temperatures[0]) or np.any(supply_temperature > self.supply_temperatures[-1]):
+                raise ValueError("One of the requested xi is out of bounds in dimension 1")
+            # COP curve over the supply temperature for every row
+            curves = self.cop[i] + (self.cop[i + 1] - self.cop[i]) * weight_source[..., np.newaxis]
+            if source_temperature.ndim > 0:
+                curves = curves[..., 0, :]
+            curves = np.broadcast_to(curves, shape[:-1] + (len(self.supply_temperatures),)).reshape(-1, len(self.supply_temperatures))
+            rows = np.broadcast_to(supply_temperature, shape).reshape(-1, shape[-1])
+            return np.array([np.interp(row, self.supply_temperatures, curve) for row, curve in zip(rows, curves)]).reshape(shape)
+
+        j, weight_supply = self.get_segments(self.supply_temperatures, supply_temperature, 1)
+        cop_lower = self.cop[i, j] + (self.cop[i + 1, j] - self.cop[i, j]) * weight_source
+        cop_upper = self.cop[i, j + 1] + (self.cop[i + 1, j + 1] - self.cop[i, j + 1]) * weight_source
+        return cop_lower + (cop_upper - cop_lower) * weight_supply
+
+class COPService:
+    """COP evaluation of one characteristic field with memoized results.
+
+    The interpolator is built once per field. Results are cached per source temperature and hash of the supply temperature profile,
+    so repeated evaluations with the same profiles, e.g. in every objective evaluation of the mix optimization, are not interpolated
+    again.
+
+    Args:
+        values (np.ndarray): COP values with the supply temperatures in the first row and the source temperatures in the first column.
+        cache_size (int, optional): Maximum number of cached results. Defaults to 128.
+    """
+    def __init__(self, values, cache_size=128):
+        self.interpolator = COPInterpolator(values)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    @staticmethod
+    def get_key(supply_temperature, source_temperature, min_supply_temperature):
+        """Get the cache key of an evaluation.
+
+        Args:
+            supply_temperature (np.ndarray): Supply temperatures.
+            source_temperature (np.ndarray): Source temperatures.
+            min_supply_temperature (float or None): Lower limit of the supply temperatures.
+
+        Returns:
+            tuple: Shapes, profile hash and lower limit.
+        """
+        profile_hash = hashlib.blake2b(supply_temperature.tobytes(), digest_size=16)
+        profile_hash.update(source_temperature.tobytes())
+        return supply_temperature.shape, source_temperature.shape, profile_hash.digest(), min_supply_temperature
+
+    def evaluate(self, supply_temperature, source_temperature, min_supply_temperature=None):
+        """Calculate the COP and the supply temperatures within the technical limits of the heat pump.
+
+        Args:
+            supply_temperature (array-like): Supply temperatures of any shape, e.g. hours or buildings x hours.
+            source_temperature (float or array-like): Source temperatures, broadcastable with the supply temperatures.
+            min_supply_temperature (float, optional): Lower limit of the supply temperatures. Defaults to None.
+
+        Returns:
+            tuple: COP values and the limited supply temperatures.
+        """
+        supply_temperature = np.asarray(supply_temperature, dtype=float)
+        source_temperature = np.asarray(source_temperature, dtype=float)
+        key = self.get_key(supply_temperature, source_temperature, min_supply_temperature)
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            COP, supply_temperature = self.cache[key]
+            return COP.copy(), supply_temperature.copy()
+
+        # Technical limit of the heat pump is a temperature range of 75 °C
+        supply_temperature = np.minimum(supply_temperature, 75 + source_temperature)
+        if min_supply_temperature is not None:
+            supply_temperature = np.maximum(supply_temperature, min_supply_temperature)
+
+        try:
+            np.broadcast_shapes(source_temperature.shape, supply_temperature.shape)
+        except ValueError:
+            raise ValueError("QT must either be a single number or an array with the same length as VLT_L.")
+
+        COP = np.atleast_1d(self.interpolator(source_temperature, supply_temperature))
+
+        self.cache[key] = (COP.copy(), supply_temperature.copy())
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return COP, supply_temperature
+
+_COP_services = {}
+
+def get_COP_service(values=None):
+    """Get the shared COP service of a characteristic field, the service is created once per field.
+
+    Args:
+        values (np.ndarray or str, optional): COP values or path of a COP data file. Defaults to the COP data file of the program.
+
+    Returns:
+        COPService: The COP service of the characteristic field.
+    """
+    if values is None:
+        values = DEFAULT_COP_FILE
+    if isinstance(values, str):
+        values = load_COP_file(values)
+    values = np.asarray(values, dtype=float)
+    key = (values.shape, values.tobytes())
+    if key not in _COP_services:
+        _COP_services[key] = COPService(values)
+    return _COP_services[key]
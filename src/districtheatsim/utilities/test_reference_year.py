@@ -2,7 +2,7 @@
 Filename: test_reference_year.py
 Author: Dipl.-Ing. (FH) Jonas Pfeiffer
 Date: 2024-07-31
-Description: Import function for the Test Reference Year files.
+Description: Cached import of the Test Reference Year files.
 
 """
 
@@ -10,8 +10,151 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
 import pandas as pd
 
+# Spaltenbreiten und Spaltennamen der TRY-Dateien
+TRY_COLUMN_WIDTHS = [8, 8, 3, 3, 3, 6, 5, 4, 5, 2, 5, 4, 5, 5, 4, 5, 3]
+TRY_COLUMN_NAMES = ["RW", "HW", "MM", "DD", "HH", "t", "p", "WR", "WG", "N", "x", "RF", "B", "D", "A", "E", "IL"]
+
+class TRYData(NamedTuple):
+    """Columns of a TRY file as read-only arrays, the parameters are described at the end of this module.
+
+    G is the global radiation, the sum of the direct and the diffuse radiation.
+    """
+    RW: np.ndarray
+    HW: np.ndarray
+    MM: np.ndarray
+    DD: np.ndarray
+    HH: np.ndarray
+    t: np.ndarray
+    p: np.ndarray
+    WR: np.ndarray
+    WG: np.ndarray
+    N: np.ndarray
+    x: np.ndarray
+    RF: np.ndarray
+    B: np.ndarray
+    D: np.ndarray
+    A: np.ndarray
+    E: np.ndarray
+    IL: np.ndarray
+    G: np.ndarray
+
+def get_sidecar_path(filename):
+    """Get the path of the binary copy of a TRY file, it is stored next to the TRY file.
+
+    Args:
+        filename (str): TRY filename
+
+    Returns:
+        str: Path of the .npz file.
+    """
+    return os.path.splitext(filename)[0] + ".npz"
+
+def parse_TRY(filename):
+    """Parse the fixed-width columns of a TRY file.
+
+    Args:
+        filename (str): TRY filename
+
+    Returns:
+        dict: Arrays of all columns by column name.
+    """
+    data = pd.read_fwf(filename, widths=TRY_COLUMN_WIDTHS, names=TRY_COLUMN_NAMES, skiprows=34)
+    return {name: data[name].values for name in TRY_COLUMN_NAMES}
+
+def read_sidecar(filename, modified, size):
+    """Read the columns from the binary copy of a TRY file if it was created from the current version of the file.
+
+    Args:
+        filename (str): TRY filename
+        modified (int): Modification time of the TRY file in nanoseconds.
+        size (int): Size of the TRY file in bytes.
+
+    Returns:
+        dict: Arrays of all columns by column name, None if there is no valid binary copy.
+    """
+    try:
+        with np.load(get_sidecar_path(filename)) as sidecar:
+            if int(sidecar["source_modified"]) != modified or int(sidecar["source_size"]) != size:
+                return None
+            return {name: sidecar[name] for name in TRY_COLUMN_NAMES}
+    except (OSError, KeyError, ValueError):
+        return None
+
+def write_sidecar(filename, columns, modified, size):
+    """Save the columns as binary copy next to the TRY file.
+
+    Nothing is saved if the directory is not writable or if columns could not be parsed as numbers.
+
+    Args:
+        filename (str): TRY filename
+        columns (dict): Arrays of all columns by column name.
+        modified (int): Modification time of the TRY file in nanoseconds.
+        size (int): Size of the TRY file in bytes.
+    """
+    if any(values.dtype == object for values in columns.values()):
+        return
+
+    sidecar_path = get_sidecar_path(filename)
+    temporary_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        # Die Datei wird erst nach dem vollständigen Schreiben umbenannt, damit andere Prozesse keine unvollständige Datei lesen
+        with open(temporary_path, "wb") as file:
+            np.savez(file, source_modified=modified, source_size=size, **columns)
+        os.replace(temporary_path, sidecar_path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+@lru_cache(maxsize=16)
+def load_TRY_file(filename, modified, size, use_sidecar=True):
+    """Load a TRY file, the modification time and the size are part of the cache key so changed files are read again.
+
+    Args:
+        filename (str): Absolute TRY filename
+        modified (int): Modification time of the TRY file in nanoseconds.
+        size (int): Size of the TRY file in bytes.
+        use_sidecar (bool, optional): Read and write the binary copy of the TRY file. Defaults to True.
+
+    Returns:
+        TRYData: Columns of the TRY file.
+    """
+    columns = read_sidecar(filename, modified, size) if use_sidecar else None
+    if columns is None:
+        columns = parse_TRY(filename)
+        if use_sidecar:
+            write_sidecar(filename, columns, modified, size)
+
+    if columns["B"].dtype != object and columns["D"].dtype != object:
+        columns["G"] = columns["B"] + columns["D"]
+    else:
+        columns["G"] = np.full(len(columns["B"]), np.nan)
+    for values in columns.values():
+        values.setflags(write=False)
+    return TRYData(**columns)
+
+def load_TRY(filename, use_sidecar=True):
+    """Load the columns of a TRY file, every file is parsed only once per process.
+
+    The parsed columns are also saved as binary copy (.npz) next to the TRY file, so later sessions do not parse the fixed-width file
+    again.
+
+    Args:
+        filename (str): TRY filename
+        use_sidecar (bool, optional): Read and write the binary copy of the TRY file. Defaults to True.
+
+    Returns:
+        TRYData: Read-only columns of the TRY file.
+    """
+    filename = os.path.abspath(filename)
+    stat = os.stat(filename)
+    return load_TRY_file(filename, stat.st_mtime_ns, stat.st_size, use_sidecar)
+
 def import_TRY(filename):
     """Reads the TRY file content of the given filename
 
@@ -25,23 +168,8 @@ def import_TRY(filename):
             - direct_radiation (np.ndarray): Array of direct radiation values.
             - global_radition (np.ndarray): Array of global radiation values.
     """
-    # Import TRY
-    # Spaltenbreiten definieren
-    col_widths = [8, 8, 3, 3, 3, 6, 5, 4, 5, 2, 5, 4, 5, 5, 4, 5, 3]
-    # Spaltennamen definieren
-    col_names = ["RW", "HW", "MM", "DD", "HH", "t", "p", "WR", "WG", "N", "x", "RF", "B", "D", "A", "E", "IL"]
-
-    # Die Datei lesen
-    data = pd.read_fwf(filename, widths=col_widths, names=col_names, skiprows=34)
-
-    # Speichern der Spalten als Numpy-Arrays
-    temperature = data['t'].values
-    windspeed = data['WG'].values
-    direct_radiation = data['B'].values
-    diffuse_radiation = data['D'].values
-    global_radition = direct_radiation + diffuse_radiation
-
-    return temperature, windspeed, direct_radiation, global_radition
+    data = load_TRY(filename)
+    return data.t, data.WG, data.B, data.G
 
 ### Available data points of TRY files ###
 """
@@ -8,9 +8,12 @@ Description: Script for testing the heat generator functions.
 
 import sys
 import os
+import time
+import copy
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.districtheatsim.heat_generators import solar_thermal
+from src.districtheatsim.heat_generators import solar_radiation
 from src.districtheatsim.heat_generators import heat_generator_classes
 from src.districtheatsim.utilities.test_reference_year import import_TRY
 
@@ -203,6 +206,106 @@ def test_chp():
     plt.tight_layout()
     plt.show()
 
+def original_chp_storage(self, Last_L, duration):
+    # Speicherberechnung von CHP.storage vor der Auslagerung nach storage_dispatch
+    speicher_kapazitaet = self.Speicher_Volumen_BHKW * 4186 * (self.T_vorlauf - self.T_ruecklauf) / 3600  # kWh
+    speicher_fill = self.initial_fill * speicher_kapazitaet
+    min_speicher_fill = self.min_fill * speicher_kapazitaet
+    max_speicher_fill = self.max_fill * speicher_kapazitaet
+
+    self.Wärmeleistung_kW = np.zeros_like(Last_L)
+    self.Wärmeleistung_Speicher_kW = np.zeros_like(Last_L)
+    self.el_Leistung_BHKW_kW = np.zeros_like(Last_L)
+    self.speicher_fuellstand_BHKW = np.zeros_like(Last_L)
+
+    for i in range(len(Last_L)):
+        if self.BHKW_an:
+            if speicher_fill >= max_speicher_fill:
+                self.BHKW_an = False
+            else:
+                self.Wärmeleistung_kW[i] = self.th_Leistung_BHKW
+                if Last_L[i] < self.th_Leistung_BHKW:
+                    self.Wärmeleistung_Speicher_kW[i] = Last_L[i] - self.th_Leistung_BHKW
+                    speicher_fill += (self.th_Leistung_BHKW - Last_L[i]) * duration
+                    speicher_fill = float(min(speicher_fill, speicher_kapazitaet))
+                else:
+                    self.Wärmeleistung_Speicher_kW[i] = 0
+        else:
+            if speicher_fill <= min_speicher_fill:
+                self.BHKW_an = True
+
+        if not self.BHKW_an:
+            self.Wärmeleistung_kW[i] = 0
+            self.Wärmeleistung_Speicher_kW[i] = Last_L[i]
+            speicher_fill -= Last_L[i] * duration
+            speicher_fill = float(max(speicher_fill, 0))
+
+        self.el_Leistung_BHKW_kW[i] = self.Wärmeleistung_kW[i] / self.thermischer_Wirkungsgrad * self.el_Wirkungsgrad
+        self.speicher_fuellstand_BHKW[i] = speicher_fill / speicher_kapazitaet * 100  # %
+
+def original_biomass_boiler_storage(self, Last_L, duration):
+    # Speicherberechnung von BiomassBoiler.storage vor der Auslagerung nach storage_dispatch
+    speicher_kapazitaet = self.Speicher_Volumen * 4186 * (self.T_vorlauf - self.T_ruecklauf) / 3600  # kWh
+    speicher_fill = self.initial_fill * speicher_kapazitaet
+    min_speicher_fill = self.min_fill * speicher_kapazitaet
+    max_speicher_fill = self.max_fill * speicher_kapazitaet
+
+    self.Wärmeleistung_kW = np.zeros_like(Last_L)
+    self.Wärmeleistung_Speicher_kW = np.zeros_like(Last_L)
+    self.speicher_fuellstand = np.zeros_like(Last_L)
+
+    for i in range(len(Last_L)):
+        if self.BMK_an:
+            if speicher_fill >= max_speicher_fill:
+                self.BMK_an = False
+            else:
+                self.Wärmeleistung_kW[i] = self.P_BMK
+                if Last_L[i] < self.P_BMK:
+                    self.Wärmeleistung_Speicher_kW[i] = Last_L[i] - self.P_BMK
+                    speicher_fill += (self.P_BMK - Last_L[i]) * duration
+                    speicher_fill = float(min(speicher_fill, speicher_kapazitaet))
+                else:
+                    self.Wärmeleistung_Speicher_kW[i] = 0
+        else:
+            if speicher_fill <= min_speicher_fill:
+                self.BMK_an = True
+
+        if not self.BMK_an:
+            self.Wärmeleistung_kW[i] = 0
+            self.Wärmeleistung_Speicher_kW[i] = Last_L[i]
+            speicher_fill -= Last_L[i] * duration
+            speicher_fill = float(max(speicher_fill, 0))
+
+        self.speicher_fuellstand[i] = speicher_fill / speicher_kapazitaet * 100  # %
+
+def test_storage_dispatch_parity():
+    # Die Speicherberechnung von BHKW und Biomassekessel muss mit der ursprünglichen Berechnung in den Klassen übereinstimmen
+    rng = np.random.default_rng(42)
+    duration = 1
+    load_profiles = {"randint": rng.integers(50, 400, 8760), "uniform": rng.uniform(0, 400, 8760), "zero": np.zeros(8760)}
+    cases = [(100, 20, 0.0, 0.2, 0.8, True), (200, 50, 0.5, 0.2, 0.8, False), (300, 5, 0.0, 0.0, 1.0, True), 
+             (150.5, 10, 0.0, 0.2, 0.8, True), (100, 20, 1.5, 0.2, 0.8, True), (100, 20, 0.0, 0.2, 1.2, True)]
+
+    for name, Last_L in load_profiles.items():
+        for heat_output, volume, initial_fill, min_fill, max_fill, generator_on in cases:
+            chp = heat_generator_classes.CHP(name="BHKW", th_Leistung_BHKW=heat_output, speicher_aktiv=True, Speicher_Volumen_BHKW=volume, initial_fill=initial_fill, 
+                                             min_fill=min_fill, max_fill=max_fill, BHKW_an=generator_on)
+            biomass_boiler = heat_generator_classes.BiomassBoiler(name="Biomassekessel", P_BMK=heat_output, speicher_aktiv=True, Speicher_Volumen=volume, initial_fill=initial_fill, 
+                                                                  min_fill=min_fill, max_fill=max_fill, BMK_an=generator_on)
+            attributes = {original_chp_storage: (chp, ["Wärmeleistung_kW", "Wärmeleistung_Speicher_kW", "el_Leistung_BHKW_kW", "speicher_fuellstand_BHKW", "BHKW_an"]),
+                          original_biomass_boiler_storage: (biomass_boiler, ["Wärmeleistung_kW", "Wärmeleistung_Speicher_kW", "speicher_fuellstand", "BMK_an"])}
+
+            for original_storage, (generator, names) in attributes.items():
+                reference = copy.deepcopy(generator)
+                original_storage(reference, Last_L, duration)
+                generator.storage(Last_L, duration)
+                for attribute in names:
+                    reference_values, values = np.asarray(getattr(reference, attribute)), np.asarray(getattr(generator, attribute))
+                    # Die ursprüngliche Berechnung speichert alle Zeitreihen im Datentyp des Lastgangs
+                    assert np.array_equal(reference_values, values.astype(reference_values.dtype)), f"Abweichung bei {generator.name}, {attribute}, {name}, {heat_output} kW, {volume} m³"
+
+    print("Speicherberechnung BHKW/Biomassekessel: bitgenaue Übereinstimmung mit der ursprünglichen Berechnung")
+
 def test_solar_thermal():
     solarThermal = heat_generator_classes.SolarThermal(name="STA", bruttofläche_STA=200, vs=20, Typ="Vakuumröhrenkollektor", kosten_speicher_spez=750, kosten_fk_spez=430, kosten_vrk_spez=590, Tsmax=90, Longitude=-14.4222, 
                  STD_Longitude=-15, Latitude=51.1676, East_West_collector_azimuth_angle=0, Collector_tilt_angle=36, Tm_rl=60, Qsa=0, Vorwärmung_K=8, DT_WT_Solar_K=5, DT_WT_Netz_K=5)
@@ -248,6 +351,56 @@ def test_solar_thermal():
     WGK = solarThermal.calc_WGK(Wärmemenge, q, r, T, BEW, Stundensatz)
     print(f"Wärmegestehungskosten Solarthermie: {WGK:.2f} €/MWh")
 
+def test_solar_thermal_fast_calculation():
+    # Die schnelle Berechnung der Solarthermie muss mit der Referenzschleife auf Basis des TRY2015 übereinstimmen
+    TRY = import_TRY(get_resource_path("src/districtheatsim/data/TRY/TRY_511676144222/TRY2015_511676144222_Jahr.dat"))
+    time_steps = np.arange(np.datetime64('2019-01-01'), np.datetime64('2020-01-01', 'D'), dtype='datetime64[h]')
+    rng = np.random.default_rng(42)
+    Last_L = rng.uniform(20, 400, 8760)
+    VLT_L, RLT_L = rng.uniform(70, 90, 8760), rng.uniform(45, 60, 8760)
+
+    for Typ in ["Flachkollektor", "Vakuumröhrenkollektor"]:
+        for bruttofläche_STA, vs in [(200, 20), (2000, 50), (5000, 10)]:
+            start = time.time()
+            reference = solar_thermal.Berechnung_STA(bruttofläche_STA, vs, Typ, Last_L, VLT_L, RLT_L, TRY, time_steps, 0, 8760, 1, fast_calculation=False)
+            time_reference = time.time() - start
+            start = time.time()
+            result = solar_thermal.Berechnung_STA(bruttofläche_STA, vs, Typ, Last_L, VLT_L, RLT_L, TRY, time_steps, 0, 8760, 1, fast_calculation=True)
+            time_fast = time.time() - start
+
+            assert reference[0] == result[0], f"Abweichung der Wärmemenge bei {Typ}, {bruttofläche_STA} m², {vs} m³"
+            for reference_values, values in zip(reference[1:], result[1:]):
+                assert np.array_equal(reference_values, values), f"Abweichung der Zeitreihen bei {Typ}, {bruttofläche_STA} m², {vs} m³"
+
+            print(f"{Typ}, {bruttofläche_STA} m², {vs} m³: Wärmemenge {result[0]:.2f} MWh, Referenz {time_reference:.3f} s, schnelle Berechnung {time_fast:.3f} s")
+
+def benchmark_IAM(repeats=20):
+    # Vergleich der Interpolation der Incidence Angle Modifier über ein Jahr: Dict-Lookup mit np.vectorize und Tabellen-Lookup
+    IAM_W = {0: 1, 10: 1.02, 20: 1.03, 30: 1.03, 40: 1.03, 50: 0.96, 60: 1.07, 70: 1.19, 80: 0.595, 90: 0.0}
+    Incidence_angle = np.random.default_rng(42).uniform(-89.999, 89.999, 8760)
+
+    def IAM_dict(Incidence_angle, iam_data):
+        sverweis_1 = np.abs(Incidence_angle) - np.abs(Incidence_angle) % 10
+        sverweis_2 = np.vectorize(iam_data.get)(sverweis_1)
+        sverweis_3 = (np.abs(Incidence_angle) + 10) - (np.abs(Incidence_angle) + 10) % 10
+        sverweis_4 = np.vectorize(iam_data.get)(sverweis_3)
+        return sverweis_2 + (np.abs(Incidence_angle) - sverweis_1) / (sverweis_3 - sverweis_1) * (sverweis_4 - sverweis_2)
+
+    iam_table = solar_radiation.IAM_table(IAM_W)
+    assert np.array_equal(IAM_dict(Incidence_angle, IAM_W), solar_radiation.IAM(Incidence_angle, iam_table))
+
+    start = time.time()
+    for _ in range(repeats):
+        IAM_dict(Incidence_angle, IAM_W)
+    time_dict = (time.time() - start) / repeats
+
+    start = time.time()
+    for _ in range(repeats):
+        solar_radiation.IAM(Incidence_angle, iam_table)
+    time_table = (time.time() - start) / repeats
+
+    print(f"IAM über 8760 h: np.vectorize {time_dict * 1000:.2f} ms, Tabellen-Lookup {time_table * 1000:.2f} ms, Faktor {time_dict / time_table:.1f}")
+
 def test_waste_heat_pump():
     wasteHeatPump = heat_generator_classes.WasteHeatPump(name="Abwärme", Kühlleistung_Abwärme=50, Temperatur_Abwärme=30, spez_Investitionskosten_Abwärme=500, spezifische_Investitionskosten_WP=1000)
     
@@ -340,6 +493,26 @@ def test_geothermal_heat_pump():
     WGK = geothermalHeatPump.WGK(geothermalHeatPump.max_Wärmeleistung, Wärmemenge, Strombedarf, geothermalHeatPump.spez_Investitionskosten_Erdsonden, Strompreis, q, r, T, BEW, Stundensatz)
     print(f"Wärmegestehungskosten Geothermie: {WGK:.2f} €/MWh")
 
+def test_geothermal_solver():
+    # Das schnelle Lösungsverfahren für die Betriebsstunden muss das gleiche Ergebnis wie die Bisektion liefern
+    COP_data = np.genfromtxt(get_resource_path("src/districtheatsim/data/COP/Kennlinien WP.csv"), delimiter=';')
+    rng = np.random.default_rng(42)
+    duration = 1
+
+    for Fläche, Bohrtiefe, min_Teillast in [(200, 100, 0.2), (5000, 150, 0.2), (20000, 80, 0.4)]:
+        Last_L = rng.uniform(0, 1000, 8760)
+        VLT_L = rng.uniform(65, 90, 8760)
+
+        results = {}
+        for solver in ["fast", "bisection"]:
+            geothermalHeatPump = heat_generator_classes.Geothermal(name="Geothermie", Fläche=Fläche, Bohrtiefe=Bohrtiefe, Temperatur_Geothermie=10, min_Teillast=min_Teillast)
+            start = time.time()
+            results[solver] = geothermalHeatPump.Geothermie(Last_L, VLT_L, COP_data, duration, solver=solver)
+            print(f"Geothermie {Fläche} m², {Bohrtiefe} m, Verfahren {solver}: {time.time() - start:.4f} s")
+
+        assert results["fast"][:2] == results["bisection"][:2]
+        assert np.array_equal(results["fast"][2], results["bisection"][2]) and np.array_equal(results["fast"][3], results["bisection"][3])
+
 def test_berechnung_erzeugermix(optimize=False, plot=True):
     solarThermal = heat_generator_classes.SolarThermal(name="Solarthermie", bruttofläche_STA=200, vs=20, Typ="Vakuumröhrenkollektor", kosten_speicher_spez=800, kosten_vrk_spez=500)
     bBoiler = heat_generator_classes.BiomassBoiler(name="Biomassekessel", P_BMK=150, Größe_Holzlager=20, spez_Investitionskosten=200, spez_Investitionskosten_Holzlager=400)
@@ -411,6 +584,84 @@ def test_berechnung_erzeugermix(optimize=False, plot=True):
 
         plt.show()
 
+def get_optimization_test_mix():
+    # Mix mit 6 Optimierungsvariablen: Solarthermie (Fläche, Speicher), BHKW (Leistung, Speicher), Biomassekessel (Leistung, Speicher)
+    tech_order = [heat_generator_classes.SolarThermal(name="Solarthermie", bruttofläche_STA=200, vs=20, Typ="Vakuumröhrenkollektor"),
+                  heat_generator_classes.CHP(name="BHKW", th_Leistung_BHKW=50, speicher_aktiv=True),
+                  heat_generator_classes.BiomassBoiler(name="Biomassekessel", P_BMK=150, speicher_aktiv=True),
+                  heat_generator_classes.GasBoiler(name="Gaskessel")]
+
+    TRY = import_TRY(get_resource_path("src/districtheatsim/data/TRY/TRY_511676144222/TRY2015_511676144222_Jahr.dat"))
+    COP_data = np.genfromtxt(get_resource_path("src/districtheatsim/data/COP/Kennlinien WP.csv"), delimiter=';')
+
+    Last_L = np.random.default_rng(1).integers(50, 400, 8760).astype("float")
+    time_steps = np.arange(np.datetime64('2019-01-01'), np.datetime64('2020-01-01', 'D'), dtype='datetime64[h]')
+    initial_data = time_steps, Last_L, np.full(8760, 80), np.full(8760, 55)
+    weights = {'WGK_Gesamt': 1.0, 'specific_emissions_Gesamt': 0.0, 'primärenergiefaktor_Gesamt': 0.0}
+
+    return tech_order, initial_data, TRY, COP_data, weights
+
+def benchmark_optimize_mix(num_workers_list=(1, 2, 4, 6)):
+    for num_workers in num_workers_list:
+        tech_order, initial_data, TRY, COP_data, weights = get_optimization_test_mix()
+
+        start_time = time.perf_counter()
+        tech_order = heat_generator_classes.optimize_mix(tech_order, initial_data, 0, 8760, TRY, COP_data, 70, 150, 60, "Nein", 5, 3, 20, 45, weights, num_workers=num_workers)
+        print(f"{num_workers} Prozesse: {time.perf_counter() - start_time:.1f} s")
+
+def test_global_optimize_mix(method="differential_evolution", time_limit=300, num_workers=4):
+    tech_order, initial_data, TRY, COP_data, weights = get_optimization_test_mix()
+
+    log = []
+    tech_order = heat_generator_classes.optimize_mix(tech_order, initial_data, 0, 8760, TRY, COP_data, 70, 150, 60, "Nein", 5, 3, 20, 45, weights, num_workers=num_workers, 
+                                                     method=method, time_limit=time_limit, log_callback=log.append, seed=1)
+
+    best_values = [entry['best_value'] for entry in log]
+    assert all(np.diff(best_values) <= 0), "Der beste Zielwert darf im Verlauf der Optimierung nicht steigen"
+
+    plt.plot([entry['time'] for entry in log], best_values, marker="o")
+    plt.xlabel("Zeit in s")
+    plt.ylabel("Gewichtete Summe")
+    plt.title(f"Konvergenzverlauf {method}")
+    plt.show()
+
+def test_pareto_optimize_mix(population_size=40, generations=30, num_workers=4):
+    tech_order, initial_data, TRY, COP_data, weights = get_optimization_test_mix()
+
+    pareto_front = heat_generator_classes.optimize_mix_pareto(tech_order, initial_data, 0, 8760, TRY, COP_data, 70, 150, 60, "Nein", 5, 3, 20, 45, num_workers=num_workers, 
+                                                              population_size=population_size, generations=generations, seed=1)
+
+    # Die Zielgrößen des gewählten Designs stammen aus den gespeicherten Auswertungen und müssen der Neuberechnung entsprechen
+    index = pareto_front.select_weighted(weights)
+    general_results = heat_generator_classes.Berechnung_Erzeugermix(pareto_front.apply(index, tech_order), initial_data, 0, 8760, TRY, COP_data, 70, 150, 60, "Nein", 
+                                                                    kapitalzins=5, preissteigerungsrate=3, betrachtungszeitraum=20, stundensatz=45)
+    for criterion, value in pareto_front.get_criteria(index).items():
+        assert np.isclose(general_results[criterion], value), criterion
+
+    plt.scatter(pareto_front.criteria[:, 0], pareto_front.criteria[:, 1], c=pareto_front.criteria[:, 2])
+    plt.colorbar(label="Primärenergiefaktor")
+    plt.xlabel("Wärmegestehungskosten in €/MWh")
+    plt.ylabel("spez. CO2-Emissionen in t_CO2/MWh_th")
+    plt.show()
+
+def test_price_sweep(repeats=1):
+    tech_order, initial_data, TRY, COP_data, weights = get_optimization_test_mix()
+    tech_order.append(heat_generator_classes.RiverHeatPump(name="Flusswasser", Wärmeleistung_FW_WP=100, Temperatur_FW_WP=8))
+    gas_prices, electricity_prices, wood_prices = np.linspace(40, 100, 5), np.linspace(100, 250, 5), np.linspace(30, 90, 5)
+
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        sweep_results = heat_generator_classes.Berechnung_Erzeugermix_Preisvariation(copy.deepcopy(tech_order), initial_data, 0, 8760, TRY, COP_data, gas_prices, electricity_prices, wood_prices, "Nein")
+    print(f"Preisvariation mit einer Berechnung: {(time.perf_counter() - start_time) / repeats:.2f} s")
+
+    start_time = time.perf_counter()
+    for i, gas_price in enumerate(gas_prices):
+        for j, electricity_price in enumerate(electricity_prices):
+            for k, wood_price in enumerate(wood_prices):
+                general_results = heat_generator_classes.Berechnung_Erzeugermix(copy.deepcopy(tech_order), initial_data, 0, 8760, TRY, COP_data, gas_price, electricity_price, wood_price, "Nein")
+                assert np.isclose(general_results['WGK_Gesamt'], sweep_results['WGK_Gesamt'][i, j, k])
+    print(f"Preisvariation mit {len(gas_prices) * len(electricity_prices) * len(wood_prices)} Berechnungen: {time.perf_counter() - start_time:.2f} s")
+
 def plotStackPlot(figure, t, data, labels, Last):
     ax = figure.add_subplot(111)
     ax.stackplot(t, data, labels=labels)
@@ -442,10 +693,18 @@ def plotPieChart(figure, Anteile, labels):
 #test_annuität()
 #test_biomass_boiler()
 #test_gas_boiler()
+#test_storage_dispatch_parity()
 test_chp()
 #test_solar_thermal()
+#test_solar_thermal_fast_calculation()
+#benchmark_IAM()
 #test_waste_heat_pump()
 #test_river_heat_pump()
 #test_geothermal_heat_pump()
+#test_geothermal_solver()
 #test_berechnung_erzeugermix(optimize=False, plot=True)
-#test_berechnung_erzeugermix(optimize=True, plot=True)
\ No newline at end of file
+#test_berechnung_erzeugermix(optimize=True, plot=True)
+#benchmark_optimize_mix()
+#test_global_optimize_mix()
+#test_pareto_optimize_mix()
+#test_price_sweep()
\ No newline at end of file
@@ -12,6 +12,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from src.districtheatsim.heat_requirement import heat_requirement_BDEW
 from src.districtheatsim.heat_requirement import heat_requirement_VDI4655
+from src.districtheatsim.heat_requirement.heat_requirement_calculation_csv import HeatDemandProfileEngine, generate_profiles_from_csv
+
+import time
+import numpy as np
+import pandas as pd
 
 # Berechnung mit BDEW-SLPs
 def VDI4655():
@@ -47,5 +52,115 @@ def BDEW():
     print(f"Wärmebedarf Gesamt: {hourly_heat_demand}")    
     print(f"Temperaturen: {hourly_temperature}")
 
+# Berechnung vieler Gebäude mit der Batch-Berechnung im Vergleich zur Einzelberechnung
+def batch_BDEW():
+    YEU_heating_kWh = np.array([20000, 35000, 12000])
+    real_ww_share = np.array([0.1, 0.2, 0.15])
+    building_type = "HMF"
+    subtype = "03"
+    TRY = heat_requirement_BDEW.get_resource_path('data/TRY/TRY_511676144222/TRY2015_511676144222_Jahr.dat')
+
+    engine = HeatDemandProfileEngine(TRY)
+    hourly_intervals, total_heat_kW, heating_kW, warmwater_kW = engine.calculate(YEU_heating_kWh, [building_type] * 3, [subtype] * 3, real_ww_share, ["BDEW"] * 3)
+
+    # Die BDEW-Profile der Batch-Berechnung müssen bitgenau mit der Einzelberechnung übereinstimmen
+    for i in range(len(YEU_heating_kWh)):
+        single_intervals, single_total_heat_kW, single_heating_kW, single_warmwater_kW, _ = heat_requirement_BDEW.calculate(YEU_heating_kWh[i], building_type, subtype, TRY=TRY, 
+                                                                                                                           real_ww_share=real_ww_share[i])
+        assert np.array_equal(hourly_intervals, single_intervals)
+        assert np.array_equal(total_heat_kW[i], single_total_heat_kW), f"Gebäude {i}: Gesamtwärmebedarf"
+        assert np.array_equal(heating_kW[i], single_heating_kW), f"Gebäude {i}: Heizwärmebedarf"
+        assert np.array_equal(warmwater_kW[i], single_warmwater_kW), f"Gebäude {i}: Warmwasserbedarf"
+
+    print("Batch-Berechnung BDEW: bitgenaue Übereinstimmung mit der Einzelberechnung")
+
+def batch_VDI4655():
+    YEU_heating_kWh = np.array([20000, 35000, 12000, 8000])
+    ww_share = np.array([0.1, 0.2, 0.15, 0.25])
+    building_types = ["EFH", "MFH", "EFH", "MFH"]
+    TRY = heat_requirement_BDEW.get_resource_path('data/TRY/TRY_511676144222/TRY2015_511676144222_Jahr.dat')
+
+    engine = HeatDemandProfileEngine(TRY)
+    time_15min, total_heat_kW, heating_kW, warmwater_kW = engine.calculate(YEU_heating_kWh, building_types, ["03"] * 4, ww_share, ["VDI4655"] * 4)
+
+    # Die Normierung erfolgt mit np.sum, daher weichen die Profile im Bereich der Rundungsfehler von der Einzelberechnung ab
+    for i, building_type in enumerate(building_types):
+        single_time_15min, single_total_heat_kW, single_heating_kW, single_warmwater_kW, _, _ = heat_requirement_VDI4655.calculate(
+            YEU_heating_kWh[i] * (1 - ww_share[i]), YEU_heating_kWh[i] * ww_share[i], building_type=building_type, TRY=TRY)
+        assert np.array_equal(time_15min, single_time_15min)
+        assert np.allclose(total_heat_kW[i], single_total_heat_kW, rtol=1e-10, atol=0), f"Gebäude {i}: Gesamtwärmebedarf"
+        assert np.allclose(heating_kW[i], single_heating_kW, rtol=1e-10, atol=0), f"Gebäude {i}: Heizwärmebedarf"
+        assert np.allclose(warmwater_kW[i], single_warmwater_kW, rtol=1e-10, atol=0), f"Gebäude {i}: Warmwasserbedarf"
+
+    print("Batch-Berechnung VDI 4655: Übereinstimmung mit der Einzelberechnung")
+
+def batch_profiles_from_csv():
+    TRY = heat_requirement_BDEW.get_resource_path('data/TRY/TRY_511676144222/TRY2015_511676144222_Jahr.dat')
+    # Die Gebäude der Gruppen sind abwechselnd angeordnet, die Profile müssen in der Reihenfolge der Zeilen zurückgegeben werden
+    data = pd.DataFrame({"Wärmebedarf": [20000, 50000, 30000, 80000, 12000], "Gebäudetyp": ["HMF", "GKO", "HMF", "GHA", "GKO"], 
+                         "Subtyp": ["03", "03", "04", "03", "03"], "WW_Anteil": [0.2, 0.1, 0.15, 0.05, 0.1], "Normaußentemperatur": [-12, -12, -14, -12, -10], 
+                         "VLT_max": [70, 75, 70, 80, 75], "RLT_max": [55, 50, 55, 60, 50], "Steigung_Heizkurve": [1.5, 1.5, 1.5, 1.5, 1.5]})
+
+    yearly_time_steps, total_heat_W, heating_heat_W, warmwater_heat_W, max_heat_requirement_W, _, _, _ = generate_profiles_from_csv(data, TRY)
+
+    for i, row in data.iterrows():
+        _, single_total_heat_kW, single_heating_kW, single_warmwater_kW, _ = heat_requirement_BDEW.calculate(row["Wärmebedarf"], row["Gebäudetyp"], row["Subtyp"], TRY=TRY, 
+                                                                                                             real_ww_share=row["WW_Anteil"])
+        assert np.array_equal(total_heat_W[i], np.where(single_total_heat_kW < 0, 0, single_total_heat_kW) * 1000), f"Zeile {i}: Gesamtwärmebedarf"
+        assert np.array_equal(heating_heat_W[i], np.where(single_heating_kW < 0, 0, single_heating_kW) * 1000), f"Zeile {i}: Heizwärmebedarf"
+        assert np.array_equal(warmwater_heat_W[i], np.where(single_warmwater_kW < 0, 0, single_warmwater_kW) * 1000), f"Zeile {i}: Warmwasserbedarf"
+    assert np.array_equal(max_heat_requirement_W, np.max(total_heat_W, axis=1))
+
+    # Gebäude ohne gültige Berechnungsmethode werden nicht mehr stillschweigend mit dem Profil des vorherigen Gebäudes berechnet
+    data.loc[2, "Gebäudetyp"] = "XYZ"
+    try:
+        generate_profiles_from_csv(data, TRY)
+    except ValueError as e:
+        print(f"Erwarteter Fehler: {e}")
+    else:
+        raise AssertionError("Für den Gebäudetyp XYZ muss ein ValueError ausgelöst werden")
+
+    print("Profile aus CSV-Daten: Reihenfolge der Gebäude über die Gruppen erhalten")
+
+# Vergleich der Rechenzeit der Stundenfaktoren aus dem dichten Array mit den Merges der Stundenwerte
+def benchmark_BDEW_hour_factors(building_counts=(1, 1000)):
+    TRY = heat_requirement_BDEW.get_resource_path('data/TRY/TRY_511676144222/TRY2015_511676144222_Jahr.dat')
+    hourly_temperature = heat_requirement_BDEW.import_TRY(TRY)
+    _, _, _, daily_weekdays = heat_requirement_BDEW.generate_year_months_days_weekdays(2021)
+
+    hourly_reference_temperature = np.round((hourly_temperature + 2.5) * 2, -1) / 2 - 2.5
+    hourly_reference_temperature_2 = np.where(hourly_reference_temperature > hourly_temperature, hourly_reference_temperature - 5,
+                                              np.where(hourly_reference_temperature > 27.5, 27.5, hourly_reference_temperature + 5))
+    upper_limit = np.maximum(hourly_reference_temperature, hourly_reference_temperature_2)
+    lower_limit = np.minimum(hourly_reference_temperature, hourly_reference_temperature_2)
+    daily_hours = np.tile(np.arange(24), len(daily_weekdays))
+    hourly_weekdays = np.repeat(daily_weekdays, 24)
+
+    hourly_data = heat_requirement_BDEW.read_hourly_coefficients()
+    start = time.perf_counter()
+    hourly_coefficients = heat_requirement_BDEW.HourlyCoefficients(hourly_data)
+    print(f"Aufbau des Arrays der Stundenfaktoren: {time.perf_counter() - start:.4f} s")
+
+    profile_types = list(hourly_coefficients.profile_types)
+    for building_count in building_counts:
+        building_types = [profile_types[i % len(profile_types)] for i in range(building_count)]
+
+        start = time.perf_counter()
+        merge_factors = [heat_requirement_BDEW.get_hour_factors_merge(hourly_data, building_type, hourly_weekdays, lower_limit, upper_limit, daily_hours)
+                         for building_type in building_types]
+        merge_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        array_factors = [(hourly_coefficients.get_hour_factors(building_type, hourly_weekdays, lower_limit, daily_hours),
+                          hourly_coefficients.get_hour_factors(building_type, hourly_weekdays, upper_limit, daily_hours)) for building_type in building_types]
+        array_time = time.perf_counter() - start
+
+        identical = all(np.array_equal(a, b, equal_nan=True) for merge, array in zip(merge_factors, array_factors) for a, b in zip(merge, array))
+        print(f"{building_count} Gebäude: Merge {merge_time:.3f} s, Array {array_time:.3f} s, Faktor {merge_time / array_time:.1f}, identisch: {identical}")
+
 VDI4655()
 BDEW()
+batch_BDEW()
+batch_VDI4655()
+batch_profiles_from_csv()
+#benchmark_BDEW_hour_factors()
@@ -7,6 +7,7 @@ Description: Script for testing the pandapipes net simulation functions.
 """
 
 import time
+import copy
 import logging
 import sys
 import os
@@ -21,6 +22,8 @@ from src.districtheatsim.net_simulation_pandapipes.config_plot import config_plo
 
 from src.districtheatsim.net_simulation_pandapipes.pp_net_initialisation_geojson import *
 from src.districtheatsim.net_simulation_pandapipes.utilities import *
+from src.districtheatsim.net_simulation_pandapipes.pp_net_time_series_simulation import thermohydraulic_time_series_net, calculate_results
+from src.districtheatsim.net_simulation_pandapipes.surrogate_model import surrogate_time_series_net
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -360,7 +363,50 @@ def initialize_net_geojson2():
 
     return net
 
+def benchmark_surrogate_model(net, yearly_time_steps, qext_w_profiles, supply_temperature=85, supply_temperature_heat_consumer=65, return_temperature_heat_consumer=55, 
+                              start=0, end=8760, n_snapshots=12):
+    logging.info("Starting full time series calculation")
+    start_time = time.time()
+    _, net_full, net_results = thermohydraulic_time_series_net(copy.deepcopy(net), yearly_time_steps, qext_w_profiles, start, end, supply_temperature, 
+                                                               supply_temperature_heat_consumer, return_temperature_heat_consumer)
+    full_results = calculate_results(net_full, net_results)
+    full_time = time.time() - start_time
+
+    logging.info("Starting surrogate model calculation")
+    start_time = time.time()
+    _, _, surrogate_results = surrogate_time_series_net(copy.deepcopy(net), yearly_time_steps, qext_w_profiles, start, end, supply_temperature, 
+                                                        supply_temperature_heat_consumer, return_temperature_heat_consumer, n_snapshots=n_snapshots)
+    surrogate_time = time.time() - start_time
+
+    print(f"Laufzeit vollständige Berechnung: {full_time:.2f} s, Ersatzmodell: {surrogate_time:.2f} s (Faktor {full_time / surrogate_time:.1f})")
+    for pump_type, pumps in full_results.items():
+        for idx, pump_data in pumps.items():
+            for result, values in pump_data.items():
+                error = surrogate_results[pump_type][idx][result] - values
+                print(f"{pump_type} {idx} {result}: RMSE {np.sqrt(np.mean(error**2)):.4f}, max. Abweichung {np.max(np.abs(error)):.4f}")
+
+    return full_results, surrogate_results
+
+def benchmark_surrogate_model_geojson():
+    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    vorlauf = f"{base_path}\project_data\Bad Muskau\Wärmenetz\Vorlauf.geojson"
+    ruecklauf = f"{base_path}\project_data\Bad Muskau\Wärmenetz\Rücklauf.geojson"
+    hast = f"{base_path}\project_data\Bad Muskau\Wärmenetz\HAST.geojson"
+    erzeugeranlagen = f"{base_path}\project_data\Bad Muskau\Wärmenetz\Erzeugeranlagen.geojson"
+    json_path = f"{base_path}\project_data\Bad Muskau\Lastgang\Gebäude Lastgang.json"
+    COP_filename = f"{base_path}\src\districtheatsim\data\COP\Kennlinien WP.csv"
+
+    net, yearly_time_steps, waerme_hast_ges_W, return_temperature_heat_consumer, supply_temperature_buildings, return_temperature_buildings, \
+        supply_temperature_building_curve, return_temperature_building_curve, strombedarf_hast_ges_W, max_el_leistung_hast_ges_W = initialize_geojson(vorlauf, ruecklauf, hast, erzeugeranlagen, \
+                                                                                json_path, COP_filename, 65, 55, 85, 4, 1.5, "Niedertemperaturnetz", "KMR 100/250-2v", 5, 1, "KMR", "2v", 1.5)
+
+    net = net_optimization(net, 1, 1.5, "KMR", "2v")
+
+    return benchmark_surrogate_model(net, yearly_time_steps, waerme_hast_ges_W, supply_temperature=85, supply_temperature_heat_consumer=65, 
+                                     return_temperature_heat_consumer=return_temperature_heat_consumer)
+
 #get_test_net()
 #get_test_net_2()
 #initialize_net_geojson()
-initialize_net_geojson2()
\ No newline at end of file
+initialize_net_geojson2()
+#benchmark_surrogate_model_geojson()
\ No newline at end of file